@@ -0,0 +1,190 @@
+import os
+import numpy as np
+
+# Nearest neighbour indexes already opened by this process, keyed by path
+_ann_indexes = {}
+
+def get_index_path(embedding_model):
+    """
+    Get where the nearest neighbour index of a model is kept, next to the model
+
+    embedding_model(EmbeddingModel): The model the index is built from
+    RETURNS(str): The path to the .npz index file
+    """
+    base = os.path.splitext(embedding_model._file_path.rstrip('/\\'))[0]
+    return f'{base}_ann_{embedding_model.fingerprint()}.npz'
+
+class AnnIndex():
+    def __init__(self, centroids, order, offsets, recall_curve):
+        """
+        Initialize the inverted file (IVF) index. Every vector is assigned to its
+        nearest centroid, and a search only scores the vectors in the lists of the
+        nprobe centroids closest to the query instead of the whole vocabulary.
+
+        centroids(np.ndarray): The (nlist, dim) unit-normalised list centroids
+        order(np.ndarray): The model rows sorted by list
+        offsets(np.ndarray): Where each list starts in order, nlist + 1 entries
+        recall_curve(np.ndarray): (nprobe, recall@topn) pairs measured at build time
+
+        RETURNS(AnnIndex): The newly constructed object
+        """
+        self._centroids = centroids
+        self._order = order
+        self._offsets = offsets
+        self._recall_curve = recall_curve
+        self._nprobe = len(centroids)
+
+    def set_recall(self, recall):
+        """
+        Use the fewest lists that reached the given recall@topn at build time
+
+        recall(float): The target recall against the exact search, between 0 and 1
+        """
+        reached = self._recall_curve[self._recall_curve[:, 1] >= recall]
+        self._nprobe = int(reached[0, 0]) if len(reached) else len(self._centroids)
+
+    def get_nprobe(self):
+        return self._nprobe
+
+    def search(self, embedding_model, word, topn, nprobe=None, row_mask=None):
+        """
+        Retrieves the approximate top n most similar keys for a given word
+
+        embedding_model(EmbeddingModel): The model the index was built from
+        word(str): The word to find the most similar keys of
+        topn(int): the number of top similar keys to retrieve
+        nprobe(int|None): The number of lists to search, the tuned value if None
+        row_mask(np.ndarray|None): Only the rows set in this boolean mask are searched,
+        e.g. those of the clue_senses, every row if None
+
+        RETURNS(list): The most similar keys, excluding the word itself
+        """
+        query = embedding_model.get_vectors([word])[0]
+        query_row = embedding_model.get_indices([word])[0]
+        if query_row < 0:
+            raise KeyError(f"Key '{word}' not present")
+        nprobe = min(nprobe or self._nprobe, len(self._centroids))
+        lists = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._order[self._offsets[i]:self._offsets[i + 1]] for i in lists])
+        rows = rows[rows != query_row]
+        if row_mask is not None:
+            rows = rows[row_mask[rows]]
+        # Read the rows in order, which is kinder to a memory-mapped model
+        rows = np.sort(rows)
+        count = min(topn, len(rows))
+        if count == 0:
+            return []
+        scores = embedding_model.get_row_vectors(rows) @ query
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        keys = embedding_model.get_keys()
+        return [keys[row] for row in rows[best]]
+
+    def save(self, file_path):
+        np.savez(file_path, centroids=self._centroids, order=self._order, offsets=self._offsets,
+                 recall_curve=self._recall_curve)
+
+    @classmethod
+    def load(cls, file_path):
+        data = np.load(file_path)
+        return cls(data['centroids'], data['order'], data['offsets'], data['recall_curve'])
+
+def _spherical_kmeans(vectors, nlist, iterations, rng):
+    """
+    Clusters unit vectors by cosine similarity
+
+    vectors(np.ndarray): The unit-normalised vectors to cluster
+    nlist(int): The number of clusters
+    iterations(int): The number of assignment and update steps
+    rng(np.random.Generator): The random generator picking the initial centroids
+
+    RETURNS(np.ndarray): The (nlist, dim) unit-normalised centroids
+    """
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Keep the old centroid for empty clusters
+        centroids = np.where(norms > 0, sums / np.where(norms == 0, 1, norms), centroids)
+    return centroids
+
+def build_ann_index(embedding_model, topn, nlist=None, sample_size=100000, iterations=10,
+                    query_words=(), chunk_size=100000, seed=0):
+    """
+    Builds the IVF index offline and measures its recall@topn against the exact
+    search for every nprobe up to full recall, so the recall can be configured
+    without rebuilding.
+
+    embedding_model(EmbeddingModel): The model to index
+    topn(int): The number of most similar words the recall is measured at
+    nlist(int|None): The number of lists, the square root of the vocabulary size if None
+    sample_size(int): The number of vectors the centroids are trained on
+    iterations(int): The number of k-means iterations
+    query_words(list): The words the recall is measured on, usually the codename words
+    chunk_size(int): The number of vectors assigned at a time
+    seed(int): The random seed for training
+
+    RETURNS(AnnIndex): The built index
+    """
+    rng = np.random.default_rng(seed)
+    count = len(embedding_model.get_keys())
+    nlist = nlist or max(1, int(np.sqrt(count)))
+    sample = np.sort(rng.choice(count, min(sample_size, count), replace=False))
+    centroids = _spherical_kmeans(embedding_model.get_row_vectors(sample), nlist, iterations, rng)
+
+    assignment = np.empty(count, dtype=np.int64)
+    for start in range(0, count, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, count))
+        assignment[rows] = np.argmax(embedding_model.get_row_vectors(rows) @ centroids.T, axis=1)
+    order = np.argsort(assignment, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist))))
+    index = AnnIndex(centroids, order, offsets, np.array([[nlist, 1.0]]))
+
+    # Measure recall@topn for a doubling number of lists, against the exact search of the same senses
+    exact = {word: set(embedding_model._embedding_model.similar_keys(word, topn)) for word in query_words}
+    row_mask = embedding_model._embedding_model.get_search_mask()
+    recall_curve = []
+    nprobe = 1
+    while exact and nprobe < nlist:
+        recall = np.mean([len(exact[word].intersection(index.search(embedding_model, word, topn, nprobe, row_mask))) / max(len(exact[word]), 1)
+                          for word in exact])
+        recall_curve.append((nprobe, recall))
+        if recall >= 1.0:
+            break
+        nprobe *= 2
+    recall_curve.append((nlist, 1.0))
+    return AnnIndex(centroids, order, offsets, np.array(recall_curve))
+
+def load_ann_index(embedding_model, recall):
+    """
+    Opens the nearest neighbour index of a model if it has been built
+
+    embedding_model(EmbeddingModel): The model the index was built from
+    recall(float): The target recall@topn against the exact search
+    RETURNS(AnnIndex|None): The index, None if it has not been built
+    """
+    file_path = get_index_path(embedding_model)
+    if file_path not in _ann_indexes:
+        if not os.path.isfile(file_path):
+            return None
+        _ann_indexes[file_path] = AnnIndex.load(file_path)
+    _ann_indexes[file_path].set_recall(recall)
+    return _ann_indexes[file_path]
+
+if __name__ == "__main__":
+    from embedding_model import EmbeddingModel
+    from word_pack import load_word_pack
+    # Builds the index for the model in config.yaml, measuring recall at its topn
+    embedding_model = EmbeddingModel()
+    config = embedding_model._config
+    word_pack = load_word_pack(embedding_model, config['model_paths']['codename_words']['file_path'])
+    file_path = get_index_path(embedding_model)
+    print(f"Building nearest neighbour index {file_path}...")
+    index = build_ann_index(embedding_model, config['hyperparameters']['topn'],
+                            nlist=config['hyperparameters'].get('ann_nlist'), query_words=word_pack.get_keys())
+    index.save(file_path)
+    for nprobe, recall in index._recall_curve:
+        print(f"nprobe: {int(nprobe)}, recall: {recall:.3f}")
+    print("Done")
@@ -0,0 +1,147 @@
+from engine import GameEngine
+from instrumentation import collect_stats, timer
+import time
+import numpy as np
+
+def _share_time(seconds, name, stats):
+    # Work done once for several games counts as one call in each, splitting its time evenly
+    for game_stats in stats:
+        game_stats.add_time(name, seconds / len(stats))
+
+class BatchSimulator():
+    def __init__(self, games, embedding_model=None):
+        """
+        Initialize the BatchSimulator, which plays many automated games in lock-step.
+        Every step gives a clue in all games waiting for one, scoring the candidate
+        clues of all of them with one matrix product, then suggests guesses in all
+        games waiting for them with one batched matrix product. Each game is driven
+        by its own GameEngine, so turns and reveals follow GameLogic.automate_game.
+        Time spent on work shared by several games is split evenly between their stats.
+
+        games(list): The GameLogic objects to play, sharing one embedding model
+        embedding_model(EmbeddingModel|None): The model to score with, that of the first game if None
+
+        RETURNS(BatchSimulator): The newly constructed object
+        """
+        self._games = games
+        self._embedding_model = embedding_model if embedding_model is not None else games[0]._board._embedding_model
+
+    def run(self, team='blue'):
+        """
+        Plays every game until it is won or lost
+
+        team(str): The team starting every game
+
+        RETURNS(list): The result tuple of each game, as returned by GameLogic.automate_game
+        """
+        began = time.perf_counter()
+        engines = [GameEngine(game) for game in self._games]
+        for engine in engines:
+            engine.start(team)
+        active = engines
+        while active:
+            # Enemy's round once the intended number is reached
+            for engine in active:
+                if engine.turn_done():
+                    engine.end_turn()
+            # Give a clue in every game whose team has no clue yet
+            needs_clue = [engine for engine in active if engine.needs_clue()]
+            if needs_clue:
+                clues = self._give_clues([engine._game._get_spymaster(engine.get_team()) for engine in needs_clue],
+                                         [engine._game._stats for engine in needs_clue])
+                for engine, clue_and_number in zip(needs_clue, clues):
+                    if clue_and_number is None:
+                        # The spymaster has no clue to give
+                        engine.pass_turn()
+                    else:
+                        engine.give_clue(clue_and_number)
+
+            # Teams which passed have nothing to guess for
+            guessing = [engine for engine in active if not engine.needs_clue() and not engine.is_over()]
+            if guessing:
+                suggestions = self._suggest_guesses([engine._game._get_guesser(engine.get_team()) for engine in guessing],
+                                                    [engine._game._stats for engine in guessing])
+                for engine, suggested_words in zip(guessing, suggestions):
+                    engine.apply_suggestions(suggested_words)
+            active = [engine for engine in active if not engine.is_over()]
+        _share_time(time.perf_counter() - began, 'game.play', [game._stats for game in self._games])
+        return [engine.get_result() for engine in engines]
+
+    def _give_clues(self, spymasters, stats):
+        """
+        Gives a clue from each spymaster, scored as the Spymaster scores it on its own.
+        Every spymaster keeps the scores of its candidates across turns, and the
+        candidates none of them has scored yet are merged and compared to the board
+        words of every game with one similarity_matrix call, the one the Spymaster
+        scores with, so the similarity table is used alike.
+
+        spymasters(list): The Spymaster objects to give a clue
+        stats(list): The Stats of each spymaster's game
+
+        RETURNS(list): A (clue, intended number) tuple for each spymaster, None if it
+        has no clue to give
+        """
+        boards = []
+        candidates = []
+        for spymaster, game_stats in zip(spymasters, stats):
+            with collect_stats(game_stats), timer('spymaster.clue_candidates'):
+                boards.append(spymaster._get_team_and_bad_words())
+                candidates.append(spymaster._get_clue_candidates(boards[-1][0], self._embedding_model))
+            game_stats.count('spymaster.candidates', len(candidates[-1]))
+
+        for spymaster, (team_words, bad_words), game_stats in zip(spymasters, boards, stats):
+            with collect_stats(game_stats), timer('spymaster.update_state'):
+                spymaster._update_state(team_words + bad_words, self._embedding_model)
+
+        began = time.perf_counter()
+        new_candidates = [spymaster._get_unscored(game_candidates) for spymaster, game_candidates in zip(spymasters, candidates)]
+        union = list(dict.fromkeys(candidate for game_candidates in new_candidates for candidate in game_candidates))
+        if union:
+            columns = list(dict.fromkeys(word for spymaster in spymasters for word in spymaster._columns))
+            similarities = self._embedding_model.similarity_matrix(union, columns)
+            candidate_row = {candidate: row for row, candidate in enumerate(union)}
+            word_column = {word: column for column, word in enumerate(columns)}
+            for spymaster, game_candidates, game_stats in zip(spymasters, new_candidates, stats):
+                if game_candidates:
+                    rows = np.array([candidate_row[candidate] for candidate in game_candidates], dtype=np.int64)
+                    game_columns = np.array([word_column[word] for word in spymaster._columns], dtype=np.int64)
+                    with collect_stats(game_stats):
+                        spymaster._add_similarities(game_candidates, similarities[np.ix_(rows, game_columns)])
+        _share_time(time.perf_counter() - began, 'batch.score_clues', stats)
+
+        clues = []
+        for spymaster, game_candidates, (team_words, _), game_stats in zip(spymasters, candidates, boards, stats):
+            with collect_stats(game_stats):
+                best_clue = spymaster._best_scoring_clue(game_candidates, self._embedding_model)
+                clues.append(spymaster._give_clue(team_words, best_clue, self._embedding_model))
+        return clues
+
+    def _suggest_guesses(self, guessers, stats, clues_and_numbers=None):
+        """
+        Suggests guesses from each guesser, scoring every unrevealed word of every
+        board against its latest clue with one batched matrix product
+
+        guessers(list): The Guesser objects to suggest guesses
+        stats(list): The Stats of each guesser's game
+        clues_and_numbers(list|None): The (clue, number) to guess for with each guesser,
+        the latest clue of its clue history if None
+
+        RETURNS(list): The suggested words of each guesser
+        """
+        began = time.perf_counter()
+        if clues_and_numbers is None:
+            clues_and_numbers = [guesser._get_clue_and_number() for guesser in guessers]
+        clues, numbers = zip(*clues_and_numbers)
+        words, word_vectors = zip(*[guesser._get_board_matrix() for guesser in guessers])
+        clue_vectors = self._embedding_model.get_vectors(list(clues))
+
+        # Pad the boards to the same size, padding rows score zero and are never ranked
+        board_size = max(len(board_words) for board_words in words)
+        boards = np.zeros((len(guessers), board_size, clue_vectors.shape[1]), dtype=np.float32)
+        for i, vectors in enumerate(word_vectors):
+            boards[i, :len(vectors)] = vectors
+        scores = np.matmul(boards, clue_vectors[:, :, None])[:, :, 0]
+        suggestions = [guesser._rank_words(board_words, scores[i, :len(board_words)], number)
+                       for i, (guesser, board_words, number) in enumerate(zip(guessers, words, numbers))]
+        _share_time(time.perf_counter() - began, 'batch.suggest_guesses', stats)
+        return suggestions
@@ -0,0 +1,206 @@
+from board import Board
+from embedding_model import EmbeddingModel, load_config
+from instrumentation import aggregate_stats, profile_run, summarise
+from main import GameLogic
+from synthetic_model import get_synthetic_model
+from word_pack import get_cache_dir
+from tabulate import tabulate
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then left out
+    resource = None
+
+# The latency one clue should stay under on word2vec
+CLUE_TARGET_MS = 50
+
+def get_peak_rss_mb():
+    """
+    Get the peak resident set size of this process
+
+    RETURNS(float|None): The peak RSS in MB, None where it cannot be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def timed(function, *args):
+    """
+    Call a function with the game's console output silenced
+
+    function(callable): The function to time
+    RETURNS(Tuple): The seconds the call took and its result
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = function(*args)
+        return time.perf_counter() - start, result
+
+def time_clues(game, clue_timings):
+    """
+    Time every clue the spymasters of a game give, with whatever runs the game
+
+    game(GameLogic): The game whose clues are timed
+    clue_timings(list): The seconds each clue took are appended to it
+    """
+    for team in ('red', 'blue'):
+        spymaster = game._get_spymaster(team)
+        def show_clue_and_number(show_clue_and_number=spymaster.show_clue_and_number):
+            start = time.perf_counter()
+            result = show_clue_and_number()
+            clue_timings.append(time.perf_counter() - start)
+            return result
+        spymaster.show_clue_and_number = show_clue_and_number
+
+def get_synthetic_config(config, vocab_size, dim, seed):
+    """
+    Point a config at a seeded synthetic word2vec embedding, generating it if needed
+
+    config(dict): The parsed config.yaml
+    vocab_size(int): The number of keys in the synthetic embedding
+    dim(int): The vector size
+    seed(int): The random seed of the embedding
+
+    RETURNS(dict): A copy of the config using the synthetic embedding
+    """
+    config = copy.deepcopy(config)
+    with open(config['model_paths']['codename_words']['file_path'], 'r') as file:
+        words = file.read().split()
+    store_path = get_synthetic_model(get_cache_dir(config), words, vocab_size, dim, seed)
+    config['parameters']['embedding_model'] = 'word2vec'
+    config['hyperparameters']['vocab_size'] = vocab_size
+    config['model_paths']['word2vec_model'] = {'file_path': store_path}
+    return config
+
+def run_benchmarks(embedding_model, num_of_boards, num_of_games, num_of_queries, seed=50):
+    """
+    Times board creation, clue generation, guess suggestion, neighbour search and
+    full automated games, and every clue given in those games
+
+    embedding_model(EmbeddingModel): The model to benchmark
+    num_of_boards(int): The number of boards to time clues and guesses on
+    num_of_games(int): The number of full games to play
+    num_of_queries(int): The number of words to search the neighbours of
+    seed(int): The random seed, the same seed deals the same boards
+
+    RETURNS(dict): The summary of each benchmark, the games per second and the
+    share of clues under CLUE_TARGET_MS, and the timers and counters summed over
+    the games
+    """
+    random.seed(seed)
+    topn = embedding_model._config['hyperparameters']['topn']
+    results = {}
+
+    # Neighbour search first, on words not searched before
+    words = random.sample(embedding_model.get_keys(), min(num_of_queries, len(embedding_model.get_keys())))
+    results['most_similar_words'] = summarise([timed(embedding_model.most_similar_words, word, topn)[0] for word in words])
+
+    board_timings = []
+    clue_timings = []
+    guess_timings = []
+    for _ in range(num_of_boards):
+        board_time, _ = timed(Board, embedding_model)
+        board_timings.append(board_time)
+        _, game = timed(GameLogic, embedding_model)
+        clue_time, _ = timed(game._get_spymaster('blue').show_clue_and_number)
+        clue_timings.append(clue_time)
+        guess_time, _ = timed(game._get_guesser('blue').suggest_guess)
+        guess_timings.append(guess_time)
+    results['board'] = summarise(board_timings)
+    results['show_clue_and_number'] = summarise(clue_timings)
+    results['suggest_guess'] = summarise(guess_timings)
+
+    game_timings = []
+    game_clue_timings = []
+    game_results = []
+    def play_game():
+        game = GameLogic(embedding_model)
+        time_clues(game, game_clue_timings)
+        return game.automate_game('blue')
+    for _ in range(num_of_games):
+        game_time, game_result = timed(play_game)
+        game_timings.append(game_time)
+        game_results.append(game_result)
+    results['automate_game'] = summarise(game_timings)
+    results['automate_game']['games_per_sec'] = num_of_games / sum(game_timings)
+    results['automate_game']['stats'] = aggregate_stats(game_results).as_dict()
+    # Every clue of the games, later clues reuse the work of earlier ones
+    results['clue'] = summarise(game_clue_timings)
+    results['clue']['under_target'] = float(np.mean(np.array(game_clue_timings) * 1000 < CLUE_TARGET_MS))
+    return results
+
+def compare(results, baseline):
+    """
+    Print the change in median latency of every benchmark against an earlier run
+
+    results(dict): The results of this run
+    baseline(dict): The results of the earlier run, as saved by this script
+    """
+    rows = []
+    for name, summary in results['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        rows.append([name, before['p50_ms'], summary['p50_ms'], before['p50_ms'] / summary['p50_ms'] if summary['p50_ms'] else float('inf')])
+    print(tabulate(rows, headers=['benchmark', 'baseline p50 ms', 'p50 ms', 'speedup'], floatfmt='.3f'))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark board creation, clues, guesses, neighbour search and full games")
+    parser.add_argument('--synthetic', action='store_true', help="Use a seeded synthetic embedding instead of the configured model")
+    parser.add_argument('--vocab-size', type=int, default=100000, help="Keys in the synthetic embedding")
+    parser.add_argument('--dim', type=int, default=300, help="Vector size of the synthetic embedding")
+    parser.add_argument('--boards', type=int, default=20, help="Boards to time clues and guesses on")
+    parser.add_argument('--games', type=int, default=10, help="Full games to play")
+    parser.add_argument('--queries', type=int, default=50, help="Words to search the neighbours of")
+    parser.add_argument('--seed', type=int, default=50, help="Random seed of the boards and the synthetic embedding")
+    parser.add_argument('--output', help="Save the results as JSON to this path")
+    parser.add_argument('--compare', help="Compare against results saved by an earlier run")
+    parser.add_argument('--profile', help="Profile the benchmarks to this file, collapsed stacks if it ends in .collapsed, cProfile otherwise")
+    args = parser.parse_args()
+
+    config = load_config('config.yaml')
+    if args.synthetic:
+        config = get_synthetic_config(config, args.vocab_size, args.dim, args.seed)
+    load_time, embedding_model = timed(EmbeddingModel, config)
+    with profile_run(args.profile):
+        benchmark_results = run_benchmarks(embedding_model, args.boards, args.games, args.queries, args.seed)
+    results = {
+        'config': {'embedding_model': embedding_model._embedding, 'file_path': embedding_model._file_path,
+                   'vocab_size': embedding_model._vocab_size, 'topn': config['hyperparameters']['topn'],
+                   'synthetic': args.synthetic, 'boards': args.boards, 'games': args.games,
+                   'queries': args.queries, 'seed': args.seed},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'model_load_ms': load_time * 1000,
+        'results': benchmark_results,
+        'neighbour_cache': embedding_model.get_neighbour_cache_stats(),
+        'peak_rss_mb': get_peak_rss_mb(),
+    }
+
+    rows = [[name] + [summary[key] for key in ('count', 'p50_ms', 'p90_ms', 'p99_ms', 'mean_ms')]
+            for name, summary in results['results'].items()]
+    print(tabulate(rows, headers=['benchmark', 'count', 'p50 ms', 'p90 ms', 'p99 ms', 'mean ms'], floatfmt='.3f'))
+    print(f"Games/sec: {results['results']['automate_game']['games_per_sec']:.3f}")
+    print(f"Clues under {CLUE_TARGET_MS} ms: {results['results']['clue']['under_target']:.1%}")
+    print(f"Model load: {results['model_load_ms']:.1f} ms")
+    if results['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            compare(results, json.load(file))
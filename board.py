@@ -1,49 +1,55 @@
 from embedding_model import EmbeddingModel
-from tabulate import tabulate
+from instrumentation import timed
+from word_pack import load_word_pack
 import random
 import numpy as np
-import copy
+
+# The tags in board order, a word's tag is stored as its index here
+TAGS = ('red', 'blue', 'neutral', 'assassin')
+# Replaces revealed words in the string getters
+REVEALED = "------"
 
 class Board():
-    def __init__(self):
-        self._embedding_model = EmbeddingModel()
+    @timed('board.construct')
+    def __init__(self, embedding_model=None):
+        """
+        Initialize the Board object. The words never change once dealt: they are kept
+        in board order, red, blue, neutral then assassin, with their tag ids in a
+        small int array and one bitmask per tag, while reveals only set bits of the
+        revealed bitmask. The board state is that bitmask, so snapshots copy nothing.
+
+        embedding_model(EmbeddingModel): the embedding model to share, a new one is made if None
+
+        RETURNS(Board): The newly constructed object
+        """
+        self._embedding_model = embedding_model if embedding_model is not None else EmbeddingModel()
         self._config = self._embedding_model._config
         self._file_path = self._config['model_paths']['codename_words']['file_path']
         self._embedding = self._config['parameters']['embedding_model']
         self._board_words = self._set_board_words(self._file_path)
-        self._tag_words = self._set_tag_words()
-        self._tag_words_copy = copy.deepcopy(self._tag_words)
+        self._set_state(self._set_tag_words())
 
     def _set_board_words(self, file_path):
         """
-        Retrieves all the words used for codenames and check whether
-        these words exists in embedding model. Then it randomly samples
-        25 of those words for the board
-        
+        Retrieves all the codename words which exist in the embedding model from
+        the cached word pack. Then it randomly samples 25 of those words for the board
+
         file_path(str): The path to the words.txt file which contains all
         codename words
-        
+
         RETURNS(list): Sampled list of 25 words used for codenames board
         """
-        print("Creating board...")
-        with open(file_path, 'r') as file:
-            # Get all the words from codenames word list
-            file_words = file.read().split()
-        if self._embedding == 'word2vec':
-            # Check whether file_words exists in model
-            codename_words = list(set([word for word in file_words if word in self._embedding_model.get_model()]))
-        elif self._embedding == 'sense2vec':
-            # Get best sense for file words
-            file_words_sense = []
-            # Handle keys that are not present in model
-            for word in file_words:
-                try:
-                    best_sense = self._embedding_model.get_model().get_best_sense(word)
-                    file_words_sense.append(best_sense)
-                except KeyError:
-                    continue
-            codename_words = list(set(file_words_sense))
-        board_words = random.sample(codename_words, 25)
+        self._word_pack = load_word_pack(self._embedding_model, file_path)
+        return self._sample_board_words(self._word_pack.get_keys())
+
+    def _sample_board_words(self, keys):
+        """
+        Randomly samples 25 words for the board
+
+        keys(list): The playable keys, in word pack order
+        RETURNS(list): Sampled list of 25 words used for codenames board
+        """
+        board_words = random.sample(keys, 25)
         random.shuffle(board_words)
         return board_words
 
@@ -65,38 +71,185 @@ class Board():
         board['assassin'] = [words[17]]
         return board
 
+    def _set_state(self, starting_tag_words, revealed=0):
+        """
+        Lays the words out in board order and works out the tag arrays and bitmasks
+
+        starting_tag_words(dict): The words of each tag in TAGS
+        revealed(int): The bitmask of the revealed positions
+        """
+        self._words = tuple(word for tag in TAGS for word in starting_tag_words[tag])
+        self._tags = np.array([tag for tag, name in enumerate(TAGS) for _ in starting_tag_words[name]], dtype=np.int8)
+        self._tag_masks = [0] * len(TAGS)
+        for position, tag in enumerate(self._tags.tolist()):
+            self._tag_masks[tag] |= 1 << position
+        self._positions = {word: position for position, word in enumerate(self._words)}
+        self._starting_tag_words = {tag: tuple(starting_tag_words[tag]) for tag in TAGS}
+        self._revealed = revealed
+        # The string views of the current state as tuples, rebuilt after a reveal
+        self._views = None
+
+    @classmethod
+    def from_keys(cls, keys, config):
+        """
+        Deals a board from the playable keys without a model, for clients of
+        clue_service.py. The same seed deals the same board as the constructor.
+
+        keys(list): The keys of the word pack, in order
+        config(dict): The config of the model the keys come from
+
+        RETURNS(Board): The dealt board, with no embedding model
+        """
+        board = cls.__new__(cls)
+        board._embedding_model = None
+        board._config = config
+        board._file_path = config['model_paths']['codename_words']['file_path']
+        board._embedding = config['parameters']['embedding_model']
+        board._word_pack = None
+        board._board_words = board._sample_board_words(list(keys))
+        board._set_state(board._set_tag_words())
+        return board
+
+    @classmethod
+    def from_tag_words(cls, embedding_model, tag_words, starting_tag_words):
+        """
+        Rebuilds a board from its tags, e.g. one sent to clue_service.py
+
+        embedding_model(EmbeddingModel): The embedding model to share
+        tag_words(dict): The current tags of the words, revealed words as "------"
+        starting_tag_words(dict): The tags of the words before any was revealed
+
+        RETURNS(Board): The rebuilt board
+        """
+        board = cls.__new__(cls)
+        board._embedding_model = embedding_model
+        board._config = embedding_model._config
+        board._file_path = board._config['model_paths']['codename_words']['file_path']
+        board._embedding = board._config['parameters']['embedding_model']
+        board._word_pack = None
+        current_words = [word for tag in TAGS for word in tag_words[tag]]
+        revealed = sum(1 << position for position, word in enumerate(current_words) if word == REVEALED)
+        board._set_state(starting_tag_words, revealed)
+        board._board_words = list(board._words)
+        return board
+
+    def _get_views(self):
+        """
+        Get the current words and tag words, built once per board state. They are
+        shared between calls, so the getters hand out copies.
+
+        RETURNS(Tuple): The current words tuple and the tag words dict of tuples
+        """
+        if self._views is None or self._views[0] != self._revealed:
+            current_words = tuple(REVEALED if self._revealed >> position & 1 else word for position, word in enumerate(self._words))
+            tag_words = {tag: [] for tag in TAGS}
+            for word, tag in zip(current_words, self._tags.tolist()):
+                tag_words[TAGS[tag]].append(word)
+            self._views = (self._revealed, current_words, {tag: tuple(words) for tag, words in tag_words.items()})
+        return self._views[1], self._views[2]
+
     def get_board_words(self):
         """
         Get _board_words attribute
 
-        RETURNS(list): the list of all words used for board
+        RETURNS(list): a copy of the list of all words used for board
         """
-        return self._board_words
+        return list(self._board_words)
 
     def get_tag_words(self):
         """
-        Get _tag_words attribute
+        Get the words of each tag, revealed words replaced by "------"
 
-        RETURNS(dict): dictionary containing the tags of respective words
+        RETURNS(dict): a new dictionary containing the tags of respective words
         """
-        return self._tag_words
+        return {tag: list(words) for tag, words in self._get_views()[1].items()}
 
     def get_current_words(self):
         """
         Get _current_words
 
-        RETURNS(list): list of current words on the board
+        RETURNS(list): a new list of current words on the board
         """
-        self._current_words = [word for words in self.get_tag_words().values() for word in words]
-        return self._current_words
+        return list(self._get_views()[0])
+
+    def get_starting_tag_words(self):
+        """
+        Get the tags of the words as they were before any word was revealed
+
+        RETURNS(dict): a new dictionary containing the tags of respective words
+        """
+        return {tag: list(words) for tag, words in self._starting_tag_words.items()}
+
+    def get_starting_words(self):
+        """
+        Get every word of the board in the order of get_current_words, revealed words included
+
+        RETURNS(list): a new list of the words the board started with
+        """
+        return list(self._words)
+
+    def reveal(self, word):
+        """
+        Reveals a word, marking its position in the revealed bitmask
+
+        word(str): The word to reveal
+        RETURNS(str|None): The tag of the word, None if it is not on the board or already revealed
+        """
+        position = self._positions.get(word)
+        if position is None or self._revealed >> position & 1:
+            return None
+        self._revealed |= 1 << position
+        return TAGS[self._tags[position]]
+
+    def is_revealed(self, word):
+        """
+        Check whether a word on the board has been revealed
+
+        word(str): The word to check
+        RETURNS(bool): True if it has been revealed
+        """
+        return bool(self._revealed >> self._positions[word] & 1)
+
+    def get_revealed_mask(self):
+        """
+        Get the revealed bitmask, bit i set once the i-th word of get_starting_words is revealed
+
+        RETURNS(int): The bitmask
+        """
+        return self._revealed
+
+    def get_tag_mask(self, tag):
+        """
+        Get the bitmask of the positions holding a tag's words
+
+        tag(str): One of TAGS
+        RETURNS(int): The bitmask
+        """
+        return self._tag_masks[TAGS.index(tag)]
+
+    def snapshot(self):
+        """
+        Get the board state. The words and tags never change, so the revealed
+        bitmask is all there is to save.
+
+        RETURNS(int): The state, for restore
+        """
+        return self._revealed
+
+    def restore(self, snapshot):
+        """
+        Puts the board back to a saved state
+
+        snapshot(int): A state from snapshot
+        """
+        self._revealed = snapshot
 
     def print_board(self):
         """
         Prints the guesser board in a nice format
         """
-        words = [word for _, value in self._tag_words.items() for word in value]
-
-        words = np.array(words).reshape(5, 5).copy()
+        words = np.array(self.get_current_words()).reshape(5, 5).copy()
+        from tabulate import tabulate
         table = tabulate(words, tablefmt="fancy_grid")
         print(table)
 
@@ -104,8 +257,8 @@ class Board():
         """
         Print the spymaster board showing tags and words
         """
-        for key, value in self._tag_words_copy.items():
-            print(f'{key}: {value}')
+        for key, value in self._starting_tag_words.items():
+            print(f'{key}: {list(value)}')
 
     def red_blue_left(self):
         """
@@ -114,8 +267,6 @@ class Board():
         RETURN(dict): The number of reds and blues left
         """
         remaining = {}
-        reds_left = sum(1 for words in self._tag_words.get("red", []) if words != "------")
-        blues_left = sum(1 for words in self._tag_words.get("blue", []) if words != "------")
-        remaining['red'] = reds_left
-        remaining['blue'] = blues_left
+        remaining['red'] = bin(self._tag_masks[0] & ~self._revealed).count('1')
+        remaining['blue'] = bin(self._tag_masks[1] & ~self._revealed).count('1')
         return remaining
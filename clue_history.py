@@ -20,7 +20,7 @@ class ClueHistory():
 
         RETURNS(str): The latest clue
         """
-        return list(self._clue_history.keys())[-1]
+        return next(reversed(self._clue_history))
 
     def get_clue_intended_words(self):
         """
@@ -0,0 +1,143 @@
+from neighbour_cache import get_search_id
+from word_pack import get_cache_dir, hash_file, load_word_pack
+import os
+import sys
+import numpy as np
+
+# The clue index shipped inside a pruned model, see prune_model.py
+PACK_INDEX_FILE = 'clue_index.npz'
+
+# Clue indexes already opened by this process, keyed by path
+_clue_indexes = {}
+
+def get_clue_index_path(embedding_model):
+    """
+    Get where the clue index for a model's neighbour search and the configured word list is kept
+
+    embedding_model(EmbeddingModel): The model the index is built from
+    RETURNS(str): The path to the .npz clue index file
+    """
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    return os.path.join(get_cache_dir(embedding_model._config),
+                        f'clue_index_{get_search_id(embedding_model)}_{hash_file(wordlist_path)}.npz')
+
+class ClueIndex():
+    def __init__(self, words, depth, offsets, rows, ranks):
+        """
+        Initialize the ClueIndex, the admissible clue neighbours of every codename
+        word found offline among its depth most similar keys. The neighbours of all
+        words are stored back to back, those of the i-th word between offsets[i]
+        and offsets[i + 1], in order of similarity.
+
+        words(list): The codename keys, as the board holds them
+        depth(int): The number of most similar keys searched per word
+        offsets(np.ndarray): Where the neighbours of each word start, and the total last
+        rows(np.ndarray): The model row of each neighbour's clue
+        ranks(np.ndarray): The position of each neighbour among the most similar keys
+
+        RETURNS(ClueIndex): The newly constructed object
+        """
+        self._words = list(words)
+        self._depth = int(depth)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._rows = np.asarray(rows, dtype=np.int32)
+        self._ranks = np.asarray(ranks, dtype=np.int32)
+        self._word_to_position = {word: i for i, word in enumerate(self._words)}
+
+    def get_depth(self):
+        return self._depth
+
+    def get_clue_rows(self, word, topn):
+        """
+        Get the clue rows of a word's admissible neighbours among its topn most similar keys
+
+        word(str): The codename key
+        topn(int): the number of top similar keys searched
+        RETURNS(np.ndarray|None): The clue rows in order of similarity, None if the
+        word is not indexed or topn is deeper than the index
+        """
+        position = self._word_to_position.get(word)
+        if position is None or topn > self._depth:
+            return None
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._rows[start:start + np.searchsorted(self._ranks[start:end], topn)]
+
+    def get_indexed_rows(self):
+        """
+        Get every clue row the index can return
+
+        RETURNS(np.ndarray): The distinct int64 clue rows, sorted
+        """
+        return np.unique(self._rows).astype(np.int64)
+
+    def remap_rows(self, row_map):
+        """
+        Get the index for a model holding a subset of this model's rows, with the
+        same ranks so a topn up to depth still slices the same clues
+
+        row_map(np.ndarray): The row in the subset of every row of this model
+        RETURNS(ClueIndex): The renumbered index
+        """
+        return ClueIndex(self._words, self._depth, self._offsets, row_map[self._rows], self._ranks)
+
+    def save(self, file_path):
+        np.savez(file_path, words=np.array(self._words), depth=self._depth, offsets=self._offsets,
+                 rows=self._rows, ranks=self._ranks)
+
+    @classmethod
+    def load(cls, file_path):
+        data = np.load(file_path)
+        return cls(data['words'].tolist(), data['depth'], data['offsets'], data['rows'], data['ranks'])
+
+def build_clue_index(embedding_model, depth):
+    """
+    Builds the clue index offline, searching the neighbours of every codename word
+    once with the model's runtime search, exact or approximate, then keeping the
+    admissible clues with the position they were found at, so any topn up to depth
+    is answered by slicing
+
+    embedding_model(EmbeddingModel): The model to search with
+    depth(int): The number of most similar keys searched per word
+
+    RETURNS(ClueIndex): The built index
+    """
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    words = load_word_pack(embedding_model, wordlist_path).get_keys()
+    offsets = [0]
+    rows = []
+    ranks = []
+    for word in words:
+        word_rows, word_ranks = embedding_model.search_clue_rows(word, depth)
+        rows.append(word_rows)
+        ranks.append(word_ranks)
+        offsets.append(offsets[-1] + len(word_rows))
+    return ClueIndex(words, depth, offsets, np.concatenate(rows), np.concatenate(ranks))
+
+def load_clue_index(embedding_model):
+    """
+    Opens the clue index for a model if it has been built, or the one a pruned
+    model carries
+
+    embedding_model(EmbeddingModel): The model the index was built from
+    RETURNS(ClueIndex|None): The index, None if it has not been built
+    """
+    file_path = os.path.join(embedding_model._file_path, PACK_INDEX_FILE)
+    if not os.path.isfile(file_path):
+        file_path = get_clue_index_path(embedding_model)
+    if file_path not in _clue_indexes:
+        if not os.path.isfile(file_path):
+            return None
+        _clue_indexes[file_path] = ClueIndex.load(file_path)
+    return _clue_indexes[file_path]
+
+if __name__ == "__main__":
+    from embedding_model import EmbeddingModel
+    # Builds the index for the model in config.yaml, as deep as its topn or the depth given as argument
+    embedding_model = EmbeddingModel()
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else embedding_model._config['hyperparameters']['topn']
+    file_path = get_clue_index_path(embedding_model)
+    print(f"Building clue index of depth {depth} in {file_path}...")
+    clue_index = build_clue_index(embedding_model, depth)
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    clue_index.save(file_path)
+    print("Done")
@@ -0,0 +1,465 @@
+from batch_simulator import BatchSimulator
+from board import TAGS, Board
+from clue_history import ClueHistory
+from concurrent.futures import ThreadPoolExecutor
+from embedding_model import EmbeddingModel, load_config
+from guesser import Guesser
+from instrumentation import Stats, summarise
+from spymaster import Spymaster
+from word_pack import load_word_pack
+import argparse
+import asyncio
+import collections
+import http.client
+import json
+import socket
+import time
+
+TEAMS = ('red', 'blue')
+
+class ClueService():
+    def __init__(self, embedding_model):
+        """
+        Initialize the ClueService, which gives clues and suggests guesses for boards
+        sent by clients. Requests are handled many at a time with the batched scoring
+        of BatchSimulator, so clues are scored as in batched experiments.
+
+        embedding_model(EmbeddingModel): The model shared by every request
+
+        RETURNS(ClueService): The newly constructed object
+        """
+        self._embedding_model = embedding_model
+        self._simulator = BatchSimulator([], embedding_model)
+        wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+        self._keys = load_word_pack(embedding_model, wordlist_path).get_keys()
+        # Timers and counters of every request handled
+        self._stats = Stats()
+
+    def get_game(self):
+        """
+        Get what a client needs to deal boards
+
+        RETURNS(dict): The keys of the word pack and the config
+        """
+        return {'keys': self._keys, 'config': self._embedding_model._config}
+
+    def parse_board(self, request):
+        """
+        Rebuilds the board of a request
+
+        request(dict): The request, with its team, tag_words and starting_tag_words
+        RETURNS(Tuple): The team and the board
+        """
+        team = request.get('team')
+        if team not in TEAMS:
+            raise ValueError(f"Unknown team: {team}")
+        tags = []
+        for name in ('tag_words', 'starting_tag_words'):
+            tag_words = request.get(name)
+            if not isinstance(tag_words, dict) or set(tag_words) != set(TAGS):
+                raise ValueError(f"{name} must map each of {', '.join(TAGS)} to its words")
+            tags.append({tag: list(tag_words[tag]) for tag in TAGS})
+        if any(len(tags[0][tag]) != len(tags[1][tag]) for tag in TAGS):
+            raise ValueError("tag_words must hold as many words per tag as starting_tag_words")
+        return team, Board.from_tag_words(self._embedding_model, tags[0], tags[1])
+
+    def give_clues(self, requests):
+        """
+        Gives a clue for each request, scoring the candidates of every board at once
+
+        requests(list): (team, board, earlier clues of the team) tuples
+
+        RETURNS(list): The clue, number and intended words of each request, a None
+        clue if the spymaster has no clue to give
+        """
+        spymasters = []
+        for team, board, clues in requests:
+            clue_history = ClueHistory(team)
+            for clue in clues:
+                # Only the clue matters, it is not given again
+                clue_history.add_to_history(clue, [])
+            spymasters.append(Spymaster(team, board, clue_history))
+        stats = [Stats() for _ in requests]
+        clues = self._simulator._give_clues(spymasters, stats)
+        for request_stats in stats:
+            self._stats.merge(request_stats)
+        return [{'clue': None, 'number': 0, 'intended_words': []} if clue_and_number is None else
+                {'clue': clue_and_number[0], 'number': clue_and_number[1],
+                 'intended_words': spymaster._clue_history.get_clue_intended_words()[clue_and_number[0]]}
+                for spymaster, clue_and_number in zip(spymasters, clues)]
+
+    def suggest_guesses(self, requests):
+        """
+        Suggests guesses for each request, scoring every board at once
+
+        requests(list): (team, board, clue, number) tuples
+
+        RETURNS(list): The suggested words of each request
+        """
+        guessers = [Guesser(team, board, ClueHistory(team)) for team, board, _, _ in requests]
+        stats = [Stats() for _ in requests]
+        suggestions = self._simulator._suggest_guesses(guessers, stats, [(clue, number) for _, _, clue, number in requests])
+        for request_stats in stats:
+            self._stats.merge(request_stats)
+        return [{'words': words} for words in suggestions]
+
+    def get_stats(self):
+        return self._stats.as_dict()
+
+class RequestBatcher():
+    def __init__(self, handler, executor, max_batch_size=64, batch_window=0.001, history=10000):
+        """
+        Initialize the RequestBatcher, which queues requests of one kind and hands
+        every request waiting at once to the handler as one batch. The handler runs
+        in the executor so the event loop keeps accepting requests meanwhile, and the
+        requests arriving while a batch runs make up the next one.
+
+        handler(callable): Takes a list of requests, returns the response of each
+        executor(Executor): The single thread every handler runs in
+        max_batch_size(int): The most requests handled in one batch
+        batch_window(float): Seconds to wait for more requests after the first of a batch
+        history(int): The number of latest requests and batches the metrics cover
+
+        RETURNS(RequestBatcher): The newly constructed object
+        """
+        self._handler = handler
+        self._executor = executor
+        self._max_batch_size = max_batch_size
+        self._batch_window = batch_window
+        self._queue = asyncio.Queue()
+        self._latencies = collections.deque(maxlen=history)
+        self._batch_sizes = collections.deque(maxlen=history)
+        self._queue_depths = collections.deque(maxlen=history)
+        self._requests = 0
+        self._errors = 0
+
+    async def submit(self, request):
+        """
+        Queues a request and waits for its response
+
+        request(Tuple): The parsed request
+        RETURNS(dict): The handler's response
+        """
+        start = time.perf_counter()
+        self._requests += 1
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        try:
+            return await future
+        except Exception:
+            self._errors += 1
+            raise
+        finally:
+            self._latencies.append(time.perf_counter() - start)
+
+    async def run(self):
+        """
+        Handles batches of queued requests until cancelled
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._batch_window:
+                await asyncio.sleep(self._batch_window)
+            self._queue_depths.append(self._queue.qsize() + 1)
+            while len(batch) < self._max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._batch_sizes.append(len(batch))
+            requests = [request for request, _ in batch]
+            try:
+                responses = await loop.run_in_executor(self._executor, self._handler, requests)
+            except Exception:
+                # Handle the batch one request at a time so a bad request only fails itself
+                responses = []
+                for request in requests:
+                    try:
+                        responses.extend(await loop.run_in_executor(self._executor, self._handler, [request]))
+                    except Exception as error:
+                        responses.append(error)
+            for (_, future), response in zip(batch, responses):
+                if future.done():
+                    continue
+                if isinstance(response, Exception):
+                    future.set_exception(response)
+                else:
+                    future.set_result(response)
+
+    def get_metrics(self):
+        """
+        Get the latency of the latest requests and the size of the latest batches
+
+        RETURNS(dict): The request and error counts, the latency summary, the queue
+        depth now, and the mean and max queue depth and batch size
+        """
+        return {'requests': self._requests, 'errors': self._errors,
+                'latency': summarise(self._latencies) if self._latencies else None,
+                'queue_depth': self._queue.qsize(),
+                'mean_queue_depth': sum(self._queue_depths) / len(self._queue_depths) if self._queue_depths else 0.0,
+                'max_queue_depth': max(self._queue_depths, default=0), 'batches': len(self._batch_sizes),
+                'mean_batch_size': sum(self._batch_sizes) / len(self._batch_sizes) if self._batch_sizes else 0.0,
+                'max_batch_size': max(self._batch_sizes, default=0)}
+
+class ClueServer():
+    def __init__(self, service, max_batch_size=64, batch_window=0.001):
+        """
+        Initialize the ClueServer, an asyncio HTTP front end to a ClueService taking
+        and returning JSON. Concurrent clue requests are coalesced into one batched
+        scoring call, and so are guess requests. Endpoints:
+        GET /game, the word pack keys and config to deal boards with
+        POST /clue, {team, tag_words, starting_tag_words, clues} to {clue, number, intended_words}
+        POST /guess, {team, tag_words, starting_tag_words, clue, number} to {words}
+        GET /metrics, the latency, queue depth and batch size of each endpoint and the game stats
+
+        service(ClueService): The service answering requests
+        max_batch_size(int): The most requests handled in one batch
+        batch_window(float): Seconds to wait for more requests after the first of a batch
+
+        RETURNS(ClueServer): The newly constructed object
+        """
+        self._service = service
+        self._max_batch_size = max_batch_size
+        self._batch_window = batch_window
+        # The model is only used from this thread, one batch at a time
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batchers = None
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_path=None):
+        """
+        Serves requests until cancelled
+
+        host(str): The address to listen on
+        port(int): The port to listen on
+        unix_path(str|None): Listen on this Unix socket instead of host and port
+        """
+        self._batchers = {
+            'clue': RequestBatcher(self._service.give_clues, self._executor, self._max_batch_size, self._batch_window),
+            'guess': RequestBatcher(self._service.suggest_guesses, self._executor, self._max_batch_size, self._batch_window),
+        }
+        tasks = [asyncio.create_task(batcher.run()) for batcher in self._batchers.values()]
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self._handle_connection, unix_path)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Answers the HTTP/1.1 requests of one connection, kept alive until the client closes it
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, response = await self._route(method, path, body)
+                payload = json.dumps(response).encode('utf-8')
+                writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        """
+        Answers one request
+
+        method(str): The HTTP method
+        path(str): The requested path
+        body(bytes): The JSON body, empty for GET
+
+        RETURNS(Tuple): The HTTP status and the JSON response
+        """
+        if method == 'GET' and path == '/game':
+            return '200 OK', self._service.get_game()
+        if method == 'GET' and path == '/metrics':
+            stats = await asyncio.get_running_loop().run_in_executor(self._executor, self._service.get_stats)
+            return '200 OK', {name: batcher.get_metrics() for name, batcher in self._batchers.items()} | {'stats': stats}
+        if method != 'POST' or path not in ('/clue', '/guess'):
+            return '404 Not Found', {'error': f"No endpoint {method} {path}"}
+        try:
+            request = json.loads(body)
+            team, board = self._service.parse_board(request)
+            if path == '/clue':
+                parsed = (team, board, list(request.get('clues', [])))
+            else:
+                parsed = (team, board, str(request['clue']), int(request['number']))
+        except (KeyError, TypeError, ValueError) as error:
+            return '400 Bad Request', {'error': str(error)}
+        try:
+            return '200 OK', await self._batchers[path[1:]].submit(parsed)
+        except Exception as error:
+            return '500 Internal Server Error', {'error': repr(error)}
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        """
+        Initialize the UnixHTTPConnection, an HTTP connection over a Unix socket
+
+        path(str): The path of the socket
+        timeout(float|None): Seconds to wait on the socket, forever if None
+
+        RETURNS(UnixHTTPConnection): The newly constructed object
+        """
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+class ClueClient():
+    def __init__(self, address, timeout=None):
+        """
+        Initialize the ClueClient, a thin client of a running ClueServer which keeps
+        one connection open. Pass it to GameLogic to play without loading a model.
+
+        address(str): host:port, or unix:path for a Unix socket
+        timeout(float|None): Seconds to wait for a response, forever if None
+
+        RETURNS(ClueClient): The newly constructed object
+        """
+        if address.startswith('unix:'):
+            self._connection = UnixHTTPConnection(address[len('unix:'):], timeout)
+        else:
+            host, port = address.rsplit(':', 1)
+            self._connection = http.client.HTTPConnection(host, int(port), timeout=timeout)
+        self._game = None
+
+    def _request(self, method, path, payload=None):
+        """
+        Sends a request and waits for its response
+
+        method(str): The HTTP method
+        path(str): The endpoint
+        payload(dict|None): The JSON body
+
+        RETURNS(dict): The JSON response
+        """
+        body = json.dumps(payload) if payload is not None else None
+        self._connection.request(method, path, body, {'Content-Type': 'application/json'})
+        response = self._connection.getresponse()
+        data = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path} failed with {response.status}: {data.get('error')}")
+        return data
+
+    def get_game(self):
+        """
+        Get the word pack keys and config of the service's model, fetched once
+
+        RETURNS(Tuple): The keys and the config
+        """
+        if self._game is None:
+            self._game = self._request('GET', '/game')
+        return self._game['keys'], self._game['config']
+
+    def give_clue(self, team, board, clues):
+        """
+        Get a clue from the service
+
+        team(str): The team of the spymaster
+        board(Board): The board as the spymaster sees it
+        clues(list): The team's earlier clues, which are not given again
+
+        RETURNS(Tuple): The clue, its intended number and its intended words, a None clue
+        if the spymaster has no clue to give
+        """
+        response = self._request('POST', '/clue', {'team': team, 'tag_words': board.get_tag_words(),
+                                                   'starting_tag_words': board.get_starting_tag_words(), 'clues': clues})
+        return response['clue'], response['number'], response['intended_words']
+
+    def suggest_guesses(self, team, board, clue, number):
+        """
+        Get suggested guesses from the service
+
+        team(str): The team of the guesser
+        board(Board): The board
+        clue(str): The clue to guess for
+        number(int): The number of words to suggest
+
+        RETURNS(list): The suggested words
+        """
+        response = self._request('POST', '/guess', {'team': team, 'tag_words': board.get_tag_words(),
+                                                    'starting_tag_words': board.get_starting_tag_words(),
+                                                    'clue': clue, 'number': number})
+        return response['words']
+
+    def get_metrics(self):
+        return self._request('GET', '/metrics')
+
+    def close(self):
+        self._connection.close()
+
+class RemoteSpymaster(Spymaster):
+    def __init__(self, team, board, clue_history, client):
+        """
+        Initialize the RemoteSpymaster, a Spymaster whose clues come from a ClueServer
+
+        team(str): the team the spymaster is assigned
+        board(Board): the Board object
+        clue_history(ClueHistory): the ClueHistory object
+        client(ClueClient): The client of the service
+
+        RETURNS(RemoteSpymaster): The newly constructed object
+        """
+        super().__init__(team, board, clue_history)
+        self._client = client
+
+    def show_clue_and_number(self):
+        clue, number, intended_words = self._client.give_clue(self._team, self._board, list(self._clue_history._clue_history))
+        if clue is None:
+            return None
+        self._clue_history.add_to_history(clue, intended_words)
+        return clue, number
+
+class RemoteGuesser(Guesser):
+    def __init__(self, team, board, clue_history, client):
+        """
+        Initialize the RemoteGuesser, a Guesser whose suggestions come from a ClueServer
+
+        team(str): the team the guesser is assigned
+        board(Board): the Board object
+        clue_history(ClueHistory): the ClueHistory object
+        client(ClueClient): The client of the service
+
+        RETURNS(RemoteGuesser): The newly constructed object
+        """
+        super().__init__(team, board, clue_history)
+        self._client = client
+
+    def suggest_guess(self):
+        clue, number = self._get_clue_and_number()
+        return self._client.suggest_guesses(self._team, self._board, clue, number)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve clues and guesses from one loaded model to many games")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    parser.add_argument('--unix', help="Listen on this Unix socket instead of host and port")
+    parser.add_argument('--max-batch-size', type=int, default=64, help="Most requests scored in one batch")
+    parser.add_argument('--batch-window-ms', type=float, default=1.0, help="Time to wait for more requests to batch with the first")
+    args = parser.parse_args()
+
+    service = ClueService(EmbeddingModel(load_config('config.yaml')))
+    server = ClueServer(service, args.max_batch_size, args.batch_window_ms / 1000)
+    print(f"Serving on {'unix:' + args.unix if args.unix else f'{args.host}:{args.port}'}")
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,50 @@
+from embedding_model import get_cache_path, get_vector_dtype, load_config
+from vector_store import is_vector_store, quantize_vector_store, write_vector_store
+import sys
+
+def convert_word2vec(file_path, cache_path, vocab_size, dtype='float32'):
+    """
+    Converts the pretrained Word2Vec binary into a memory-mapped vector store
+
+    file_path(str): The path to the GoogleNews .bin file
+    cache_path(str): The directory to write the vector store to
+    vocab_size(int): The number of vectors to convert
+    dtype(str): How the vectors are stored, float32, float16 or int8
+    """
+    import gensim
+    model = gensim.models.KeyedVectors.load_word2vec_format(file_path, binary=True, limit=vocab_size)
+    write_vector_store(cache_path, model.index_to_key, model.vectors, dtype=dtype)
+
+def convert_sense2vec(file_path, cache_path, dtype='float32'):
+    """
+    Converts the pretrained Sense2Vec directory into a memory-mapped vector store,
+    keeping the key frequencies and senses needed by get_best_sense
+
+    file_path(str): The path to the s2v_old directory
+    cache_path(str): The directory to write the vector store to
+    dtype(str): How the vectors are stored, float32, float16 or int8
+    """
+    from sense2vec import Sense2Vec
+    model = Sense2Vec().from_disk(file_path)
+    keys = list(model.keys())
+    rows = model.vectors.find(keys=keys)
+    freqs = [model.get_freq(key, 0) for key in keys]
+    write_vector_store(cache_path, keys, model.vectors.data[rows], freqs=freqs, senses=model.senses, dtype=dtype)
+
+if __name__ == "__main__":
+    # Converts the embedding model in config.yaml, or the one given as argument,
+    # stored as the configured vector_dtype or the dtype given as second argument
+    config = load_config('config.yaml')
+    embedding = sys.argv[1] if len(sys.argv) > 1 else config['parameters']['embedding_model']
+    dtype = sys.argv[2] if len(sys.argv) > 2 else get_vector_dtype(config)
+    model_paths = config['model_paths'][f'{embedding}_model']
+    cache_path = get_cache_path(model_paths, dtype)
+    print(f"Converting {embedding} model to {cache_path} as {dtype}...")
+    if dtype != 'float32' and is_vector_store(get_cache_path(model_paths)):
+        # Quantize the full precision store rather than loading the model again
+        quantize_vector_store(get_cache_path(model_paths), cache_path, dtype)
+    elif embedding == 'word2vec':
+        convert_word2vec(model_paths['file_path'], cache_path, config['hyperparameters']['vocab_size'], dtype)
+    elif embedding == 'sense2vec':
+        convert_sense2vec(model_paths['file_path'], cache_path, dtype)
+    print("Done")
@@ -1,7 +1,15 @@
-from sense2vec import Sense2Vec
-import yaml
-import gensim
-import re
+from collections import namedtuple
+from instrumentation import count, timed
+import hashlib
+import numpy as np
+import os
+from vector_store import MemmapVectors, is_vector_store
+from similarity_table import load_similarity_table
+from ann_index import load_ann_index
+from vocab import load_vocabulary, split_key
+from sense_index import load_sense_index
+from neighbour_cache import load_neighbour_cache
+from clue_index import load_clue_index
 
 def load_config(config_file):
     """Load and parse the config yaml file.
@@ -9,21 +17,172 @@ def load_config(config_file):
     config_file: The path to the config file
     RETURNS (Dict): The config as key value pairs
     """
+    import yaml
     with open(config_file, 'r') as file:
         config = yaml.safe_load(file)
     return config
 
+def get_cache_path(model_paths, dtype='float32'):
+    """
+    Get where the memory-mapped vector store of a model is kept, either the
+    configured cache_path or the model path with a _cache suffix. Quantized
+    stores add their dtype to it.
+
+    model_paths(dict): The model's entry under model_paths in the config
+    dtype(str): How the vectors are stored, float32, float16 or int8
+    RETURNS(str): The path to the vector store directory
+    """
+    default = os.path.splitext(model_paths['file_path'].rstrip('/\\'))[0] + '_cache'
+    cache_path = model_paths.get('cache_path', default)
+    return cache_path if dtype == 'float32' else f'{cache_path}_{dtype}'
+
+def get_vector_dtype(config):
+    """
+    Get how the vectors of the model are stored
+
+    config(dict): The parsed config.yaml
+    RETURNS(str): The parameters.vector_dtype, float32 by default
+    """
+    return config['parameters'].get('vector_dtype', 'float32')
+
+# A registered backend: its loader and the style of its keys, word2vec words or sense2vec word|SENSE keys
+Backend = namedtuple('Backend', ['loader', 'key_style'])
+
+# Backends which can be chosen as embedding_model in the config, keyed by name
+_backends = {}
+
+# Backend models already loaded by this process, keyed by (backend, path, vocab_size, options)
+_model_registry = {}
+
+def register_backend(name, loader, key_style='word2vec'):
+    """
+    Registers a backend so it can be chosen as embedding_model in the config.
+    Loaders import their heavy dependencies themselves, so only the chosen
+    backend's are ever imported.
+
+    name(str): The name of the backend, its model is read from model_paths.<name>_model
+    loader(callable): Called with the model's file_path, vocab_size and any other
+    options under its model_paths entry, returns the backend model
+    key_style(str): word2vec for plain word keys, sense2vec for word|SENSE keys
+    """
+    _backends[name] = Backend(loader, key_style)
+
+def get_backend(name):
+    """
+    Get a registered backend
+
+    name(str): The name of the backend
+    RETURNS(Backend): The backend's loader and key style
+    """
+    if name not in _backends:
+        raise ValueError(f"Unknown embedding model: {name}, choose from {', '.join(_backends)}")
+    return _backends[name]
+
+def load_backend_model(backend, file_path, vocab_size, options=None):
+    """
+    Loads a backend embedding model once per process. Every later request for the
+    same backend, path, vocabulary size and options returns the already loaded
+    model, so all Boards, Spymasters and Guessers share a single copy. A smaller
+    vocabulary size is cut from a larger model already loaded instead of loading
+    the model again, for backend models which can be truncated.
+
+    backend(str): The name of a registered backend
+    file_path(str): The path to the pretrained vectors or to a vector store
+    vocab_size(int): The number of vectors to load
+    options(dict|None): Any other options of the backend from its model_paths entry
+
+    RETURNS((Word2Vec/Sense2Vec)Model): The shared embedding model
+    """
+    options = options or {}
+    key = (backend, os.path.abspath(file_path), vocab_size, tuple(sorted(options.items())))
+    if key not in _model_registry:
+        larger = [model for (name, path, size, model_options), model in _model_registry.items()
+                  if (name, path, model_options) == (key[0], key[1], key[3]) and size > vocab_size and hasattr(model, 'truncate')]
+        if larger:
+            _model_registry[key] = larger[0].truncate(vocab_size)
+        else:
+            _model_registry[key] = get_backend(backend).loader(file_path, vocab_size, **options)
+    return _model_registry[key]
+
+def get_backend_options(model_paths):
+    """
+    Get the backend options of a model_paths entry, everything but its paths
+
+    model_paths(dict): The model's entry under model_paths in the config
+    RETURNS(dict): The options passed to the backend's loader
+    """
+    return {key: value for key, value in model_paths.items() if key not in ('file_path', 'cache_path')}
+
 class EmbeddingModel():
-    def __init__(self):
-        self._config = load_config('config.yaml')
+    @timed('embedding.load')
+    def __init__(self, config=None):
+        """
+        Initialize the EmbeddingModel, the backend model chosen in the config and
+        every cache built from it
+
+        config(dict|None): The parsed config, config.yaml is loaded if None
+
+        RETURNS(EmbeddingModel): The newly constructed object
+        """
+        self._config = config if config is not None else load_config('config.yaml')
         self._vocab_size = self._config['hyperparameters']['vocab_size']
         # Check which embedding model to use
-        if self._config['parameters']['embedding_model'] == 'word2vec':
-            file_path = self._config['model_paths']['word2vec_model']['file_path']
-            self._embedding_model = Word2VecModel(file_path, self._vocab_size)
-        elif self._config['parameters']['embedding_model'] == 'sense2vec':
-            file_path = self._config['model_paths']['sense2vec_model']['file_path']
-            self._embedding_model = Sense2VecModel(file_path)
+        backend = self._config['parameters']['embedding_model']
+        # Everything past the backend only depends on the style of its keys
+        self._embedding = get_backend(backend).key_style
+        model_paths = self._config['model_paths'][f'{backend}_model']
+        file_path = model_paths['file_path']
+        # Prefer the memory-mapped vector store written by convert_model.py
+        dtype = get_vector_dtype(self._config)
+        if is_vector_store(get_cache_path(model_paths, dtype)):
+            file_path = get_cache_path(model_paths, dtype)
+        elif dtype != 'float32':
+            raise ValueError(f"No {dtype} vector store at {get_cache_path(model_paths, dtype)}, run convert_model.py first")
+        self._backend = backend
+        self._backend_options = get_backend_options(model_paths)
+        self._file_path = file_path
+        # Worked out on first use, once per model, see fingerprint and word_pack.get_pack_id
+        self._fingerprint = None
+        self._pack_ids = {}
+        self._embedding_model = load_backend_model(backend, file_path, self._vocab_size, self._backend_options)
+        if self._embedding == 'sense2vec':
+            # Neighbour search can be limited to some senses, e.g. [NOUN, ADJ]
+            self._embedding_model.set_sense_index(load_sense_index(self), self._config['hyperparameters'].get('clue_senses'))
+        self._vocabulary = load_vocabulary(self)
+        self._embedding_model.set_vocabulary(self._vocabulary)
+        self._similarity_table = load_similarity_table(self)
+        # Approximate neighbour search is opt-in by setting a target recall
+        ann_recall = self._config['hyperparameters'].get('ann_recall')
+        self._ann_index = load_ann_index(self, ann_recall) if ann_recall is not None else None
+        self._neighbour_cache = load_neighbour_cache(self)
+        # Admissible clues of the codename words found offline, see clue_index.py
+        self._clue_index = load_clue_index(self)
+        # Similarity rows shared by models playing the same boards, see set_similarity_memo
+        self._similarity_memo = None
+
+    def fingerprint(self):
+        """
+        Identifies the loaded model so caches built from it can be reused across
+        runs and are rebuilt when the model files change. The model files are only
+        looked at once per EmbeddingModel, a model built after they change gets a
+        new fingerprint.
+
+        RETURNS(str): A short hash of the backend, its options, vocab size and model files
+        """
+        if self._fingerprint is None:
+            self._fingerprint = self._compute_fingerprint()
+        return self._fingerprint
+
+    def _compute_fingerprint(self):
+        if os.path.isdir(self._file_path):
+            files = sorted(os.path.join(self._file_path, name) for name in os.listdir(self._file_path))
+        else:
+            files = [self._file_path]
+        stats = [(os.path.basename(path), os.path.getsize(path), int(os.path.getmtime(path))) for path in files]
+        key = repr((self._backend, os.path.abspath(self._file_path), self._vocab_size, stats))
+        if self._backend_options:
+            key += repr(sorted(self._backend_options.items()))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
 
     def get_model(self):
         """Retrieves the model for a given word embedding
@@ -39,6 +198,16 @@ class EmbeddingModel():
         """
         return self._embedding_model.get_vocab(self._vocab_size)
 
+    def get_best_sense(self, word):
+        """
+        Find the most frequent word|SENSE key of a word, sense2vec only
+
+        word(str): The word to check
+        RETURNS(str|None): The best matching key or None if no match is found
+        """
+        return self._embedding_model.get_best_sense(word)
+
+    @timed('embedding.similarity')
     def similarity(self, word1, word2):
         """
         Calculates semantic similarity between two words using cosine similarity.
@@ -48,6 +217,95 @@ class EmbeddingModel():
         """
         return self._embedding_model.calc_similarity(word1, word2)
 
+    @timed('embedding.get_vectors')
+    def get_vectors(self, words):
+        """
+        Gathers the unit-normalised vectors of the given words into a matrix.
+        Words which are not in the model are given a zero vector so they add
+        nothing to any similarity score.
+
+        words(list): The words to retrieve the vectors for
+        RETURNS(np.ndarray): A (len(words), vector size) float32 matrix
+        """
+        return self._embedding_model.get_vectors(words)
+
+    @timed('embedding.similarity_matrix')
+    def similarity_matrix(self, words1, words2):
+        """
+        Calculates the cosine similarity of every word in words1 to every word in
+        words2. Pairs covered by the precomputed similarity table are sliced from
+        it, the rest are computed from the vectors.
+
+        words1(list): The row words, usually clue candidates
+        words2(list): The column words, usually board words
+        RETURNS(np.ndarray): A (len(words1), len(words2)) float32 matrix
+        """
+        if self._similarity_memo is None:
+            return self._compute_similarity_matrix(words1, words2)
+        rows = self._similarity_memo.setdefault(tuple(words2), {})
+        missing = [word for word in dict.fromkeys(words1) if word not in rows]
+        if missing:
+            rows.update(zip(missing, self._compute_similarity_matrix(missing, words2)))
+        similarities = np.empty((len(words1), len(words2)), dtype=np.float32)
+        for i, word in enumerate(words1):
+            similarities[i] = rows[word]
+        return similarities
+
+    def set_similarity_memo(self, memo):
+        """
+        Shares the rows computed by similarity_matrix through a dictionary, so models
+        playing the same boards only compute the similarity of a word to a board once.
+        The memo grows with every board, so it is meant for bounded runs like a sweep.
+
+        memo(dict|None): The memo keyed by the column words, None to stop memoizing
+        """
+        self._similarity_memo = memo
+
+    def _compute_similarity_matrix(self, words1, words2):
+        if self._similarity_table is None:
+            return self.get_vectors(words1) @ self.get_vectors(words2).T
+        rows = self._similarity_table.get_rows(words1)
+        columns = self._similarity_table.get_columns(words2)
+        found_rows = rows >= 0
+        found_columns = columns >= 0
+        similarities = np.empty((len(words1), len(words2)), dtype=np.float32)
+        similarities[np.ix_(found_rows, found_columns)] = self._similarity_table.lookup(rows[found_rows], columns[found_columns])
+        if not found_columns.all():
+            missing_columns = [word for word, found in zip(words2, found_columns) if not found]
+            similarities[:, ~found_columns] = self.get_vectors(words1) @ self.get_vectors(missing_columns).T
+        if not found_rows.all():
+            missing_rows = [word for word, found in zip(words1, found_rows) if not found]
+            found_words = [word for word, found in zip(words2, found_columns) if found]
+            similarities[np.ix_(~found_rows, found_columns)] = self.get_vectors(missing_rows) @ self.get_vectors(found_words).T
+        return similarities
+
+    def get_indices(self, words):
+        """
+        Retrieves the row of each word in the model's vocabulary order
+
+        words(list): The words to look up
+        RETURNS(np.ndarray): The int64 row indices, -1 for words not in the model
+        """
+        return self._embedding_model.get_indices(words)
+
+    def get_keys(self):
+        """
+        Retrieves every key of the model in row order
+
+        RETURNS(list): The keys
+        """
+        return self._embedding_model.get_keys()
+
+    def get_row_vectors(self, rows):
+        """
+        Gathers the unit-normalised vectors of the given rows into a matrix
+
+        rows(np.ndarray): The rows to retrieve
+        RETURNS(np.ndarray): A (len(rows), vector size) float32 matrix
+        """
+        return self._embedding_model.get_row_vectors(rows)
+
+    @timed('embedding.most_similar_words')
     def most_similar_words(self, word, topn):
         """
         Retrieves the top n most similar words for a given word
@@ -57,88 +315,307 @@ class EmbeddingModel():
 
         RETURNS(list): most similar words
         """
-        return self._embedding_model.most_similar_words(word, topn)
+        similar_keys = self._neighbour_cache.get(word, topn, self._search_similar_keys)
+        return self._embedding_model.filter_similar_words(word, similar_keys)
+
+    @timed('embedding.neighbour_search')
+    def _search_similar_keys(self, word, topn):
+        if self._ann_index is not None:
+            # Limited to the rows the exact search would scan, e.g. those of the clue_senses
+            return self._ann_index.search(self, word, topn, row_mask=self._embedding_model.get_search_mask())
+        return self._embedding_model.similar_keys(word, topn)
+
+    def get_neighbour_cache_stats(self):
+        """
+        Get the hit and miss counters of the neighbour cache behind most_similar_words
+
+        RETURNS(dict): The memory hits, disk hits, misses, evictions and words in memory
+        """
+        return self._neighbour_cache.get_stats()
+
+    @timed('embedding.clue_candidates')
+    def clue_candidates(self, word, topn):
+        """
+        Retrieves the words among the top n most similar words of a given word
+        which could be given as a clue, that is single words present in the model.
+        Board specific exclusions are left to the Spymaster. Codename words are
+        looked up in the clue index when one has been built deep enough.
+
+        word(str): The word to find clue candidates for
+        topn(int): the number of top similar words to search
+
+        RETURNS(list): The admissible clue candidates in order of similarity
+        """
+        clue_rows = self._clue_index.get_clue_rows(word, topn) if self._clue_index is not None else None
+        if clue_rows is None:
+            clue_rows, _ = self.search_clue_rows(word, topn)
+        else:
+            count('clue_index.hits')
+        keys = self.get_keys()
+        return [keys[row] for row in clue_rows]
+
+    def search_clue_rows(self, word, topn):
+        """
+        Searches the top n most similar words of a given word for admissible clues
+
+        word(str): The word to find clue candidates for
+        topn(int): the number of top similar words to search
+
+        RETURNS(Tuple): The int64 clue rows in order of similarity, and the position
+        among the most similar words each was found at
+        """
+        similar_keys = self._neighbour_cache.get(word, topn, self._search_similar_keys)
+        return self._embedding_model.filter_clue_rows(word, similar_keys)
 
 class Word2VecModel():
-    def __init__(self, file_path, vocab_size):
+    def __init__(self, file_path, vocab_size, vectors=None):
         """
         Initialize the pretrained Word2Vec embedding model Object
 
-        file_path(str): the corpus to train the Word2Vec model
+        file_path(str): the corpus to train the Word2Vec model, or a vector store
+        written by convert_model.py which is opened memory-mapped instead
+        vectors(MemmapVectors|None): Vectors already in memory, used instead of file_path
 
         RETURNS(Word2VecModel): The newly constructed object
         """
         self._vocab_size = vocab_size
-        self._word_2_vec_model = gensim.models.KeyedVectors.load_word2vec_format(file_path, binary=True, limit=self._vocab_size)
+        if vectors is not None:
+            self._word_2_vec_model = vectors
+        elif is_vector_store(file_path):
+            self._word_2_vec_model = MemmapVectors(file_path, limit=self._vocab_size)
+        else:
+            import gensim
+            self._word_2_vec_model = gensim.models.KeyedVectors.load_word2vec_format(file_path, binary=True, limit=self._vocab_size)
+        self._vocabulary = None
 
     def get_model(self):
         return self._word_2_vec_model
 
+    def truncate(self, vocab_size):
+        """
+        Get the model limited to its first vocab_size vectors, without a copy for vector stores
+
+        vocab_size(int): The number of vectors to keep
+        RETURNS(Word2VecModel): The smaller model
+        """
+        model = self._word_2_vec_model
+        if isinstance(model, MemmapVectors):
+            vectors = model.truncate(vocab_size)
+        else:
+            vectors = MemmapVectors.from_arrays(model.index_to_key[:vocab_size], model.vectors[:vocab_size])
+        return Word2VecModel(None, vocab_size, vectors=vectors)
+
+    def set_vocabulary(self, vocabulary):
+        self._vocabulary = vocabulary
+
     def get_vocab(self, vocab_size):
-        vocab = []
-        word_list = self._word_2_vec_model.index_to_key[:vocab_size]
-        for term in word_list:
-            # Convert to lower case
-            curr_word = term.lower()
-            # Check if word is a singular word and not already in vocab
-            if re.match(r"^\w+$", curr_word) and curr_word not in vocab and "_" not in curr_word:
-                vocab.append(curr_word)
-        return vocab
+        keys = self.get_keys()
+        return [keys[row].lower() for row in self._vocabulary.get_vocab_rows(vocab_size)]
 
     def calc_similarity(self, word1, word2):
         return self._word_2_vec_model.similarity(word1, word2)
 
-    def most_similar_words(self, word, n):
+    def get_vectors(self, words):
+        indices = self.get_indices(words)
+        found = indices >= 0
+        vectors = np.zeros((len(words), self._word_2_vec_model.vector_size), dtype=np.float32)
+        vectors[found] = self.get_row_vectors(indices[found])
+        return vectors
+
+    def get_indices(self, words):
+        key_to_index = self._word_2_vec_model.key_to_index
+        return np.array([key_to_index.get(word, -1) for word in words], dtype=np.int64)
+
+    def get_keys(self):
+        return self._word_2_vec_model.index_to_key
+
+    def get_row_vectors(self, rows):
+        if isinstance(self._word_2_vec_model, MemmapVectors):
+            return self._word_2_vec_model.get_rows(rows)
+        # Compute the vector norms once so rows can be normalised by indexing
+        self._word_2_vec_model.fill_norms()
+        return self._word_2_vec_model.vectors[rows] / self._word_2_vec_model.norms[rows, None]
+
+    def similar_keys(self, word, n):
         similar_word_tuple = self._word_2_vec_model.similar_by_word(word, topn=n)
-        similar_word_list = [i[0] for i in similar_word_tuple]
+        return [i[0] for i in similar_word_tuple]
+
+    def get_search_mask(self):
+        # Every row is searched
+        return None
+
+    def filter_similar_words(self, word, similar_word_list):
         return similar_word_list
 
+    def filter_clue_rows(self, word, similar_word_list):
+        # Map each similar word to its lower case clue, -1 if it is not a singular word in the model
+        clue_rows = self._vocabulary.get_clue_rows(self.get_indices(similar_word_list))
+        ranks = np.flatnonzero(clue_rows >= 0)
+        return clue_rows[ranks], ranks
+
+    def most_similar_words(self, word, n):
+        return self.filter_similar_words(word, self.similar_keys(word, n))
+
 class Sense2VecModel():
     def __init__(self, file_path):
         """
         Initialize the pretrained Sense2Vec embedding model Object
 
-        file_path(str): the corpus to train the Sense2Vec model
+        file_path(str): the corpus to train the Sense2Vec model, or a vector store
+        written by convert_model.py which is opened memory-mapped instead
 
         RETURNS(Sense2VecModel): The newly constructed object
         """
-        self._sense2vec_model = Sense2Vec().from_disk(file_path)
+        if is_vector_store(file_path):
+            self._sense2vec_model = MemmapVectors(file_path)
+        else:
+            from sense2vec import Sense2Vec
+            self._sense2vec_model = Sense2Vec().from_disk(file_path)
+        self._keys = None
+        self._key_to_index = None
+        self._vocabulary = None
+        self._sense_index = None
+        self._senses = None
 
     def get_model(self):
         return self._sense2vec_model
 
+    def truncate(self, vocab_size):
+        # Every key is loaded whatever the vocabulary size, which only limits get_vocab
+        return self
+
+    def set_vocabulary(self, vocabulary):
+        self._vocabulary = vocabulary
+
+    def set_sense_index(self, sense_index, senses=None):
+        """
+        Use a sense index for best senses, vectors and neighbour search
+
+        sense_index(SenseIndex): The index built from this model
+        senses(list|None): The senses neighbour search is limited to, every sense if None
+        """
+        self._sense_index = sense_index
+        self._senses = senses
+
     def get_vocab(self, vocab_size):
         vocab = []
         word_and_senses = []
-        word_list = [word for word in self._sense2vec_model.keys()][:vocab_size]
-        for term in word_list:
-            # Split word and senses
-            parts = term.split('|')
-            curr_word = term.split('|')[0].lower()
-            # Check if word is a singular word and not already in vocab
-            if re.match(r"^\w+$", curr_word) and curr_word not in vocab and "_" not in curr_word:
-                vocab.append(curr_word)
-                word_and_senses.append(curr_word + '|' + parts[1])
+        keys = self.get_keys()
+        for row in self._vocabulary.get_vocab_rows(vocab_size):
+            word, sense = split_key(keys[row])
+            curr_word = word.lower()
+            vocab.append(curr_word)
+            word_and_senses.append(curr_word + '|' + sense)
         return vocab, word_and_senses
 
+    def get_best_sense(self, word):
+        row = self._sense_index.get_best_sense_row(word)
+        if row is None:
+            # Mixed case words are not indexed, ask the model
+            return self._sense2vec_model.get_best_sense(word)
+        return self.get_keys()[row] if row >= 0 else None
+
     def calc_similarity(self, word1, word2):
         return self._sense2vec_model.similarity(word1, word2)
 
+    def get_vectors(self, words):
+        indices = self.get_indices(words)
+        found = indices >= 0
+        vectors = np.zeros((len(words), self._sense_index.vectors.shape[1]), dtype=np.float32)
+        vectors[found] = self.get_row_vectors(indices[found])
+        return vectors
+
+    def get_indices(self, words):
+        # Sense2Vec keys its table by hash, so index the keys in iteration order once
+        if self._key_to_index is None:
+            self._key_to_index = getattr(self._sense2vec_model, 'key_to_index', None)
+        if self._key_to_index is None:
+            self._key_to_index = {key: index for index, key in enumerate(self.get_keys())}
+        return np.array([self._key_to_index.get(word, -1) for word in words], dtype=np.int64)
+
+    def get_keys(self):
+        if self._keys is None:
+            self._keys = list(self._sense2vec_model.keys())
+        return self._keys
+
+    def get_row_vectors(self, rows):
+        return self._sense_index.get_rows(rows)
+
+    def similar_keys(self, word, topn):
+        row = self.get_indices([word])[0]
+        if row < 0:
+            raise KeyError(f"Key '{word}' not present")
+        keys = self.get_keys()
+        return [keys[similar_row] for similar_row in self._sense_index.search(row, topn, self._senses)]
+
+    def get_search_mask(self):
+        """
+        Get the rows neighbour search is limited to
+
+        RETURNS(np.ndarray|None): A boolean mask of the rows with the searched senses, None if every row is searched
+        """
+        return self._sense_index.get_mask(self._senses)
+
     def most_similar_words(self, word, topn):
-        most_similar = []
-        word_and_senses = []
-        similar_word_list = [i[0] for i in self._sense2vec_model.most_similar(word, n=topn)]
-        for term in similar_word_list:
-            if term is None:
+        return self.filter_similar_words(word, self.similar_keys(word, topn))
+
+    def filter_similar_words(self, word, similar_word_list):
+        keys = self.get_keys()
+        word_and_senses = [keys[row] for row in self.filter_clue_rows(word, similar_word_list)[0]]
+        return [split_key(key)[0] for key in word_and_senses], word_and_senses
+
+    def filter_clue_rows(self, word, similar_word_list):
+        clue_rows = []
+        ranks = []
+        seen = set()
+        # Rows which are not singular words, or not in the model, map to -1
+        rows = self._vocabulary.get_clue_rows(self.get_indices(similar_word_list))
+        for rank, (term, clue_row) in enumerate(zip(similar_word_list, rows.tolist())):
+            if clue_row < 0:
                 continue
             # Split word and senses
-            parts = term.split('|')
-            curr_word = term.split('|')[0]
+            curr_word, _ = split_key(term)
             # Exclude words that include base forms
             if curr_word in word or word in curr_word:
                 continue
-            # Check if word is a singular word and not already in vocab
-            if re.match(r"^\w+$", curr_word) and curr_word not in most_similar and "_" not in curr_word:
-                most_similar.append(curr_word)
-                word_and_senses.append(curr_word + '|' + parts[1])
-        return most_similar, word_and_senses
+            # Check if word is not already in vocab
+            if curr_word not in seen:
+                seen.add(curr_word)
+                clue_rows.append(clue_row)
+                ranks.append(rank)
+        return np.array(clue_rows, dtype=np.int64), np.array(ranks, dtype=np.int64)
+
+def load_memmap_model(file_path, vocab_size):
+    """
+    Opens a word2vec vector store written by convert_model.py, without gensim
+
+    file_path(str): The path to the vector store
+    vocab_size(int): The number of vectors to use
+
+    RETURNS(Word2VecModel): The memory-mapped model
+    """
+    if not is_vector_store(file_path):
+        raise ValueError(f"{file_path} is not a vector store, run convert_model.py first")
+    return Word2VecModel(file_path, vocab_size)
+
+def load_synthetic_model(file_path, vocab_size, dim=300, seed=0):
+    """
+    Generates a seeded synthetic embedding in memory, for running without a model
+
+    file_path(str): The word list whose words the embedding must contain
+    vocab_size(int): The number of keys
+    dim(int): The vector size
+    seed(int): The random seed, the same seed gives the same embedding
+
+    RETURNS(Word2VecModel): The synthetic model
+    """
+    from synthetic_model import generate_synthetic_vectors
+    with open(file_path, 'r') as file:
+        words = file.read().split()
+    keys, vectors = generate_synthetic_vectors(words, vocab_size, dim, seed=seed)
+    return Word2VecModel(file_path, vocab_size, vectors=MemmapVectors.from_arrays(keys, vectors))
+
+register_backend('word2vec', Word2VecModel)
+register_backend('sense2vec', lambda file_path, vocab_size: Sense2VecModel(file_path), key_style='sense2vec')
+register_backend('memmap', load_memmap_model)
+register_backend('synthetic', load_synthetic_model)
@@ -0,0 +1,232 @@
+from collections import namedtuple
+from instrumentation import GameResult, collect_stats, timer
+
+# A structured game event. kind is one of 'start', 'turn', 'clue', 'pass', 'guess', 'reveal' or 'result'
+GameEvent = namedtuple('GameEvent', ['kind', 'team', 'data'])
+
+# Engine states
+NEEDS_CLUE = 'clue'
+GUESSING = 'guess'
+OVER = 'over'
+
+class EventLog():
+    def __init__(self):
+        """
+        Initialize the EventLog, a sink which keeps every event it is given
+
+        RETURNS(EventLog): The newly constructed object
+        """
+        self._events = []
+
+    def __call__(self, event):
+        self._events.append(event)
+
+    def get_events(self):
+        return self._events
+
+class GameEngine():
+    def __init__(self, game_logic, sink=None):
+        """
+        Initialize the GameEngine, an explicit turn-loop state machine over a game.
+        Instead of printing, it emits GameEvents to a sink, so games can run headless
+        while the console game renders the same events.
+
+        game_logic(GameLogic): The game holding the board, spymasters and guessers
+        sink(callable|None): Called with every GameEvent, events are dropped if None
+
+        RETURNS(GameEngine): The newly constructed object
+        """
+        self._game = game_logic
+        self._sink = sink
+        self._state = NEEDS_CLUE
+        self._team = 'blue'
+        self._clue = None
+        self._number = 0
+        self._guesses_made = 0
+        self._round_flag = None
+        # Turns passed in a row for want of a clue
+        self._passes = 0
+
+    def _emit(self, kind, **data):
+        if self._sink is not None:
+            self._sink(GameEvent(kind, self._team, data))
+
+    def start(self, team):
+        """
+        Start the game with the given team's turn
+
+        team(str): The team which plays first
+        """
+        self._team = team
+        self._state = NEEDS_CLUE
+        self._emit('start')
+
+    def get_team(self):
+        return self._team
+
+    def get_clue_and_number(self):
+        return self._clue, self._number
+
+    def needs_clue(self):
+        return self._state == NEEDS_CLUE
+
+    def is_over(self):
+        return self._state == OVER
+
+    def turn_done(self):
+        """
+        Check whether the guessing team has made as many guesses as the clue's number
+
+        RETURNS(bool): True if the turn should pass to the enemy
+        """
+        return self._state == GUESSING and self._guesses_made == self._number
+
+    def give_clue(self, clue_and_number=None):
+        """
+        Start the team's turn with a clue from its spymaster
+
+        clue_and_number(Tuple|None): An already generated clue and number, generated
+        by the team's spymaster if None
+
+        RETURNS(Tuple|None): The clue and number, None if the spymaster had no clue
+        to give and the team passed
+        """
+        self._emit('turn', scores=dict(self._game._scores))
+        if clue_and_number is None:
+            clue_and_number = self._game._get_clue_and_number(self._team)
+        if clue_and_number is None:
+            self.pass_turn()
+            return None
+        self._passes = 0
+        self._clue, self._number = clue_and_number
+        self._game._stats.count('game.clues')
+        # Add to how many turns they are on
+        self._game._add_team_turns(self._team)
+        self._guesses_made = 0
+        self._state = GUESSING
+        self._emit('clue', clue=self._clue, number=self._number)
+        return clue_and_number
+
+    def end_turn(self):
+        """
+        Pass the turn to the enemy team, which needs a clue next
+        """
+        self._team = 'blue' if self._team == 'red' else 'red'
+        self._state = NEEDS_CLUE
+
+    def pass_turn(self):
+        """
+        Pass the turn of a team whose spymaster has no clue to give, e.g. once the
+        enemy revealed the team's last word. If both teams pass in a row neither can
+        ever give a clue again, so the game is over with no round flag.
+        """
+        self._emit('pass')
+        self._game._stats.count('game.passes')
+        self._passes += 1
+        if self._passes == 2:
+            self._state = OVER
+            self._emit('result', flag=None, scores=dict(self._game._scores))
+        else:
+            self.end_turn()
+
+    def guess(self, word):
+        """
+        Make a guess for the current team and move the game to its next state
+
+        word(str): The guessed word
+
+        RETURNS(int|None): The round flag, 0 - continue team's round, 1 - start enemy's round,
+        2 - game lost to the assassin, 3 - game won, None if the word is not on the board
+        """
+        guesser = self._game._get_guesser(self._team)
+        spymaster = self._game._get_spymaster(self._team)
+        guess = guesser.make_guess(word)
+        guesser.add_to_guessed_words(self._clue, guess)
+        self._emit('guess', word=guess)
+        reveal_tag = spymaster.reveal_word(guess)
+        self._emit('reveal', word=guess, tag=reveal_tag)
+        round_flag = self._game._get_round_flag(reveal_tag, spymaster)
+        self._guesses_made += 1
+        self._game._stats.count('game.guesses')
+        if round_flag == 1:
+            self.end_turn()
+        elif round_flag == 2 or round_flag == 3:
+            self._round_flag = round_flag
+            self._state = OVER
+            self._emit('result', flag=round_flag, scores=dict(self._game._scores))
+        return round_flag
+
+    def apply_suggestions(self, suggested_words):
+        """
+        Guess every suggested word until one ends the team's turn
+
+        suggested_words(list): The words suggested by the team's guesser, the team
+        passes if there are none
+        RETURNS(int|None): The round flag of the last guess
+        """
+        round_flag = 0
+        if not suggested_words:
+            # Nothing left to guess, e.g. the enemy revealed the team's last word
+            self.end_turn()
+        for word in suggested_words:
+            round_flag = self.guess(word)
+            if self._state != GUESSING:
+                break
+        return round_flag
+
+    def get_result(self):
+        """
+        Get the result of a finished game
+
+        RETURNS(GameResult): a tuple containing:
+        - team
+        - round flag
+        - # of team turns
+        - team clue intended words
+        - team guessed words
+        with the game's timers and counters as its stats attribute
+        """
+        team_clue_history = self._game._get_clue_history(self._team)
+        team_guesser = self._game._get_guesser(self._team)
+        return GameResult((self._team, self._round_flag, self._game._get_team_turns(self._team), team_clue_history.get_clue_intended_words(), team_guesser.get_guessed_words()),
+                          self._game._stats)
+
+    def run(self, team):
+        """
+        Plays the game autonomously until it is won or lost
+
+        team(str): The team which plays first
+        RETURNS(Tuple): The game result, see get_result
+        """
+        with collect_stats(self._game._stats), timer('game.play'):
+            self.start(team)
+            while not self.is_over():
+                if self.needs_clue():
+                    self.give_clue()
+                elif self.turn_done():
+                    self.end_turn()
+                else:
+                    self.apply_suggestions(self._game._get_guesser(self._team).suggest_guess())
+        return self.get_result()
+
+    def run_single_round(self, team):
+        """
+        Plays a single autonomous guessing round, guessing every suggested word
+
+        team(str): The team which plays the round
+        RETURNS(GameResult|None): The result once the intended number of guesses is made,
+        see get_result, None if fewer words were suggested or there was no clue to give
+        """
+        with collect_stats(self._game._stats), timer('game.play'):
+            self.start(team)
+            clue_and_number = self.give_clue()
+            if clue_and_number is None:
+                return None
+            _, number = clue_and_number
+            for word in self._game._get_guesser(team).suggest_guess():
+                self._round_flag = self.guess(word)
+                # The round goes on whatever was revealed
+                self._team = team
+                if self._guesses_made == number:
+                    return self.get_result()
+        return None
@@ -1,34 +1,121 @@
+from batch_simulator import BatchSimulator
+from embedding_model import EmbeddingModel, load_config
+from instrumentation import Stats, aggregate_stats, profile_run
 from main import GameLogic
+from multiprocessing import Pool
+import hashlib
+import os
 import random
-import yaml
+import sys
 
-def load_config(config_file):
-    """Load and parse the config yaml file.
+# The embedding model games are played with in this process, see _load_model
+_embedding_model = None
 
-    config_file: The path to the config file
-    RETURNS (Dict): The config as key value pairs
+def derive_seed(seed, experiment, game):
     """
-    with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
-    return config
+    Derives the random seed of a single game from the experiment seed, so every
+    game deals the same board whichever worker plays it and in whichever order
 
-def average_min_num_of_turns(num_of_games):
+    seed(int): The experiment seed
+    experiment(str): The name of the experiment
+    game(int): The index of the game in the experiment
+
+    RETURNS(int): The game's seed
     """
-    Autonomously plays multiple Codenames games and calculates the average number of 
-    turns, the minimum number of turns, and how many games were assassins
+    key = f"{seed}:{experiment}:{game}".encode('utf-8')
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'big')
+
+def _load_model():
+    """
+    Builds the embedding model every game of this process is played with, once,
+    so games never read config.yaml again
+    """
+    global _embedding_model
+    _embedding_model = EmbeddingModel()
+
+def _init_worker():
+    """
+    Attaches a worker process to the embedding model. Forked workers share the
+    parent's already loaded model, and a memory-mapped vector store is shared
+    through the page cache either way. Game output is silenced in workers.
+    """
+    sys.stdout = open(os.devnull, 'w')
+    _load_model()
+
+def _play_game(args):
+    """
+    Plays a single automated game with its own seed
+
+    args(Tuple): The game seed and whether to play a single round
+    RETURNS(Tuple|None): The automate game result, None if a single round had
+    fewer suggested words than intended or no clue to give
+    """
+    game_seed, single_round = args
+    random.seed(game_seed)
+    gameLogic = GameLogic(_embedding_model)
+    if single_round:
+        return gameLogic.automate_single_guess_round("blue")
+    return gameLogic.automate_game("blue")
+
+def _play_batch(game_seeds):
+    """
+    Plays automated games in lock-step with the BatchSimulator
 
+    game_seeds(list): The seed of each game
+    RETURNS(list): The automate game result of each game
+    """
+    games = []
+    for game_seed in game_seeds:
+        random.seed(game_seed)
+        games.append(GameLogic(_embedding_model))
+    return BatchSimulator(games).run("blue")
+
+def play_games(experiment, num_of_games, num_of_workers=1, seed=50, single_round=False, batch_size=1):
+    """
+    Autonomously plays multiple Codenames games, spread across worker processes
+
+    experiment(str): The name of the experiment, part of each game's seed
+    num_of_games(int): The number of games to play
+    num_of_workers(int): The number of worker processes, games run in this process if 1
+    seed(int): The experiment seed every game seed is derived from
+    single_round(bool): Only play the first round of each game
+    batch_size(int): The number of full games each worker plays in lock-step
+
+    RETURNS(list): The result of each game in order, None for single rounds without a result
+    """
+    game_seeds = [derive_seed(seed, experiment, i) for i in range(num_of_games)]
+    if batch_size > 1 and not single_round:
+        play, tasks = _play_batch, [game_seeds[i:i + batch_size] for i in range(0, num_of_games, batch_size)]
+    else:
+        play, tasks = _play_game, [(game_seed, single_round) for game_seed in game_seeds]
+    # Load the model before forking so workers share it
+    _load_model()
+    if num_of_workers <= 1:
+        results = []
+        for i, task in enumerate(tasks):
+            print(f"\n====== {'BATCH' if play is _play_batch else 'GAME'} {i + 1} ======\n")
+            results.append(play(task))
+    else:
+        with Pool(num_of_workers, initializer=_init_worker) as pool:
+            results = pool.map(play, tasks, chunksize=1)
+    if play is _play_batch:
+        results = [result for batch in results for result in batch]
+    return results
+
+def get_turn_metrics(results):
+    """
+    Calculates the average number of turns of the won games, the minimum number of
+    turns, and how many games were assassins
+
+    results(list): The automate game results, None for failed games
     RETURNS(Tuple): Average turns, minimum turns, assassin games
     """
     total_turns = []
     assassin_game = 0
-    for i in range(num_of_games):
-        print(f"\n====== GAME {i + 1} ======\n")
-        gameLogic = GameLogic()
-        try:    
-            _, flag, turns,_ ,_ = gameLogic.automate_game("blue")
-        except TypeError:
-            print("Failed game")
+    for result in results:
+        if result is None:
             continue
+        _, flag, turns, _, _ = result
         if flag == 3:
             total_turns.append(turns)
         elif flag == 2:
@@ -42,100 +129,125 @@ def average_min_num_of_turns(num_of_games):
         min_turns = 0
     return average_turns, min_turns, assassin_game
 
-def correct_intended_words(num_of_games):
+def get_intended_word_metrics(results, single_round=False):
     """
-    Autonomously plays multiple Codenames games and calculates total clues given, correct guessed words,
-    and how many games were assassins
+    Calculates total clues given, correct guessed words, and how many games were assassins
+
+    results(list): The automate game results, None for failed games
+    single_round(bool): The results are single rounds, counted whether won or not
 
     RETURNS(Tuple): Total clues, correct guessed words, assassin games
     """
     total_clues = 0
     correct_guessed_words = 0
     assassin_game = 0
-    for i in range(num_of_games):
-        print(f"\n====== GAME {i + 1} ======\n")
-        gameLogic = GameLogic()
-        try:
-            _, flag, _, intended_words, guessed_words = gameLogic.automate_game("blue")
-        except TypeError:
-            print("Failed game")
+    for result in results:
+        if result is None:
             continue
+        _, flag, _, intended_words, guessed_words = result
+        # Skip for assassin
         if flag == 2:
             assassin_game += 1
             continue
-        elif flag == 3:
+        elif flag == 3 or single_round:
             for key in intended_words:
                 if key in guessed_words:
                     correct_guessed_words  += sum(1 for word in intended_words[key] if word in guessed_words[key])
                     total_clues += len(intended_words[key])
     return total_clues, correct_guessed_words, assassin_game
 
-def correct_intended_words_single_round(num_of_games):
+def average_min_num_of_turns(num_of_games, num_of_workers=1, seed=50, batch_size=1, stats=None):
+    """
+    Autonomously plays multiple Codenames games and calculates the average number of 
+    turns, the minimum number of turns, and how many games were assassins
+
+    stats(Stats|None): Adds up the timers and counters of every game if given
+
+    RETURNS(Tuple): Average turns, minimum turns, assassin games
+    """
+    results = play_games('average_min_num_of_turns', num_of_games, num_of_workers, seed, batch_size=batch_size)
+    if stats is not None:
+        stats.merge(aggregate_stats(results))
+    return get_turn_metrics(results)
+
+def correct_intended_words(num_of_games, num_of_workers=1, seed=50, batch_size=1, stats=None):
+    """
+    Autonomously plays multiple Codenames games and calculates total clues given, correct guessed words,
+    and how many games were assassins
+
+    stats(Stats|None): Adds up the timers and counters of every game if given
+
+    RETURNS(Tuple): Total clues, correct guessed words, assassin games
+    """
+    results = play_games('correct_intended_words', num_of_games, num_of_workers, seed, batch_size=batch_size)
+    if stats is not None:
+        stats.merge(aggregate_stats(results))
+    return get_intended_word_metrics(results)
+
+def correct_intended_words_single_round(num_of_games, num_of_workers=1, seed=50, stats=None):
     """
     Autonomously a single Codenames round and calculates total clues given, correct guessed words,
     and how many games were assassins
 
+    stats(Stats|None): Adds up the timers and counters of every game if given
+
     RETURNS(Tuple): Total clues, correct guessed words, assassin games
     """
-    total_clues = 0
-    correct_guessed_words = 0
-    assassin_game = 0
-    for i in range(num_of_games):
-        print(f"\n====== GAME {i + 1} ======\n")
-        gameLogic = GameLogic()
-        try:
-            _, flag, _, intended_words, guessed_words = gameLogic.automate_single_guess_round("blue")
-        except TypeError:
-            print("Failed game")
-            continue
-        # Skip for assassin
-        if flag == 2:
-            assassin_game += 1
-            continue
-        for key in intended_words:
-            if key in guessed_words:
-                correct_guessed_words  += sum(1 for word in intended_words[key] if word in guessed_words[key])
-                total_clues += len(intended_words[key])
-    return total_clues, correct_guessed_words, assassin_game
+    results = play_games('correct_intended_words_single_round', num_of_games, num_of_workers, seed, single_round=True)
+    if stats is not None:
+        stats.merge(aggregate_stats(results))
+    return get_intended_word_metrics(results, single_round=True)
 
 """
 EXPERIMENT DATA
 """
-# Set random seed
-random.seed(50)
-
-# Config
-config = load_config('config.yaml')
-
-embedding_model = config['parameters']['embedding_model']
-vocab_size = config['hyperparameters']['vocab_size']
-cos_difference = config['hyperparameters']['cosine_sim_difference']
-topn = config['hyperparameters']['topn']
-num_of_games = config['experiment_params']['num_of_games']
-
-print("\n")
-print("Embedding Model:", embedding_model)
-print("Vocabulary Size:", vocab_size)
-print("Cosine similarity difference:", cos_difference)
-print("Top N:", topn)
-print("Num of games:", num_of_games)
-print("\n")
-
-# Play normal Codenames games
-average_turns, min_turns, assassin_games = average_min_num_of_turns(num_of_games)
-print(f'\nAverage turns: {average_turns}, Minimum turns: {min_turns}, Failed games: {assassin_games}\n')
-
-# Play Codenames games for intended words
-total_clues, correct_guessed_words, total_assassin_games = correct_intended_words(num_of_games)
-print(f'\nTotal clues: {total_clues}, Correct guessed words: {correct_guessed_words}, Failed games: {total_assassin_games}\n')
-
-# Play Codenames games for single round
-single_total_clues, single_correct_guessed_words, single_assassin_games = correct_intended_words_single_round(num_of_games)
-print(f'\nTotal clues (Single Round): {total_clues}, Correct guessed words: {correct_guessed_words}, Failed games: {assassin_games}\n')
-
-average_turns_list = [average_turns, min_turns, assassin_games]
-single_game_clues_list = [total_clues, correct_guessed_words, assassin_games]
-single_round_clues_list = [single_total_clues, single_correct_guessed_words, single_assassin_games]
-print(average_turns_list)
-print(single_game_clues_list)
-print(single_round_clues_list)
\ No newline at end of file
+if __name__ == "__main__":
+    config = load_config('config.yaml')
+
+    embedding_model = config['parameters']['embedding_model']
+    vocab_size = config['hyperparameters']['vocab_size']
+    cos_difference = config['hyperparameters']['cosine_sim_difference']
+    topn = config['hyperparameters']['topn']
+    num_of_games = config['experiment_params']['num_of_games']
+    # Every game gets its own seed derived from this one
+    seed = config['experiment_params'].get('seed', 50)
+    num_of_workers = config['experiment_params'].get('num_of_workers', 1)
+    batch_size = config['experiment_params'].get('batch_size', 1)
+    # Profile of the whole run, collapsed stacks if it ends in .collapsed, cProfile otherwise
+    profile_path = config['experiment_params'].get('profile_path')
+
+    print("\n")
+    print("Embedding Model:", embedding_model)
+    print("Vocabulary Size:", vocab_size)
+    print("Cosine similarity difference:", cos_difference)
+    print("Top N:", topn)
+    print("Num of games:", num_of_games)
+    print("Num of workers:", num_of_workers)
+    print("Batch size:", batch_size)
+    print("\n")
+
+    with profile_run(profile_path):
+        # Play normal Codenames games
+        turns_stats = Stats()
+        average_turns, min_turns, assassin_games = average_min_num_of_turns(num_of_games, num_of_workers, seed, batch_size, turns_stats)
+        print(f'\nAverage turns: {average_turns}, Minimum turns: {min_turns}, Failed games: {assassin_games}\n')
+        print(turns_stats.report())
+
+        # Play Codenames games for intended words
+        intended_stats = Stats()
+        total_clues, correct_guessed_words, total_assassin_games = correct_intended_words(num_of_games, num_of_workers, seed, batch_size, intended_stats)
+        print(f'\nTotal clues: {total_clues}, Correct guessed words: {correct_guessed_words}, Failed games: {total_assassin_games}\n')
+        print(intended_stats.report())
+
+        # Play Codenames games for single round
+        single_stats = Stats()
+        single_total_clues, single_correct_guessed_words, single_assassin_games = correct_intended_words_single_round(num_of_games, num_of_workers, seed, single_stats)
+        print(f'\nTotal clues (Single Round): {total_clues}, Correct guessed words: {correct_guessed_words}, Failed games: {assassin_games}\n')
+        print(single_stats.report())
+
+    average_turns_list = [average_turns, min_turns, assassin_games]
+    single_game_clues_list = [total_clues, correct_guessed_words, assassin_games]
+    single_round_clues_list = [single_total_clues, single_correct_guessed_words, single_assassin_games]
+    print(average_turns_list)
+    print(single_game_clues_list)
+    print(single_round_clues_list)
\ No newline at end of file
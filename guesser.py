@@ -1,4 +1,6 @@
 from collections import defaultdict
+from instrumentation import timed
+import numpy as np
 
 class Guesser():
     def __init__(self, team, board, clue_history):
@@ -14,6 +16,8 @@ class Guesser():
         self._board = board
         self._history = clue_history
         self._guessed_words = defaultdict(list)
+        # Vectors of every board word, gathered on first use
+        self._board_vectors = None
 
     def suggest_guess(self):
         """ 
@@ -24,6 +28,7 @@ class Guesser():
         return self._heuristic_algorithm()
 
 
+    @timed('guesser.heuristic_algorithm')
     def _heuristic_algorithm(self):
         """
         A heuristic algorithm which finds out which words were intended
@@ -31,21 +36,68 @@ class Guesser():
 
         RETURN(list):  A list of the words most similar to the clue
         """
+        return self.suggest_guesses([self._get_clue_and_number()])[0]
+
+    def suggest_guesses(self, clues_and_numbers):
+        """
+        Suggest guesses for many clues at once against the current board, scoring
+        every clue with one matrix product against the unrevealed board words
+
+        clues_and_numbers(list): (clue, number of words) tuples
+
+        RETURNS(list): The suggested words for each clue
+        """
+        words, word_vectors = self._get_board_matrix()
+        clues = [clue for clue, _ in clues_and_numbers]
+        sim_scores = self._board._embedding_model.get_vectors(clues) @ word_vectors.T
+        return [self._rank_words(words, scores, clue_number)
+                for scores, (_, clue_number) in zip(sim_scores, clues_and_numbers)]
+
+    def _get_clue_and_number(self):
+        """
+        Get the latest clue and the number of words it was intended for
+
+        RETURNS(Tuple): The latest clue and its intended number of words
+        """
         last_clue = self._history.get_last_clue()
         # Get intended number of words
         clue_number = len(self._history._clue_history[last_clue])
-        word_score = {}
-
-        # Iterate through each word on the board
-        for word in self._board.get_current_words():
-            if word == "------":
-                continue
-            sim_score = self._board._embedding_model.similarity(last_clue, word)
-            word_score[word] = sim_score
-        # Sort the words with the highest similarity
-        sorted_word_score = dict(sorted(word_score.items(), key=lambda item: item[1], reverse=True))
-        most_similar_words = list(sorted_word_score.keys())
-        return most_similar_words[:clue_number]
+        return last_clue, clue_number
+
+    def _get_board_matrix(self):
+        """
+        Get the unrevealed words and their vectors. The vectors of the whole board
+        are gathered once, reveals only mask rows out.
+
+        RETURNS(Tuple): The unrevealed words, in board order, and their (words, dim) vectors
+        """
+        if self._board_vectors is None:
+            self._board_vectors = self._board._embedding_model.get_vectors(self._board.get_starting_words())
+        current_words = self._board.get_current_words()
+        unrevealed = np.array([word != "------" for word in current_words])
+        return [word for word in current_words if word != "------"], self._board_vectors[unrevealed]
+
+    def _rank_words(self, words, sim_scores, clue_number):
+        """
+        Pick the words most similar to the clue
+
+        words(list): The unrevealed words
+        sim_scores(np.ndarray): The similarity of each word to the clue
+        clue_number(int): The number of words to pick
+
+        RETURNS(list): The clue_number most similar words, ties kept in board order
+        """
+        sim_scores = np.asarray(sim_scores)
+        count = min(clue_number, len(sim_scores))
+        if count <= 0:
+            return []
+        # Partial top-k: everything above the k-th highest score, then ties in board order
+        kth_score = np.partition(sim_scores, len(sim_scores) - count)[len(sim_scores) - count]
+        above = np.flatnonzero(sim_scores > kth_score)
+        ties = np.flatnonzero(sim_scores == kth_score)[:count - len(above)]
+        chosen = np.concatenate((above, ties))
+        order = chosen[np.lexsort((chosen, -sim_scores[chosen]))]
+        return [words[i] for i in order]
 
     def make_guess(self, word):
         """
@@ -0,0 +1,241 @@
+from contextlib import contextmanager
+import cProfile
+import functools
+import os
+import sys
+import time
+import numpy as np
+
+# The Stats currently collecting timings and counters, innermost last. Timers
+# cost a single check while it is empty.
+_active = []
+
+class Stats():
+    def __init__(self):
+        """
+        Initialize the Stats, the timers and counters collected while playing.
+        Timers are inclusive, a timer running inside another adds to both.
+
+        RETURNS(Stats): The newly constructed object
+        """
+        self.timers = {}
+        self.counters = {}
+
+    def add_time(self, name, seconds, calls=1):
+        """
+        Adds time to a timer
+
+        name(str): The name of the timer
+        seconds(float): The time spent
+        calls(int): The number of calls the time was spent in
+        """
+        timer = self.timers.setdefault(name, [0.0, 0])
+        timer[0] += seconds
+        timer[1] += calls
+
+    def count(self, name, amount=1):
+        """
+        Adds to a counter
+
+        name(str): The name of the counter
+        amount(int): The amount to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, other):
+        """
+        Adds the timers and counters of other Stats to these
+
+        other(Stats|None): The stats to add, ignored if None
+        RETURNS(Stats): These stats
+        """
+        if other is not None:
+            for name, (seconds, calls) in other.timers.items():
+                self.add_time(name, seconds, calls)
+            for name, amount in other.counters.items():
+                self.count(name, amount)
+        return self
+
+    def as_dict(self):
+        """
+        Get the stats as plain data, for saving as JSON
+
+        RETURNS(dict): The seconds and calls of every timer and the counters
+        """
+        return {'timers': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.timers.items()},
+                'counters': dict(self.counters)}
+
+    def report(self):
+        """
+        Get a table of the timers, slowest first, followed by the counters
+
+        RETURNS(str): The printable report
+        """
+        from tabulate import tabulate
+        rows = [[name, calls, seconds * 1000, seconds * 1000 / calls if calls else 0.0]
+                for name, (seconds, calls) in sorted(self.timers.items(), key=lambda item: -item[1][0])]
+        report = tabulate(rows, headers=['timer', 'calls', 'total ms', 'mean ms'], floatfmt='.3f')
+        if self.counters:
+            report += '\n\n' + tabulate(sorted(self.counters.items()), headers=['counter', 'count'])
+        return report
+
+class GameResult(tuple):
+    """
+    The result tuple of an automated game, with the Stats collected while it was
+    set up and played as its stats attribute
+    """
+    def __new__(cls, result, stats=None):
+        game_result = super().__new__(cls, result)
+        game_result.stats = stats
+        return game_result
+
+@contextmanager
+def collect_stats(stats):
+    """
+    Collects the timers and counters of everything run inside the block into stats
+
+    stats(Stats): The stats to collect into
+    """
+    _active.append(stats)
+    try:
+        yield stats
+    finally:
+        _active.pop()
+
+@contextmanager
+def timer(name):
+    """
+    Times the block, if stats are being collected
+
+    name(str): The name of the timer
+    """
+    if not _active:
+        yield
+        return
+    stats = _active[-1]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(name, time.perf_counter() - start)
+
+def timed(name):
+    """
+    Decorator timing every call of a function, if stats are being collected
+
+    name(str): The name of the timer
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return function(*args, **kwargs)
+            stats = _active[-1]
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def count(name, amount=1):
+    """
+    Adds to a counter, if stats are being collected
+
+    name(str): The name of the counter
+    amount(int): The amount to add
+    """
+    if _active:
+        _active[-1].count(name, amount)
+
+def aggregate_stats(results):
+    """
+    Adds up the stats of game results
+
+    results(list): GameResult tuples, None for failed games
+    RETURNS(Stats): The summed stats
+    """
+    stats = Stats()
+    for result in results:
+        stats.merge(getattr(result, 'stats', None))
+    return stats
+
+def summarise(timings):
+    """
+    Summarise the latencies of timed calls
+
+    timings(list): The seconds each call took
+    RETURNS(dict): The call count and the mean, min, max, p50, p90 and p99 latencies in ms
+    """
+    timings_ms = np.array(timings) * 1000
+    return {'count': len(timings_ms), 'mean_ms': float(timings_ms.mean()), 'min_ms': float(timings_ms.min()),
+            'max_ms': float(timings_ms.max()), 'p50_ms': float(np.percentile(timings_ms, 50)),
+            'p90_ms': float(np.percentile(timings_ms, 90)), 'p99_ms': float(np.percentile(timings_ms, 99))}
+
+class StackProfiler():
+    def __init__(self):
+        """
+        Initialize the StackProfiler, which records the time spent in every call
+        stack, Python and builtin calls alike, for flamegraph.pl or speedscope
+
+        RETURNS(StackProfiler): The newly constructed object
+        """
+        self._stack = []
+        self._stacks = {}
+        self._last = None
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter()
+        if self._stack:
+            key = ';'.join(self._stack)
+            self._stacks[key] = self._stacks.get(key, 0.0) + now - self._last
+        if event == 'call':
+            code = frame.f_code
+            self._stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        elif event == 'c_call':
+            self._stack.append(f"{getattr(arg, '__module__', None) or 'builtins'}:{getattr(arg, '__qualname__', arg)}")
+        elif self._stack:
+            # Returns from the frame which started profiling have no call to pop
+            self._stack.pop()
+        self._last = time.perf_counter()
+
+    def enable(self):
+        self._last = time.perf_counter()
+        sys.setprofile(self._callback)
+
+    def disable(self):
+        sys.setprofile(None)
+
+    def dump_stats(self, file_path):
+        """
+        Writes the collapsed stacks, one 'frame;frame;frame microseconds' line each
+
+        file_path(str): The file to write to
+        """
+        with open(file_path, 'w') as file:
+            for stack, seconds in sorted(self._stacks.items()):
+                microseconds = int(seconds * 1e6)
+                if microseconds:
+                    file.write(f'{stack} {microseconds}\n')
+
+@contextmanager
+def profile_run(file_path=None):
+    """
+    Profiles everything run inside the block, doing nothing if file_path is None.
+    A .collapsed or .folded file gets collapsed stacks for flamegraphs, any other
+    file a cProfile dump for pstats or snakeviz. Only this process is profiled.
+
+    file_path(str|None): The file to write the profile to
+    """
+    if file_path is None:
+        yield
+        return
+    profiler = StackProfiler() if file_path.endswith(('.collapsed', '.folded')) else cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        profiler.dump_stats(file_path)
@@ -2,26 +2,47 @@ from board import Board
 from spymaster import Spymaster
 from guesser import Guesser
 from clue_history import ClueHistory
+from engine import GameEngine
+from instrumentation import Stats, collect_stats
+import argparse
+import functools
 
 class GameLogic:
-    def __init__(self):
+    def __init__(self, embedding_model=None, client=None):
         """
         Initialize the GameLogic for Codenames gameplay
         
+        embedding_model(EmbeddingModel): the embedding model to share, a new one is made if None
+        client(ClueClient|None): a client of clue_service.py giving the clues and guesses
+        instead of a local embedding model
+
         RETURNS(GameLogic): The new constructed object
         """
-        self._board = Board()
+        self._client = client
+        # Timers and counters of setting up and playing this game
+        self._stats = Stats()
+        with collect_stats(self._stats):
+            if client is None:
+                self._board = Board(embedding_model)
+            else:
+                self._board = Board.from_keys(*client.get_game())
+        spymaster = Spymaster
+        guesser = Guesser
+        if client is not None:
+            from clue_service import RemoteGuesser, RemoteSpymaster
+            spymaster = functools.partial(RemoteSpymaster, client=client)
+            guesser = functools.partial(RemoteGuesser, client=client)
 
         # Red team
         self._red_clue_history = ClueHistory('red')
-        self._red_spymaster = Spymaster('red', self._board, self._red_clue_history)
-        self._red_guesser = Guesser('red', self._board, self._red_clue_history)
+        self._red_spymaster = spymaster('red', self._board, self._red_clue_history)
+        self._red_guesser = guesser('red', self._board, self._red_clue_history)
         self._red_turns = 0
 
         # Blue team
         self._blue_clue_history = ClueHistory('blue')
-        self._blue_spymaster = Spymaster('blue', self._board, self._blue_clue_history)
-        self._blue_guesser = Guesser('blue', self._board, self._blue_clue_history)
+        self._blue_spymaster = spymaster('blue', self._board, self._blue_clue_history)
+        self._blue_guesser = guesser('blue', self._board, self._blue_clue_history)
         self._blue_turns = 0
 
         self._scores = self._board.red_blue_left()
@@ -104,59 +125,46 @@ class GameLogic:
         """Prints the scores in nicer format"""
         print("Scores: [" + ', '.join([f"'{key}': {value}" for key, value in self._scores.items()]) + "]")
 
-    def _play_round(self, team):
+    def _render_event(self, event):
         """
-        Recursive function which contain the Codenames logic that
-        handles Guesser and Spymaster interactions of a single round.
-
-        team(str): The team which interacts with each other
+        Console renderer for the interactive game, prints a GameEvent from the engine
 
-        RETURNS(tuple): The flag whether assassin or team won and the number of turns taken
+        event(GameEvent): The event to print
         """
-        print(f"\n==========\n{team.upper()} TURN\n==========\n")
-        # Print board, score, and append turns
-        self._print_scores()
-        self._board.print_board()
-
-        # Add to how many turns they are on
-        self._add_team_turns(team)
-
-        # Start by giving a clue from spymaster and print it
-        clue, number = self._get_clue_and_number(team)
-        guesses_made = 0
-        print(f'{team.capitalize()}: {clue}, {number}')
-
-        # Guesser spymaster interaction
-        while True:
-            if guesses_made == number:
-                print("\n")
-                return self._play_round('blue' if team == 'red' else 'red')
-            user_input = input(">>> ").split()
-            if user_input[0] == "sg":
-                print(self._get_guesser(team).suggest_guess())
-            elif user_input[0] == "pch":
-                self._get_clue_history(team).print_team_clue_history()
-            elif user_input[0] == "guess" and len(user_input) > 1 and guesses_made < number:
-                guesser = self._get_guesser(team)
-                spymaster = self._get_spymaster(team)
-                guess = guesser.make_guess(user_input[1])
-                guesser.add_to_guessed_words(clue, guess)
-                reveal_tag = spymaster.reveal_word(guess)
-                round_flag = self._get_round_flag(reveal_tag, spymaster)
-                guesses_made += 1
-                # Check state of game
-                if round_flag == 0:
-                    continue
-                elif round_flag == 1:
-                    print("\n")
-                    return self._play_round('blue' if team == 'red' else 'red')
-                elif round_flag == 2 or round_flag == 3:
-                    # Game lost assassin or Game Win
-                    return self._end_game_commands()
-            elif user_input == "":
-                continue
+        team = event.team
+        enemy = 'blue' if team == 'red' else 'red'
+        if event.kind == 'start':
+            print(f"Board is set, {team} team starts")
+        elif event.kind == 'turn':
+            print(f"\n==========\n{team.upper()} TURN\n==========\n")
+            # Print board and score
+            self._print_scores()
+            self._board.print_board()
+            print("Generating clue...\n")
+        elif event.kind == 'clue':
+            print(f'{team.capitalize()}: {event.data["clue"]}, {event.data["number"]}')
+        elif event.kind == 'pass':
+            print(f"{team.capitalize()} has no clue to give and passes\n")
+        elif event.kind == 'reveal':
+            tag = event.data['tag']
+            if tag == team:
+                print(f"You have found your {team} word!")
+            elif tag == enemy:
+                print(f"You have found the enemy's {enemy} word")
+            elif tag == 'neutral':
+                print("You have found a neutral word")
+            elif tag == 'assassin':
+                print("You have found an assassin word")
             else:
-                print(f"Invalid {team} team input")
+                print("Word is not on board")
+        elif event.kind == 'result':
+            if event.data['flag'] == 3:
+                self._print_scores()
+                print(f"{team} has won!")
+            elif event.data['flag'] == 2:
+                print(f"{team} has lost!")
+            elif event.data['flag'] is None:
+                print("Neither team has a clue to give, the game is a draw")
 
     def _get_round_flag(self, reveal_word, spymaster):
         """
@@ -172,8 +180,6 @@ class GameLogic:
             scores = list(self._scores.values())
             # If last word guessed
             if 0 in scores:
-                self._print_scores()
-                print(f"{spymaster._team} has won!")
                 return 3
             else:
                 return 0
@@ -183,7 +189,6 @@ class GameLogic:
         elif reveal_word == 'neutral':
             return 1
         elif reveal_word == 'assassin':
-            print(f"{spymaster._team} has lost!")
             return 2
 
     def _end_game_commands(self):
@@ -213,7 +218,8 @@ class GameLogic:
             elif user_input[0] == "end":
                 break
             elif user_input[0] == "again":
-                game_logic = GameLogic()
+                # Reuse the loaded embedding model for the new game
+                game_logic = GameLogic(self._board._embedding_model, self._client)
                 game_logic.play_game()
             else:
                 print(f"Invalid input for end game")
@@ -235,100 +241,76 @@ class GameLogic:
         print("\n")
 
         # Blue team starts
-        self._play_round('blue')
+        engine = GameEngine(self, self._render_event)
+        engine.start('blue')
+        while not engine.is_over():
+            if engine.needs_clue():
+                engine.give_clue()
+                continue
+            team = engine.get_team()
+            if engine.turn_done():
+                print("\n")
+                engine.end_turn()
+                continue
+            user_input = input(">>> ").split()
+            if not user_input:
+                continue
+            elif user_input[0] == "sg":
+                print(self._get_guesser(team).suggest_guess())
+            elif user_input[0] == "pch":
+                self._get_clue_history(team).print_team_clue_history()
+            elif user_input[0] == "guess" and len(user_input) > 1:
+                if engine.guess(user_input[1]) == 1:
+                    print("\n")
+            else:
+                print(f"Invalid {team} team input")
+        # Game lost assassin or Game Win
+        self._end_game_commands()
 
-    def automate_game(self, team):
+    def automate_game(self, team, sink=None):
         """
         Automates a single Codename gameplay where the spymaster 
-        and guesser autonomously interacts
+        and guesser autonomously interacts. Runs headless unless
+        a sink is given for the game events.
         
-        team(str): The current team in play
+        team(str): The team which plays first
+        sink(callable|None): Called with every GameEvent of the game
         
-        RETURNS(Tuple/automate_game()): Either calls itself recursively or 
-        a tuple containing:
+        RETURNS(GameResult): a tuple containing:
         - team
         - round flag
         - # of team turns
         - team clue intended words
         - team guessed words
+        with the game's timers and counters as its stats attribute
         """
-        print(f"\n==========\n{team.upper()} TURN\n==========\n")
-        # Start by giving clue
-        clue, number = self._get_clue_and_number(team)
-        # Add to how many turns they are on
-        self._add_team_turns(team)
-        guesses_made = 0
-
-        # Start playing by itself
-        while(True):
-            # Check if number of guesses made equals the intended clue number
-            if guesses_made == number:
-                return self.automate_game('blue' if team == 'red' else 'red')
-
-            print("Suggesting clues")
-            # Guesser automates guessed words
-            suggested_clues = self._get_guesser(team).suggest_guess()
-            guesser = self._get_guesser(team)
-            spymaster = self._get_spymaster(team)
+        return GameEngine(self, sink).run(team)
 
-             # Input all the guess clue suggested
-            for word in suggested_clues:
-                guess = guesser.make_guess(word)
-                guesser.add_to_guessed_words(clue, guess)
-                reveal_tag = spymaster.reveal_word(guess)
-                round_flag = self._get_round_flag(reveal_tag, spymaster)
-                guesses_made += 1
-                if round_flag == 0:
-                    continue
-                elif round_flag == 1:
-                    print("\n")
-                    return self.automate_game('blue' if team == 'red' else 'red')
-                elif round_flag == 2 or round_flag == 3:
-                    # Game lost assassin
-                    team_clue_history = self._get_clue_history(team)
-                    team_guesser = self._get_guesser(team)
-                    return team, round_flag, self._get_team_turns(team), team_clue_history.get_clue_intended_words(), team_guesser.get_guessed_words()
-
-    def automate_single_guess_round(self, team):
+    def automate_single_guess_round(self, team, sink=None):
         """
         Automates a single Codename guessing round where the spymaster 
         and guesser autonomously interacts.
         
         team(str): The current team in play
+        sink(callable|None): Called with every GameEvent of the round
         
-        RETURNS(Tuple): Either calls itself recursively or 
-        a tuple containing:
+        RETURNS(GameResult|None): None if fewer words were suggested than intended, or
+        a tuple with the round's stats attribute containing:
         - team
         - round flag
         - # of team turns
         - team clue intended words
         - team guessed words
         """
-        print(f"\n==========\n{team.upper()} TURN\n==========\n")
-        # Start by giving clue
-        clue, number = self._get_clue_and_number(team)
-        # Add to how many turns they are on
-        self._add_team_turns(team)
-        guesses_made = 0
-
-        print("Suggesting clues")
-        # Guesser automates guessed words
-        suggested_clues = self._get_guesser(team).suggest_guess()
-        guesser = self._get_guesser(team)
-        spymaster = self._get_spymaster(team)
-
-        # Input all the guess clue suggested
-        for word in suggested_clues:
-            guess = guesser.make_guess(word)
-            guesser.add_to_guessed_words(clue, guess)
-            reveal_tag = spymaster.reveal_word(guess)
-            round_flag = self._get_round_flag(reveal_tag, spymaster)
-            guesses_made += 1
-            team_clue_history = self._get_clue_history(team)
-            team_guesser = self._get_guesser(team)
-            if guesses_made == number:
-                return team, round_flag, self._get_team_turns(team), team_clue_history.get_clue_intended_words(), team_guesser.get_guessed_words()
+        return GameEngine(self, sink).run_single_round(team)
 
 if __name__ == "__main__":
-    game_logic = GameLogic()
+    parser = argparse.ArgumentParser(description="Play Codenames")
+    parser.add_argument('--service', help="Play against clue_service.py at host:port or unix:path instead of loading the model")
+    args = parser.parse_args()
+    client = None
+    if args.service:
+        from clue_service import ClueClient
+        client = ClueClient(args.service)
+    game_logic = GameLogic(client=client)
     game_logic.play_game()
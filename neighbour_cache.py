@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from instrumentation import count
+import os
+import sqlite3
+
+# Neighbour caches already opened by this process, keyed by search id
+_neighbour_caches = {}
+
+def get_search_id(embedding_model):
+    """
+    Identifies the neighbour search of a model, everything its answers depend on
+
+    embedding_model(EmbeddingModel): The model which searches for neighbours
+    RETURNS(str): The model fingerprint, plus the probed lists when searching the
+    approximate index and the senses searched for sense2vec
+    """
+    parts = [embedding_model.fingerprint()]
+    if embedding_model._ann_index is not None:
+        parts.append(f'ann{embedding_model._ann_index.get_nprobe()}')
+    senses = embedding_model._config['hyperparameters'].get('clue_senses')
+    if embedding_model._embedding == 'sense2vec' and senses:
+        parts.append('+'.join(sorted(senses)))
+    return '_'.join(parts)
+
+class NeighbourCache():
+    def __init__(self, search_id, max_size=1024, file_path=None):
+        """
+        Initialize the NeighbourCache, which memoizes the most similar keys of words.
+        Recently used answers are kept in memory and the least recently used is
+        evicted past max_size. Answers can also be kept in an SQLite file shared by
+        every run and process. A cached answer serves any smaller topn by slicing.
+
+        search_id(str): Identifies the search the answers come from, see get_search_id
+        max_size(int): The number of words kept in memory
+        file_path(str|None): The SQLite file to share answers through, memory only if None
+
+        RETURNS(NeighbourCache): The newly constructed object
+        """
+        self._search_id = search_id
+        self._max_size = max_size
+        self._file_path = file_path
+        self._entries = OrderedDict()
+        self._connection = None
+        self._pid = None
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, word, topn, search):
+        """
+        Get the top n most similar keys of a word, searching only on a cache miss
+
+        word(str): The word to find the most similar keys of
+        topn(int): the number of top similar keys to retrieve
+        search(callable): Called with word and topn on a miss, returns the keys
+
+        RETURNS(list): The most similar keys in order of similarity
+        """
+        entry = self._entries.get(word)
+        if entry is not None and entry[0] >= topn:
+            self._entries.move_to_end(word)
+            self._hits += 1
+            count('neighbour_cache.hits')
+            return entry[1][:topn]
+        entry = self._load(word)
+        if entry is not None and entry[0] >= topn:
+            self._disk_hits += 1
+            count('neighbour_cache.disk_hits')
+        else:
+            self._misses += 1
+            count('neighbour_cache.misses')
+            entry = (topn, list(search(word, topn)))
+            self._store(word, entry)
+        self._put(word, entry)
+        return entry[1][:topn]
+
+    def get_stats(self):
+        """
+        Get the hit and miss counters of the cache
+
+        RETURNS(dict): The memory hits, disk hits, misses, evictions and words in memory
+        """
+        return {'hits': self._hits, 'disk_hits': self._disk_hits, 'misses': self._misses,
+                'evictions': self._evictions, 'size': len(self._entries)}
+
+    def _put(self, word, entry):
+        self._entries[word] = entry
+        self._entries.move_to_end(word)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _get_connection(self):
+        if self._file_path is None:
+            return None
+        # Connections are not shared with forked worker processes
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self._file_path) or '.', exist_ok=True)
+            self._connection = sqlite3.connect(self._file_path, timeout=30)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS neighbours (search_id TEXT, word TEXT, topn INTEGER, '
+                                     'keys TEXT, PRIMARY KEY (search_id, word))')
+            self._pid = os.getpid()
+        return self._connection
+
+    def _load(self, word):
+        connection = self._get_connection()
+        if connection is None:
+            return None
+        row = connection.execute('SELECT topn, keys FROM neighbours WHERE search_id = ? AND word = ?',
+                                 (self._search_id, word)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1].split('\n') if row[1] else []
+
+    def _store(self, word, entry):
+        connection = self._get_connection()
+        if connection is None:
+            return
+        try:
+            connection.execute('INSERT OR REPLACE INTO neighbours VALUES (?, ?, ?, ?)',
+                               (self._search_id, word, entry[0], '\n'.join(entry[1])))
+            connection.commit()
+        except sqlite3.Error:
+            # The shared file is only a cache, a busy or read-only file is skipped
+            pass
+
+def load_neighbour_cache(embedding_model):
+    """
+    Opens the neighbour cache of a model, shared by every EmbeddingModel of the process
+
+    embedding_model(EmbeddingModel): The model which searches for neighbours
+    RETURNS(NeighbourCache): The neighbour cache
+    """
+    search_id = get_search_id(embedding_model)
+    if search_id not in _neighbour_caches:
+        config = embedding_model._config
+        max_size = config['parameters'].get('neighbour_cache_size', 1024)
+        file_path = config['model_paths'].get('neighbour_cache', {}).get('file_path')
+        _neighbour_caches[search_id] = NeighbourCache(search_id, max_size, file_path)
+    return _neighbour_caches[search_id]
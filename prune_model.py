@@ -0,0 +1,148 @@
+from clue_index import PACK_INDEX_FILE, build_clue_index
+from embedding_model import EmbeddingModel, load_config
+from experiments import derive_seed
+from main import GameLogic
+from similarity_table import PACK_TABLE_DIR
+from sweep import play_point
+from vector_store import write_vector_store
+from word_pack import load_word_pack
+import argparse
+import contextlib
+import copy
+import os
+import random
+import time
+import numpy as np
+
+def get_pruned_rows(embedding_model, clue_index):
+    """
+    Get the rows a game can touch: the codename words, the marker replacing
+    revealed words and every clue in the clue index
+
+    embedding_model(EmbeddingModel): The full model
+    clue_index(ClueIndex): The index of the codename words' clues, as deep as the pruned model serves
+
+    RETURNS(np.ndarray): The distinct int64 rows of the full model, sorted
+    """
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    word_pack = load_word_pack(embedding_model, wordlist_path)
+    rows = np.concatenate([word_pack.get_rows(word_pack.get_keys()), embedding_model.get_indices(["------"]),
+                           clue_index.get_indexed_rows()])
+    return np.unique(rows[rows >= 0])
+
+def export_pruned_model(embedding_model, dir_path, depth):
+    """
+    Writes a pruned model, a vector store of the codename words and the union of
+    their admissible clues among the depth most similar keys. Rows keep the full
+    model's order and vectors are copied unchanged. The model carries a clue index
+    with the full model's ranks, and the rows of its similarity table if it has
+    one, so any topn up to depth gives the clues the full model gives.
+
+    embedding_model(EmbeddingModel): The full model
+    dir_path(str): The directory to write the pruned model to
+    depth(int): The deepest topn the pruned model serves
+
+    RETURNS(list): The keys of the pruned model
+    """
+    clue_index = build_clue_index(embedding_model, depth)
+    rows = get_pruned_rows(embedding_model, clue_index)
+    keys = embedding_model.get_keys()
+    pruned_keys = [keys[row] for row in rows]
+    freqs = None
+    senses = ()
+    if embedding_model._embedding == 'sense2vec':
+        # get_best_sense needs the frequencies, kept for every key
+        model = embedding_model.get_model()
+        freqs = [model.get_freq(key, 0) for key in pruned_keys]
+        senses = model.senses
+    write_vector_store(dir_path, pruned_keys, embedding_model.get_row_vectors(rows), freqs, senses, normalize=False)
+    row_map = np.full(len(keys), -1, dtype=np.int64)
+    row_map[rows] = np.arange(len(rows))
+    clue_index.remap_rows(row_map).save(os.path.join(dir_path, PACK_INDEX_FILE))
+    if embedding_model._similarity_table is not None:
+        embedding_model._similarity_table.save_subset(os.path.join(dir_path, PACK_TABLE_DIR), pruned_keys)
+    return pruned_keys
+
+def get_pruned_config(config, embedding_model, dir_path):
+    """
+    Point a config at a pruned model, opened by the memmap backend for word2vec
+    keys and the sense2vec backend for sense2vec keys
+
+    config(dict): The parsed config.yaml
+    embedding_model(EmbeddingModel): The full model the pruned model was exported from
+    dir_path(str): The pruned model
+
+    RETURNS(dict): A copy of the config using the pruned model
+    """
+    config = copy.deepcopy(config)
+    backend = 'sense2vec' if embedding_model._embedding == 'sense2vec' else 'memmap'
+    config['parameters']['embedding_model'] = backend
+    # The vectors are stored as the full model gave them, in full precision
+    config['parameters']['vector_dtype'] = 'float32'
+    config['model_paths'][f'{backend}_model'] = {'file_path': dir_path}
+    return config
+
+def get_size_mb(dir_path):
+    """
+    Get the size of every file under a directory
+
+    dir_path(str): The directory
+    RETURNS(float): The size in MB
+    """
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(dir_path) for name in names) / 2 ** 20
+
+def verify_pruned_model(embedding_model, pruned_model, game_seeds):
+    """
+    Compares the pruned model against the full model on the same seeded boards,
+    the first clue of every board and every clue and guess of whole games
+
+    embedding_model(EmbeddingModel): The full model
+    pruned_model(EmbeddingModel): The pruned model
+    game_seeds(list): The seed of each board, the same seed deals the same board
+
+    RETURNS(dict): The number of boards, the share of boards given the same first
+    clue and number, and the share of games played exactly the same
+    """
+    same_clues = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for game_seed in game_seeds:
+            clues = []
+            for model in (embedding_model, pruned_model):
+                random.seed(game_seed)
+                clues.append(GameLogic(model)._get_spymaster('blue').show_clue_and_number())
+            same_clues += clues[0] == clues[1]
+    full_results = play_point(embedding_model, game_seeds)
+    pruned_results = play_point(pruned_model, game_seeds)
+    same_games = sum(result == expected for result, expected in zip(pruned_results, full_results))
+    return {'boards': len(game_seeds), 'same_clues': same_clues / len(game_seeds),
+            'same_games': same_games / len(game_seeds)}
+
+if __name__ == "__main__":
+    config = load_config('config.yaml')
+    parser = argparse.ArgumentParser(description="Export a pruned model holding only the vectors a game can use")
+    parser.add_argument('output', help="Directory to write the pruned model to")
+    parser.add_argument('--depth', type=int, default=config['hyperparameters']['topn'],
+                        help="Most similar keys searched per codename word, the deepest topn the pruned model serves")
+    parser.add_argument('--boards', type=int, default=20, help="Seeded boards to verify the pruned model on, 0 to skip")
+    parser.add_argument('--seed', type=int, default=config['experiment_params'].get('seed', 50), help="Random seed of the boards")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    embedding_model = EmbeddingModel(config)
+    full_load = time.perf_counter() - start
+    print(f"Exporting {len(embedding_model.get_keys())} keys of {embedding_model._file_path} to {args.output}...")
+    pruned_keys = export_pruned_model(embedding_model, args.output, args.depth)
+    print(f"Kept {len(pruned_keys)} keys, {get_size_mb(args.output):.1f} MB")
+
+    pruned_config = get_pruned_config(config, embedding_model, args.output)
+    start = time.perf_counter()
+    pruned_model = EmbeddingModel(pruned_config)
+    pruned_load = time.perf_counter() - start
+    print(f"Load: full model {full_load * 1000:.1f} ms, pruned model {pruned_load * 1000:.1f} ms")
+    if args.boards:
+        game_seeds = [derive_seed(args.seed, 'prune', i) for i in range(args.boards)]
+        verification = verify_pruned_model(embedding_model, pruned_model, game_seeds)
+        print(f"Same first clue on {verification['same_clues']:.1%} and same game on {verification['same_games']:.1%} "
+              f"of {verification['boards']} boards")
+    backend = pruned_config['parameters']['embedding_model']
+    print(f"Play with it by setting embedding_model: {backend} and {backend}_model: file_path: {args.output} in config.yaml")
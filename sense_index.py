@@ -0,0 +1,217 @@
+import os
+import re
+import numpy as np
+from vector_store import MemmapVectors, dequantize, dot
+from vocab import split_key
+
+# Sense indexes already opened by this process, keyed by path
+_sense_indexes = {}
+
+def get_sense_index_path(embedding_model):
+    """
+    Get where the sense index of a model is kept, next to the model
+
+    embedding_model(EmbeddingModel): The model the index is built from
+    RETURNS(str): The path to the .npz sense index file
+    """
+    base = os.path.splitext(embedding_model._file_path.rstrip('/\\'))[0]
+    return f'{base}_senses_{embedding_model.fingerprint()}.npz'
+
+def normalize_text(word):
+    # Keys join the words of a phrase with underscores, as Sense2Vec.make_key does
+    return re.sub(r"\s", "_", word)
+
+class SenseIndex():
+    def __init__(self, vectors, sense_names, row_senses, best_words, best_rows, scales=None):
+        """
+        Initialize the SenseIndex, the senses of a Sense2Vec model resolved once
+        for every key, next to a contiguous unit-normalised matrix of its vectors
+
+        vectors(np.ndarray): The (keys, dim) unit-normalised vectors in key order,
+        float32 or the compact rows of a quantized vector store
+        sense_names(list): The senses of the model
+        row_senses(np.ndarray): The position in sense_names of the sense of every row,
+        -1 for senses the model does not list
+        best_words(list): The lower case words which have a best sense
+        best_rows(np.ndarray): The row of the best sense key of each word
+        scales(np.ndarray|None): The scale of each row of int8 vectors
+
+        RETURNS(SenseIndex): The newly constructed object
+        """
+        self.vectors = vectors
+        self.scales = scales
+        self._sense_names = list(sense_names)
+        self._row_senses = np.asarray(row_senses, dtype=np.int16)
+        self._best_words = list(best_words)
+        self._best_rows = np.asarray(best_rows, dtype=np.int64)
+        self._word_to_best_row = dict(zip(self._best_words, self._best_rows.tolist()))
+        # Rows and vectors of each sense subset, and the mask of its rows, gathered on first use
+        self._subsets = {}
+        self._masks = {}
+
+    def get_rows(self, rows):
+        """
+        Get rows of the matrix as float32
+
+        rows(np.ndarray): The rows to read
+        RETURNS(np.ndarray): The (len(rows), dim) unit-normalised float32 vectors
+        """
+        return dequantize(self.vectors[rows], None if self.scales is None else self.scales[rows])
+
+    def get_best_sense_row(self, word):
+        """
+        Find the row of the most frequent sense of a word, matching it in lower case,
+        upper case and title case as Sense2Vec.get_best_sense does
+
+        word(str): The word to check
+        RETURNS(int|None): The row of the best sense key, -1 if the word has no key,
+        None if the word is in mixed case, which the index does not cover
+        """
+        text = normalize_text(word)
+        lower_word = text.lower()
+        if text not in (lower_word, lower_word.upper(), lower_word.title()):
+            return None
+        return self._word_to_best_row.get(lower_word, -1)
+
+    def get_subset(self, senses=None):
+        """
+        Get the rows of the keys with the given senses and their vectors, copied to a
+        contiguous matrix once so searches limited to those senses scan only them
+
+        senses(list|None): The senses to keep, every row if None
+        RETURNS(Tuple): The int64 rows, their (rows, dim) vectors and their scales
+        """
+        if not senses:
+            return None, self.vectors, self.scales
+        senses = tuple(sorted(senses))
+        if senses not in self._subsets:
+            sense_ids = [self._sense_names.index(sense) for sense in senses if sense in self._sense_names]
+            rows = np.flatnonzero(np.isin(self._row_senses, sense_ids))
+            scales = None if self.scales is None else np.asarray(self.scales[rows])
+            self._subsets[senses] = (rows, np.ascontiguousarray(self.vectors[rows]), scales)
+        return self._subsets[senses]
+
+    def get_mask(self, senses=None):
+        """
+        Get which rows have the given senses, for searches which cannot scan a subset
+
+        senses(list|None): The senses to keep, every row if None
+        RETURNS(np.ndarray|None): A boolean mask over the rows, None to keep every row
+        """
+        if not senses:
+            return None
+        senses = tuple(sorted(senses))
+        if senses not in self._masks:
+            mask = np.zeros(len(self._row_senses), dtype=bool)
+            mask[self.get_subset(senses)[0]] = True
+            self._masks[senses] = mask
+        return self._masks[senses]
+
+    def search(self, query_row, topn, senses=None):
+        """
+        Retrieves the top n most similar rows to a row by brute force cosine similarity
+
+        query_row(int): The row to find the most similar rows of
+        topn(int): the number of top similar rows to retrieve
+        senses(list|None): Only search the keys with these senses, every key if None
+
+        RETURNS(np.ndarray): The most similar rows in order of similarity, excluding the query row
+        """
+        rows, vectors, scales = self.get_subset(senses)
+        scores = dot(vectors, self.get_rows([query_row])[0], scales)
+        # Always ask for one more because the query row is its own best match
+        count = min(len(scores), topn + 1)
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        if rows is not None:
+            best = rows[best]
+        return best[best != query_row][:topn]
+
+    def save(self, file_path):
+        np.savez(file_path, sense_names=np.array(self._sense_names), row_senses=self._row_senses,
+                 best_words=np.array(self._best_words), best_rows=self._best_rows)
+
+    @classmethod
+    def load(cls, file_path, vectors, scales=None):
+        data = np.load(file_path)
+        return cls(vectors, data['sense_names'].tolist(), data['row_senses'], data['best_words'].tolist(), data['best_rows'], scales)
+
+def get_normalized_vectors(sense2vec_model, keys, chunk_size=100000):
+    """
+    Gathers the vectors of a Sense2Vec model, stored in hash order, into a
+    contiguous unit-normalised matrix in key order. A vector store written by
+    convert_model.py is already one, so it is used as it is, compact or not.
+
+    sense2vec_model(Sense2Vec|MemmapVectors): The loaded model
+    keys(list): Every key of the model in iteration order
+    chunk_size(int): The number of rows normalised at a time
+
+    RETURNS(np.ndarray): The (len(keys), dim) float32 matrix
+    """
+    if isinstance(sense2vec_model, MemmapVectors):
+        return sense2vec_model.vectors
+    table_rows = np.asarray(sense2vec_model.vectors.find(keys=keys))
+    data = sense2vec_model.vectors.data
+    vectors = np.empty((len(keys), data.shape[1]), dtype=np.float32)
+    for start in range(0, len(keys), chunk_size):
+        chunk = np.asarray(data[table_rows[start:start + chunk_size]], dtype=np.float32)
+        norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+        vectors[start:start + chunk_size] = chunk / np.where(norms == 0, 1, norms)
+    return vectors
+
+def build_sense_index(sense2vec_model, keys, vectors, scales=None):
+    """
+    Resolves the sense of every key and the best sense of every word in a single
+    pass over the keys. The best sense is the most frequent key among the lower,
+    upper and title case versions of a word in one of the model's senses, with
+    ties going to the greater key, as in Sense2Vec.get_best_sense.
+
+    sense2vec_model(Sense2Vec|MemmapVectors): The loaded model
+    keys(list): Every key of the model in iteration order
+    vectors(np.ndarray): The matrix from get_normalized_vectors
+    scales(np.ndarray|None): The scale of each row of int8 vectors
+
+    RETURNS(SenseIndex): The built index
+    """
+    sense_names = list(sense2vec_model.senses)
+    sense_ids = {sense: i for i, sense in enumerate(sense_names)}
+    row_senses = np.full(len(keys), -1, dtype=np.int16)
+    best = {}
+    for row, key in enumerate(keys):
+        word, sense = split_key(key)
+        if sense not in sense_ids:
+            continue
+        row_senses[row] = sense_ids[sense]
+        lower_word = word.lower()
+        if word not in (lower_word, lower_word.upper(), lower_word.title()):
+            continue
+        candidate = (sense2vec_model.get_freq(key, -1), key, row)
+        if lower_word not in best or candidate[:2] > best[lower_word][:2]:
+            best[lower_word] = candidate
+    best_words = list(best)
+    best_rows = [best[word][2] for word in best_words]
+    return SenseIndex(vectors, sense_names, row_senses, best_words, best_rows, scales)
+
+def load_sense_index(embedding_model):
+    """
+    Loads the sense index of a Sense2Vec model. The senses are resolved once,
+    then reused from memory within a process and from a file next to the model
+    across runs. The normalised matrix is rebuilt on load unless the model is a
+    memory-mapped vector store.
+
+    embedding_model(EmbeddingModel): The model the index is built from
+    RETURNS(SenseIndex): The sense index
+    """
+    file_path = get_sense_index_path(embedding_model)
+    if file_path not in _sense_indexes:
+        sense2vec_model = embedding_model.get_model()
+        keys = embedding_model.get_keys()
+        vectors = get_normalized_vectors(sense2vec_model, keys)
+        scales = getattr(sense2vec_model, 'scales', None)
+        if os.path.isfile(file_path):
+            _sense_indexes[file_path] = SenseIndex.load(file_path, vectors, scales)
+        else:
+            sense_index = build_sense_index(sense2vec_model, keys, vectors, scales)
+            sense_index.save(file_path)
+            _sense_indexes[file_path] = sense_index
+    return _sense_indexes[file_path]
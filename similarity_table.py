@@ -0,0 +1,141 @@
+from word_pack import get_cache_dir, get_pack_id, load_word_pack
+import os
+import numpy as np
+
+SIMILARITIES_FILE = 'similarities.npy'
+CANDIDATES_FILE = 'candidates.txt'
+COLUMNS_FILE = 'columns.txt'
+# The similarity table shipped inside a pruned model, see prune_model.py
+PACK_TABLE_DIR = 'similarity_table'
+
+# Similarity tables already opened by this process, keyed by path
+_similarity_tables = {}
+
+def get_table_path(embedding_model):
+    """
+    Get where the similarity table for a model and the configured word list is kept
+
+    embedding_model(EmbeddingModel): The model the table is built from
+    RETURNS(str): The path to the similarity table directory
+    """
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    pack_id = get_pack_id(embedding_model, wordlist_path)
+    return os.path.join(get_cache_dir(embedding_model._config), f'similarity_table_{pack_id[0]}_{pack_id[1]}')
+
+class SimilarityTable():
+    def __init__(self, dir_path):
+        """
+        Opens a precomputed table of similarities between every admissible clue
+        candidate (rows) and every codename word (columns), stored as float16 and
+        memory-mapped so lookups only read the rows they need.
+
+        dir_path(str): The directory written by build_similarity_table
+
+        RETURNS(SimilarityTable): The newly constructed object
+        """
+        self._similarities = np.load(os.path.join(dir_path, SIMILARITIES_FILE), mmap_mode='r')
+        with open(os.path.join(dir_path, CANDIDATES_FILE), 'r', encoding='utf-8') as file:
+            self._candidate_to_row = {key: row for row, key in enumerate(file.read().split('\n'))}
+        with open(os.path.join(dir_path, COLUMNS_FILE), 'r', encoding='utf-8') as file:
+            self._word_to_column = {key: column for column, key in enumerate(file.read().split('\n'))}
+
+    def get_rows(self, candidates):
+        """
+        Get the table row of each candidate clue
+
+        candidates(list): The candidate clues to look up
+        RETURNS(np.ndarray): The int64 rows, -1 for candidates not in the table
+        """
+        return np.array([self._candidate_to_row.get(key, -1) for key in candidates], dtype=np.int64)
+
+    def get_columns(self, words):
+        """
+        Get the table column of each codename word
+
+        words(list): The codename words to look up
+        RETURNS(np.ndarray): The int64 columns, -1 for words not in the table
+        """
+        return np.array([self._word_to_column.get(key, -1) for key in words], dtype=np.int64)
+
+    def lookup(self, rows, columns):
+        """
+        Slice the similarities of the given rows and columns
+
+        rows(np.ndarray): Rows returned by get_rows, all in the table
+        columns(np.ndarray): Columns returned by get_columns, all in the table
+        RETURNS(np.ndarray): The (len(rows), len(columns)) float32 similarities
+        """
+        return self._similarities[np.ix_(rows, columns)].astype(np.float32)
+
+    def save_subset(self, dir_path, candidates):
+        """
+        Writes the rows of some candidates, and every column, as a new table
+
+        dir_path(str): The directory to write the table to
+        candidates(list): The candidates to keep, those not in the table are skipped
+        """
+        candidates = [key for key in candidates if key in self._candidate_to_row]
+        os.makedirs(dir_path, exist_ok=True)
+        np.save(os.path.join(dir_path, SIMILARITIES_FILE), self._similarities[self.get_rows(candidates)])
+        with open(os.path.join(dir_path, CANDIDATES_FILE), 'w', encoding='utf-8') as file:
+            file.write('\n'.join(candidates))
+        with open(os.path.join(dir_path, COLUMNS_FILE), 'w', encoding='utf-8') as file:
+            file.write('\n'.join(self._word_to_column))
+
+def build_similarity_table(embedding_model, topn, dir_path, chunk_size=20000):
+    """
+    Builds the similarity table offline. The candidates are the admissible clues
+    among the topn most similar words of every codename word, so any clue the
+    spymaster can give with that topn or less has a row.
+
+    embedding_model(EmbeddingModel): The model to compute the similarities with
+    topn(int): The number of most similar words searched per codename word
+    dir_path(str): The directory to write the table to
+    chunk_size(int): The number of candidate rows computed at a time
+    """
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    words = load_word_pack(embedding_model, wordlist_path).get_keys()
+    candidates = {}
+    for word in words:
+        candidates.update(dict.fromkeys(embedding_model.clue_candidates(word, topn)))
+    candidates = list(candidates)
+    word_vectors = embedding_model.get_vectors(words)
+    os.makedirs(dir_path, exist_ok=True)
+    out = np.lib.format.open_memmap(os.path.join(dir_path, SIMILARITIES_FILE), mode='w+',
+                                    dtype=np.float16, shape=(len(candidates), len(words)))
+    for start in range(0, len(candidates), chunk_size):
+        chunk = embedding_model.get_vectors(candidates[start:start + chunk_size])
+        out[start:start + chunk_size] = chunk @ word_vectors.T
+    out.flush()
+    del out
+    with open(os.path.join(dir_path, CANDIDATES_FILE), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(candidates))
+    with open(os.path.join(dir_path, COLUMNS_FILE), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(words))
+
+def load_similarity_table(embedding_model):
+    """
+    Opens the similarity table for a model if it has been built, or the one a
+    pruned model carries
+
+    embedding_model(EmbeddingModel): The model the table was built from
+    RETURNS(SimilarityTable|None): The table, None if it has not been built
+    """
+    dir_path = os.path.join(embedding_model._file_path, PACK_TABLE_DIR)
+    if not os.path.isfile(os.path.join(dir_path, SIMILARITIES_FILE)):
+        dir_path = get_table_path(embedding_model)
+    if dir_path not in _similarity_tables:
+        if not os.path.isfile(os.path.join(dir_path, SIMILARITIES_FILE)):
+            return None
+        _similarity_tables[dir_path] = SimilarityTable(dir_path)
+    return _similarity_tables[dir_path]
+
+if __name__ == "__main__":
+    from embedding_model import EmbeddingModel
+    # Builds the table for the model and topn in config.yaml
+    embedding_model = EmbeddingModel()
+    topn = embedding_model._config['hyperparameters']['topn']
+    dir_path = get_table_path(embedding_model)
+    print(f"Building similarity table in {dir_path}...")
+    build_similarity_table(embedding_model, topn, dir_path)
+    print("Done")
@@ -1,4 +1,16 @@
-import re
+from board import TAGS
+from instrumentation import count, timed, timer
+import itertools
+import time
+import numpy as np
+
+# Candidates whose rollouts are simulated at once, and the budget checked between
+ROLLOUT_CHUNK = 8
+# Candidates scored at once under a clue deadline, and the deadline checked between
+DEADLINE_CHUNK = 1024
+# The outcome of a rollout is the team words it reveals less these penalties
+ENEMY_PENALTY = 1.0
+ASSASSIN_PENALTY = 9.0
 
 class Spymaster():
     def __init__(self, team, board, clue_history):
@@ -15,82 +27,325 @@ class Spymaster():
         self._clue_history = clue_history
         self._team = 'red' if team == 'red' else 'blue'
         self._enemy = 'blue' if team == 'red' else 'red'
+        # State kept across turns: admissible neighbours of each team word, and the
+        # similarity of each candidate to every board word and the revealed marker
+        self._word_candidates = {}
+        self._candidate_rows = {}
+        self._similarities = None
+        self._columns = None
+        self._weights = None
+        self._scores = None
+        # Noise of simulated guessers, seeded so games stay reproducible
+        self._rng = np.random.default_rng(board._config['hyperparameters'].get('rollout_seed', 0))
+        # The share of the candidates scored for each clue given
+        self._coverage = []
 
     def show_clue_and_number(self):
         """ 
         Check which algorithm and embedding model to use to generate clue and number
 
-        RETURNS(Tuple): A tuple containing the best clue (str) and intended number (int)
+        RETURNS(Tuple|None): A tuple containing the best clue (str) and intended number (int),
+        None if there is no candidate clue left to give
         """
-        print("Generating clue...\n")
-
         embedding_model = self._board._embedding_model
         return self._heuristic_algorithm(embedding_model)
 
+    def get_coverage(self):
+        """
+        Get how much of the candidate pool was scored for each clue, below 1 only
+        when clue_deadline_ms ran out
+
+        RETURNS(list): The share of the candidates scored, per clue in order
+        """
+        return self._coverage
+
+    @timed('spymaster.heuristic_algorithm')
     def _heuristic_algorithm(self, embedding_model):
-        team_words = self._board.get_tag_words().get(self._team)
-        bad_words = self._board.get_tag_words().get(self._enemy) + self._board.get_tag_words().get('neutral') + self._board.get_tag_words().get('assassin')
+        deadline_ms = self._board._config['hyperparameters'].get('clue_deadline_ms')
+        deadline = time.perf_counter() + deadline_ms / 1000 if deadline_ms is not None else None
+        team_words, bad_words = self._get_team_and_bad_words()
+        with timer('spymaster.update_state'):
+            self._update_state(team_words + bad_words, embedding_model)
+        with timer('spymaster.clue_candidates'):
+            candidates = self._get_clue_candidates(team_words, embedding_model)
+        count('spymaster.candidates', len(candidates))
+
+        # Heuristic decision algorithm
+        with timer('spymaster.score_clues'):
+            best_clue = self._best_scoring_clue(candidates, embedding_model, deadline, team_words)
+        return self._give_clue(team_words, best_clue, embedding_model)
+
+    def _get_team_and_bad_words(self, tag_words=None):
+        """
+        Get the words the clue should and should not point to, revealed words included
+
+        tag_words(dict|None): The tagged words to split, the current board if None
+
+        RETURNS(Tuple): The team words and the enemy, neutral and assassin words
+        """
+        if tag_words is None:
+            tag_words = self._board.get_tag_words()
+        team_words = tag_words.get(self._team)
+        bad_words = tag_words.get(self._enemy) + tag_words.get('neutral') + tag_words.get('assassin')
+        return team_words, bad_words
+
+    def _update_state(self, board_words, embedding_model):
+        """
+        Brings the scores kept from earlier turns up to date with the board. A word
+        revealed since then is scored as the "------" marker which replaced it, so
+        its column's contribution moves to the marker column instead of every
+        similarity being computed again.
+
+        board_words(list): The current team words followed by the bad words
+        embedding_model: The word embedding model used for similarity calculations
+        """
+        if self._columns is None:
+            # Columns are the starting board words and the revealed marker last
+            team_words, bad_words = self._get_team_and_bad_words(self._board.get_starting_tag_words())
+            self._columns = team_words + bad_words + ["------"]
+            self._weights = np.array([1.0] * len(team_words) + [-1.0] * len(bad_words) + [0.0], dtype=np.float32)
+            self._similarities = np.zeros((0, len(self._columns)), dtype=np.float32)
+            self._scores = np.zeros(0, dtype=np.float32)
+        marker = len(self._columns) - 1
+        for column, word in enumerate(board_words):
+            if word == "------" and self._weights[column] != 0:
+                weight = self._weights[column]
+                self._scores += weight * (self._similarities[:, marker] - self._similarities[:, column])
+                self._weights[marker] += weight
+                self._weights[column] = 0
+
+    def _get_clue_candidates(self, team_words, embedding_model):
+        """
+        Collects the most similar words to the unrevealed team words as candidate clues,
+        excluding base forms of team words and clues given before
+
+        team_words(list): The words of the spymaster's team
+        embedding_model: The word embedding model used for similarity calculations
+
+        RETURNS(list): The deduplicated candidate clues
+        """
         top_num = self._board._config['hyperparameters']['topn']
-        embedding = self._board._embedding
         word_vocab = []
+        seen = set()
+        current_team_words = set(team_words)
 
         # Get most similar words to team words as vocabulary
         for team_word in team_words:
             if team_word == "------":
                 continue
-            if embedding == "word2vec":
-                most_similar = embedding_model.most_similar_words(team_word, topn=top_num)
-                for most_similar_word in most_similar:
-                    curr_word = most_similar_word.lower()
-                    if curr_word not in self._board._embedding_model.get_model():
-                        continue
-                    # Exclude words that include base forms
-                    if curr_word in team_words or team_word in curr_word:
-                        continue
-                    # Check if word is a singular word and not already in vocab
-                    if re.match(r"^\w+$", curr_word) and curr_word not in word_vocab and "_" not in curr_word:
-                        word_vocab.append(curr_word)
-            elif embedding == "sense2vec":
-                _, most_similar = embedding_model.most_similar_words(team_word, topn=top_num)
-                for most_similar_word in most_similar:
-                    curr_word = most_similar_word.split('|')[0]
-                    # Exclude words that include base forms
-                    if curr_word in team_words or team_word in curr_word:
-                        continue
-                    else:
-                        word_vocab.append(most_similar_word)
-        
-        # Heuristic decision algorithm
-        best_clue = None
-        intended_number = 0
-        intended_word = []
-        best_score = float('-inf')
-        similar_to_team_scores = []
-        similar_to_bad_scores = []
-        a = 0
-        for word in word_vocab:
-            # # Check if clue already exists
-            if word in self._clue_history._clue_history.keys():
-                continue
+            if team_word not in self._word_candidates:
+                # Exclude words that include base forms, which never changes for a team word
+                self._word_candidates[team_word] = [most_similar_word for most_similar_word in embedding_model.clue_candidates(team_word, top_num)
+                                                    if team_word not in most_similar_word.split('|')[0]]
+            for most_similar_word in self._word_candidates[team_word]:
+                # Exclude duplicates from other team words and the team words themselves
+                if most_similar_word in seen or most_similar_word.split('|')[0] in current_team_words:
+                    continue
+                seen.add(most_similar_word)
+                word_vocab.append(most_similar_word)
+        # Check if clue already exists
+        return [word for word in word_vocab if word not in self._clue_history._clue_history]
 
-            # Calculate the cosine similarity between word in vocab and team words            
-            try:
-                similar_to_team_scores = [embedding_model.similarity(word, team_word) 
-                                        for team_word in team_words]
-                similar_to_bad_scores = [embedding_model.similarity(word, bad_word) 
-                                        for bad_word in bad_words]
-            except TypeError:
-                pass
-            similarity_score = sum(similar_to_team_scores) - sum(similar_to_bad_scores)
-
-            # Keep track of best score and clue
-            if similarity_score > best_score:
-                best_clue = word
-                best_score = similarity_score
+    def _best_scoring_clue(self, candidates, embedding_model, deadline=None, team_words=()):
+        """
+        Scores every candidate clue as the sum of its similarities to the team words
+        minus the sum of its similarities to the bad words. Scores are kept across
+        turns, only candidates not seen before have their similarities to the board
+        computed, as one similarity matrix sliced from the precomputed similarity
+        table when one has been built. Under a deadline, candidates are scored most
+        promising first, a chunk at a time, and the best of those scored when it
+        passes is given.
+
+        candidates(list): The candidate clues from _get_clue_candidates
+        embedding_model: The word embedding model used for similarity calculations
+        deadline(float|None): The time.perf_counter() by which to stop scoring, None to score all
+        team_words(list): The words of the spymaster's team, which the candidates were found from
+
+        RETURNS(str|None): The highest scoring clue, None if there are no candidates
+        """
+        if not candidates:
+            return None
+        if deadline is None:
+            scored = candidates
+            new_candidates = self._get_unscored(candidates)
+            if new_candidates:
+                self._add_similarities(new_candidates, embedding_model.similarity_matrix(new_candidates, self._columns))
+        else:
+            # Candidates scored on earlier turns cost nothing, only the new ones race the deadline
+            self._score_candidates(self._order_by_promise(self._get_unscored(candidates), team_words), embedding_model, deadline)
+            # In candidate order, so equal scores go to the same candidate as without a deadline
+            scored = [candidate for candidate in candidates if candidate in self._candidate_rows]
+        self._coverage.append(len(scored) / len(candidates))
+        count('spymaster.candidates_evaluated', len(scored))
+        rows = np.array([self._candidate_rows[candidate] for candidate in scored], dtype=np.int64)
+        return self._choose_clue(scored, self._scores[rows])
+
+    def _score_candidates(self, candidates, embedding_model, deadline):
+        """
+        Computes the similarities and scores of new candidates a chunk at a time,
+        until the deadline passes
+
+        candidates(list): The distinct candidates not scored before, in the order to score them
+        embedding_model: The word embedding model used for similarity calculations
+        deadline(float): The time.perf_counter() by which to stop
+        """
+        blocks = []
+        scored = 0
+        for start in range(0, len(candidates), DEADLINE_CHUNK):
+            chunk = candidates[start:start + DEADLINE_CHUNK]
+            blocks.append(embedding_model.similarity_matrix(chunk, self._columns))
+            scored += len(chunk)
+            if time.perf_counter() > deadline:
+                break
+        if blocks:
+            # Appended once, as the arrays are copied on every append
+            self._add_similarities(candidates[:scored], np.concatenate(blocks))
+
+    def _order_by_promise(self, candidates, team_words):
+        """
+        Orders candidates by their best rank among the neighbours of a team word,
+        so the nearest neighbours of every team word come before the farther ones
+
+        candidates(list): The candidate clues from _get_clue_candidates
+        team_words(list): The words of the spymaster's team
+        RETURNS(list): The candidates, those of equal rank in team word order and
+        any not among the neighbours last
+        """
+        pool = set(candidates)
+        ordered = {}
+        # One neighbour of every team word per rank, a candidate keeps its first place
+        neighbours = [self._word_candidates[team_word] for team_word in team_words if team_word in self._word_candidates]
+        for rank_candidates in itertools.zip_longest(*neighbours):
+            for candidate in rank_candidates:
+                if candidate in pool:
+                    ordered[candidate] = None
+        ordered.update(dict.fromkeys(candidates))
+        return list(ordered)
+
+    def _get_unscored(self, candidates):
+        """
+        Get the candidates whose similarities have not been computed on any turn yet
+
+        candidates(list): The candidate clues
+        RETURNS(list): The distinct candidates not scored before, in order
+        """
+        return list(dict.fromkeys(candidate for candidate in candidates if candidate not in self._candidate_rows))
+
+    def _add_similarities(self, candidates, similarities):
+        """
+        Keeps the similarities of newly scored candidates and works out their scores
+
+        candidates(list): The distinct candidates, none scored before
+        similarities(np.ndarray): The (len(candidates), columns) similarity of each
+        candidate to the starting board words and the revealed marker
+        """
+        for candidate in candidates:
+            self._candidate_rows[candidate] = len(self._candidate_rows)
+        count('spymaster.candidates_scored', len(similarities))
+        self._similarities = np.concatenate((self._similarities, similarities))
+        self._scores = np.concatenate((self._scores, similarities @ self._weights))
+
+    def _choose_clue(self, candidates, scores):
+        """
+        Pick the highest scoring candidate clue
+
+        candidates(list): The candidate clues
+        scores(np.ndarray): The score of each candidate
+        RETURNS(str|None): The best clue, None if there are no candidates
+        """
+        if not candidates:
+            return None
+        if self._board._config['hyperparameters'].get('clue_rollouts'):
+            return self._rerank_by_rollouts(candidates, scores)
+        # argmax keeps the first of equal scores, like the strict comparison it replaces
+        return candidates[int(np.argmax(scores))]
+
+    @timed('spymaster.rollouts')
+    def _rerank_by_rollouts(self, candidates, scores):
+        """
+        Re-ranks the best scoring candidates by the expected outcome of giving them.
+        Each candidate is given with the number it would be given with, and clue_rollouts
+        guessers whose similarities to the board are blurred by rollout_noise guess for it:
+        a rollout is worth the team words revealed before a wrong guess, less ENEMY_PENALTY
+        if that guess is an enemy word and ASSASSIN_PENALTY if it is the assassin.
+        Candidates are simulated best first, a chunk at a time, and once rollout_budget_ms
+        is spent the rest keep their place behind them.
+
+        candidates(list): The candidate clues
+        scores(np.ndarray): The heuristic score of each candidate
+        RETURNS(str): The candidate with the best expected outcome
+        """
+        hyperparameters = self._board._config['hyperparameters']
+        rollouts = hyperparameters['clue_rollouts']
+        budget_ms = hyperparameters.get('rollout_budget_ms')
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+        # Stable, so equal scores keep the order argmax would pick them in
+        top = np.argsort(-np.asarray(scores), kind='stable')[:hyperparameters.get('rollout_candidates', 10)]
+        words = [word for word in self._board.get_current_words() if word != "------"]
+        tags = np.array([TAGS.index(tag) for tag, tag_words in self._board.get_tag_words().items()
+                         for word in tag_words if word != "------"], dtype=np.int8)
+        expected = np.full(len(top), -np.inf)
+        evaluated = 0
+        for start in range(0, len(top), ROLLOUT_CHUNK):
+            chunk = [candidates[i] for i in top[start:start + ROLLOUT_CHUNK]]
+            similarities = self._board._embedding_model.similarity_matrix(chunk, words)
+            expected[start:start + len(chunk)] = self._simulate_guesses(similarities, tags, rollouts)
+            evaluated += len(chunk)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        count('spymaster.rollout_candidates', evaluated)
+        count('spymaster.rollouts', evaluated * rollouts)
+        return candidates[int(top[int(np.argmax(expected))])]
+
+    def _simulate_guesses(self, similarities, tags, rollouts):
+        """
+        Simulates noisy guessers for several clues at once
+
+        similarities(np.ndarray): The (clues, words) similarity of each clue to the unrevealed words
+        tags(np.ndarray): The tag id of each unrevealed word
+        rollouts(int): The number of guessers simulated per clue
+
+        RETURNS(np.ndarray): The mean outcome of each clue's rollouts
+        """
+        hyperparameters = self._board._config['hyperparameters']
+        team = TAGS.index(self._team)
+        team_columns = tags == team
+        # The intended number, as _generate_intended_number works it out
+        team_similarities = -np.sort(-similarities[:, team_columns], axis=1)[:, :3]
+        close = team_similarities[:, :-1] - team_similarities[:, 1:] < hyperparameters['cosine_sim_difference']
+        numbers = 1 + np.cumprod(close, axis=1).sum(axis=1)
+
+        noise = self._rng.normal(0.0, hyperparameters.get('rollout_noise', 0.05), (len(similarities), rollouts, len(tags)))
+        depth = min(3, len(tags))
+        guessed = tags[np.argsort(-(similarities[:, None, :] + noise), axis=2)[:, :, :depth]]
+        guessing = np.arange(depth) < numbers[:, None, None]
+        # Guesses stop at the first word which is not the team's
+        correct = np.cumprod((guessed == team) & guessing, axis=2).sum(axis=2)
+        wrong = correct < numbers[:, None]
+        wrong_tag = np.take_along_axis(guessed, np.minimum(correct, depth - 1)[..., None], axis=2)[..., 0]
+        outcome = (correct - ENEMY_PENALTY * (wrong & (wrong_tag == TAGS.index(self._enemy)))
+                   - ASSASSIN_PENALTY * (wrong & (wrong_tag == TAGS.index('assassin'))))
+        return outcome.mean(axis=1)
+
+    def _give_clue(self, team_words, best_clue, embedding_model):
+        """
+        Works out the intended words of a chosen clue and records it in the clue history
+
+        team_words(list): The words of the spymaster's team
+        best_clue(str|None): The chosen clue, None if there were no candidates
+        embedding_model: The word embedding model used for similarity calculations
+
+        RETURNS(Tuple|None): A tuple containing the best clue (str) and intended number (int),
+        None if there is no clue to give, e.g. the enemy revealed the team's last word
+        """
+        if best_clue is None:
+            count('spymaster.no_clue')
+            return None
         intended_number, intended_word = self._generate_intended_number(team_words, best_clue, embedding_model)
         self._clue_history.add_to_history(best_clue, intended_word)
         return best_clue, intended_number
 
+    @timed('spymaster.intended_number')
     def _generate_intended_number(self, team_words, best_clue, embedding_model):
         """
         This function generates the best intended number of words on the board given a clue
@@ -105,14 +360,11 @@ class Spymaster():
         cosine_sim_difference = self._board._config['hyperparameters']['cosine_sim_difference']
         max_intended_number = 3
         intended_number = 1
-        most_similar = {}
         intended_word = []
         # Calculate how similar the scores are to the best clue in descending order
-        for team_word in team_words:
-            if team_word == "------":
-                continue
-            similarity_score = embedding_model.similarity(best_clue, team_word)
-            most_similar[team_word] = similarity_score
+        team_words = [team_word for team_word in team_words if team_word != "------"]
+        similarity_scores = embedding_model.similarity_matrix([best_clue], team_words)[0]
+        most_similar = dict(zip(team_words, similarity_scores.tolist()))
         sorted_most_similar = sorted(most_similar.items(), key=lambda x:x[1], reverse=True)
 
         # If only one word left on the board
@@ -140,26 +392,5 @@ class Spymaster():
         word(str): The word guessed by the guesser.
         RETURNS(str|None): The tag of the word or None if word is not on board
         """
-        # Check if word is on codenames board
-        if word in self._board.get_board_words():
-            for key, value in self._board.get_tag_words().items():
-                # Replace word with blank value "------"
-                if word in value:
-                    replace_index = value.index(word)
-                    value[replace_index] = "------"
-                    # Check which tag the word belongs to
-                    if key == self._team:
-                        print(f"You have found your {self._team} word!")
-                        return self._team
-                    elif key == self._enemy:
-                        print(f"You have found the enemy's {self._enemy} word")
-                        return self._enemy
-                    elif key == 'neutral':
-                        print("You have found a neutral word")
-                        return 'neutral'
-                    elif key == 'assassin':
-                        print("You have found an assassin word")
-                        return 'assassin'
-        else:
-            print("Word is not on board")
-            return
+        # The board shows a revealed word as "------" from now on
+        return self._board.reveal(word)
@@ -0,0 +1,148 @@
+from embedding_model import EmbeddingModel, get_vector_dtype, load_config
+from experiments import derive_seed, get_intended_word_metrics, get_turn_metrics
+from instrumentation import aggregate_stats
+from main import GameLogic
+from tabulate import tabulate
+from vector_store import DTYPES, MemmapVectors
+import argparse
+import contextlib
+import copy
+import itertools
+import json
+import os
+import random
+import time
+
+def get_grid(vocab_sizes, topns, cosine_sim_differences, vector_dtypes=('float32',)):
+    """
+    Orders every combination of the hyperparameters so work can be reused: full
+    precision first, so quantized models are compared against it, the largest
+    vocabulary first, so smaller ones are cut from the loaded model, and the
+    largest topn first, so neighbour lists are sliced for smaller ones
+
+    vocab_sizes(list): The vocabulary sizes to try
+    topns(list): The topn values to try
+    cosine_sim_differences(list): The cosine similarity differences to try
+    vector_dtypes(list): The vector storage types to try, see vector_store.DTYPES
+
+    RETURNS(list): The (vector_dtype, vocab_size, topn, cosine_sim_difference) grid points
+    """
+    return list(itertools.product(sorted(set(vector_dtypes), key=DTYPES.index), sorted(set(vocab_sizes), reverse=True),
+                                  sorted(set(topns), reverse=True), sorted(set(cosine_sim_differences))))
+
+def get_point_config(config, vector_dtype, vocab_size, topn, cosine_sim_difference):
+    """
+    Get the config of a grid point
+
+    config(dict): The parsed config.yaml
+    vector_dtype(str): How the vectors are stored
+    vocab_size(int): The vocabulary size
+    topn(int): The number of most similar words searched for clues
+    cosine_sim_difference(float): The similarity gap which ends the intended words
+
+    RETURNS(dict): A copy of the config with the grid point's hyperparameters
+    """
+    config = copy.deepcopy(config)
+    config['parameters']['vector_dtype'] = vector_dtype
+    config['hyperparameters'].update(vocab_size=vocab_size, topn=topn, cosine_sim_difference=cosine_sim_difference)
+    return config
+
+def get_vectors_mb(embedding_model):
+    """
+    Get the size of a model's vectors
+
+    embedding_model(EmbeddingModel): The model
+    RETURNS(float|None): The MB taken by the vectors, None unless it is a vector store
+    """
+    model = embedding_model.get_model()
+    return model.get_nbytes() / 2 ** 20 if isinstance(model, MemmapVectors) else None
+
+def play_point(embedding_model, game_seeds):
+    """
+    Plays one automated game per seed with the game output silenced
+
+    embedding_model(EmbeddingModel): The model of the grid point
+    game_seeds(list): The seed of each game, the same seed deals the same board
+
+    RETURNS(list): The automate game result of each game
+    """
+    results = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for game_seed in game_seeds:
+            random.seed(game_seed)
+            results.append(GameLogic(embedding_model).automate_game("blue"))
+    return results
+
+def run_sweep(config, grid, num_of_games, seed=50):
+    """
+    Plays the same seeded games at every grid point. The backend model is loaded
+    once at the largest vocabulary size, neighbour lists are shared through the
+    neighbour cache across topn values, and similarities of clue candidates to the
+    boards are shared across cosine_sim_difference values, which only change the
+    intended number. Quantized points report the share of games played exactly as
+    at full precision.
+
+    config(dict): The parsed config.yaml
+    grid(list): The grid points from get_grid, in that order
+    num_of_games(int): The number of games played at every point
+    seed(int): The sweep seed every game seed is derived from
+
+    RETURNS(list): The hyperparameters, metrics and timings of each grid point
+    """
+    game_seeds = [derive_seed(seed, 'sweep', i) for i in range(num_of_games)]
+    rows = []
+    full_precision = {}
+    memo_key = None
+    for vector_dtype, vocab_size, topn, cosine_sim_difference in grid:
+        # Similarities depend on the model and the similarity table used with the topn
+        if (vector_dtype, vocab_size, topn) != memo_key:
+            memo_key = (vector_dtype, vocab_size, topn)
+            memo = {}
+        start = time.perf_counter()
+        embedding_model = EmbeddingModel(get_point_config(config, vector_dtype, vocab_size, topn, cosine_sim_difference))
+        embedding_model.set_similarity_memo(memo)
+        results = play_point(embedding_model, game_seeds)
+        seconds = time.perf_counter() - start
+        embedding_model.set_similarity_memo(None)
+        average_turns, min_turns, assassin_games = get_turn_metrics(results)
+        total_clues, correct_guessed_words, _ = get_intended_word_metrics(results)
+        counters = aggregate_stats(results).counters
+        # Compare every game against the same game at full precision
+        point = (vocab_size, topn, cosine_sim_difference)
+        if vector_dtype == 'float32':
+            full_precision[point] = results
+        same_games = None
+        if vector_dtype != 'float32' and point in full_precision:
+            same_games = sum(result == expected for result, expected in zip(results, full_precision[point])) / len(results)
+        rows.append({'vector_dtype': vector_dtype, 'vocab_size': vocab_size, 'topn': topn,
+                     'cosine_sim_difference': cosine_sim_difference,
+                     'average_turns': average_turns, 'min_turns': min_turns, 'assassin_games': assassin_games,
+                     'total_clues': total_clues, 'correct_guessed_words': correct_guessed_words,
+                     'same_games': same_games,
+                     'vectors_mb': get_vectors_mb(embedding_model),
+                     'neighbour_searches': counters.get('neighbour_cache.misses', 0), 'seconds': seconds})
+    return rows
+
+if __name__ == "__main__":
+    config = load_config('config.yaml')
+    hyperparameters = config['hyperparameters']
+    parser = argparse.ArgumentParser(description="Play the same seeded games under every combination of hyperparameters")
+    parser.add_argument('--vocab-size', type=int, nargs='+', default=[hyperparameters['vocab_size']], help="Vocabulary sizes to try")
+    parser.add_argument('--topn', type=int, nargs='+', default=[hyperparameters['topn']], help="topn values to try")
+    parser.add_argument('--cosine-sim-difference', type=float, nargs='+', default=[hyperparameters['cosine_sim_difference']],
+                        help="Cosine similarity differences to try")
+    parser.add_argument('--vector-dtype', nargs='+', choices=DTYPES, default=[get_vector_dtype(config)],
+                        help="Vector storage types to compare, e.g. float32 float16 int8")
+    parser.add_argument('--games', type=int, default=config['experiment_params']['num_of_games'], help="Games played at every grid point")
+    parser.add_argument('--seed', type=int, default=config['experiment_params'].get('seed', 50), help="Random seed of the games")
+    parser.add_argument('--output', help="Save the table as JSON to this path")
+    args = parser.parse_args()
+
+    grid = get_grid(args.vocab_size, args.topn, args.cosine_sim_difference, args.vector_dtype)
+    print(f"Sweeping {len(grid)} grid points of {args.games} games...")
+    rows = run_sweep(config, grid, args.games, args.seed)
+
+    print(tabulate([list(row.values()) for row in rows], headers=list(rows[0]), floatfmt='.3f'))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(rows, file, indent=2)
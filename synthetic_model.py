@@ -0,0 +1,64 @@
+from vector_store import is_vector_store, write_vector_store
+import os
+import string
+import numpy as np
+
+def generate_synthetic_vectors(words, vocab_size, dim=300, clusters=200, seed=0):
+    """
+    Generates a seeded synthetic embedding shaped like the real ones: clustered
+    vectors, the codename words first, then made up words padding it to
+    vocab_size. A few made up words are capitalised, joined by underscores or
+    hyphenated so the single word filters have something to reject. Keys, centers,
+    cluster assignments and noise each come from their own random stream, so a
+    smaller vocab_size gives the first rows of a larger one, as cutting down a
+    loaded model does.
+
+    words(list): The codename words, always in the embedding
+    vocab_size(int): The number of keys, the revealed word marker included
+    dim(int): The vector size
+    clusters(int): The number of topics vectors are drawn around
+    seed(int): The random seed, the same seed gives the same embedding
+
+    RETURNS(Tuple): The keys and their (len(keys), dim) float32 vectors
+    """
+    key_rng, center_rng, cluster_rng, noise_rng = [np.random.default_rng(stream) for stream in np.random.SeedSequence(seed).spawn(4)]
+    # The marker replacing revealed words is scored like any other word
+    keys = list(dict.fromkeys(["------"] + list(words)))
+    seen = set(keys)
+    letters = np.array(list(string.ascii_lowercase))
+    while len(keys) < vocab_size:
+        word = ''.join(key_rng.choice(letters, key_rng.integers(3, 11)))
+        style = key_rng.random()
+        if style < 0.05:
+            word = word.capitalize()
+        elif style < 0.08:
+            word = f'{word}_{word[:3]}'
+        elif style < 0.09:
+            word = f'{word}-{word[-2:]}'
+        if word not in seen:
+            seen.add(word)
+            keys.append(word)
+    keys = keys[:vocab_size]
+    centers = center_rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[cluster_rng.integers(clusters, size=len(keys))] + noise_rng.standard_normal((len(keys), dim)).astype(np.float32)
+    return keys, vectors
+
+def get_synthetic_model(dir_path, words, vocab_size, dim=300, seed=0):
+    """
+    Get a synthetic embedding as a vector store, which opens memory-mapped like a
+    converted word2vec model. It is generated once per size and seed.
+
+    dir_path(str): The directory the stores are kept in
+    words(list): The codename words, always in the embedding
+    vocab_size(int): The number of keys
+    dim(int): The vector size
+    seed(int): The random seed
+
+    RETURNS(str): The path to the vector store
+    """
+    # v2 stores come from the prefix-stable generator, older stores are not reused
+    store_path = os.path.join(dir_path, f'synthetic_v2_{vocab_size}_{dim}_{seed}')
+    if not is_vector_store(store_path):
+        keys, vectors = generate_synthetic_vectors(words, vocab_size, dim, seed=seed)
+        write_vector_store(store_path, keys, vectors)
+    return store_path
@@ -0,0 +1,168 @@
+import os
+import random
+import shutil
+import string
+import sys
+import numpy as np
+import pytest
+import yaml
+
+# The modules live at the root of the repo
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+def generate_vectors(words, vocab_size, dim, clusters=50, seed=0):
+    """
+    Generates a small seeded embedding shaped like the real ones: clustered vectors,
+    the "------" marker and the codename words first, then made up words padding it
+    to vocab_size, a few of them capitalised, joined by underscores or hyphenated
+    """
+    rng = np.random.default_rng(seed)
+    keys = list(dict.fromkeys(["------"] + list(words)))
+    seen = set(keys)
+    letters = np.array(list(string.ascii_lowercase))
+    while len(keys) < vocab_size:
+        word = ''.join(rng.choice(letters, rng.integers(3, 11)))
+        style = rng.random()
+        if style < 0.05:
+            word = word.capitalize()
+        elif style < 0.08:
+            word = f'{word}_{word[:3]}'
+        elif style < 0.09:
+            word = f'{word}-{word[-2:]}'
+        if word not in seen:
+            seen.add(word)
+            keys.append(word)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=len(keys))] + rng.standard_normal((len(keys), dim)).astype(np.float32)
+    return keys, vectors
+
+@pytest.fixture
+def codename_words():
+    with open(os.path.join(REPO, 'model_paths', 'wordlist.txt'), 'r') as file:
+        return file.read().split()
+
+@pytest.fixture
+def save_config(tmp_path, monkeypatch):
+    """
+    Saves a config as the config.yaml of a fresh working directory, which is
+    where EmbeddingModel reads it from
+    """
+    monkeypatch.chdir(tmp_path)
+    def save(config):
+        with open(tmp_path / 'config.yaml', 'w') as file:
+            yaml.safe_dump(config, file)
+        return config
+    return save
+
+def get_config(tmp_path, embedding, file_path):
+    # Its own copy of the word list, so nothing is shared with other tests through caches
+    wordlist_path = str(tmp_path / 'wordlist.txt')
+    shutil.copy(os.path.join(REPO, 'model_paths', 'wordlist.txt'), wordlist_path)
+    return {
+        'parameters': {'embedding_model': embedding},
+        'hyperparameters': {'vocab_size': 3000, 'cosine_sim_difference': 0.35, 'topn': 200},
+        'model_paths': {
+            f'{embedding}_model': {'file_path': file_path},
+            'codename_words': {'file_path': wordlist_path},
+        },
+        'experiment_params': {'num_of_games': 4},
+    }
+
+@pytest.fixture
+def word2vec_config(tmp_path, save_config, codename_words):
+    """
+    A config playing on a small seeded word2vec model, so no model download is needed
+    """
+    import gensim
+    keys, vectors = generate_vectors(codename_words, 3000, 32)
+    model = gensim.models.KeyedVectors(vectors.shape[1])
+    model.add_vectors(keys, vectors)
+    file_path = str(tmp_path / 'word2vec.bin')
+    model.save_word2vec_format(file_path, binary=True)
+    return save_config(get_config(tmp_path, 'word2vec', file_path))
+
+@pytest.fixture
+def synthetic_config(tmp_path, save_config):
+    """
+    A config playing on the seeded synthetic backend, generated in memory, with its
+    own cache directory so nothing is shared with other tests through caches
+    """
+    config = get_config(tmp_path, 'synthetic', str(tmp_path / 'wordlist.txt'))
+    config['model_paths']['synthetic_model'].update(dim=32, seed=0)
+    config['model_paths']['cache_dir'] = {'file_path': str(tmp_path / 'cache')}
+    return save_config(config)
+
+@pytest.fixture
+def sense2vec_config(tmp_path, save_config, codename_words):
+    """
+    A config playing on a small seeded sense2vec model. Every key is there as a NOUN
+    and as a less frequent VERB, whose vector is close to the NOUN one.
+    """
+    from sense2vec import Sense2Vec
+    keys, vectors = generate_vectors(codename_words, 1500, 32)
+    rng = np.random.default_rng(1)
+    verb_vectors = vectors + 0.3 * rng.standard_normal(vectors.shape).astype(np.float32)
+    model = Sense2Vec(shape=(2 * len(keys), vectors.shape[1]), senses=['NOUN', 'VERB'])
+    for key, vector, verb_vector in zip(keys, vectors, verb_vectors):
+        model.add(f'{key}|NOUN', vector, freq=100)
+        model.add(f'{key}|VERB', verb_vector, freq=10)
+    file_path = str(tmp_path / 's2v')
+    model.to_disk(file_path)
+    return save_config(get_config(tmp_path, 'sense2vec', file_path))
+
+@pytest.fixture
+def get_games():
+    """
+    Makes automate game results comparable across processes. Intended words come
+    from a set, so their order depends on the process's hash seed.
+    """
+    def get_games(results):
+        return [None if result is None else result[:3] + ({clue: sorted(words) for clue, words in result[3].items()}, result[4])
+                for result in results]
+    return get_games
+
+@pytest.fixture
+def get_game(word2vec_config):
+    """
+    Deals seeded games on the word2vec config, sharing one embedding model
+    """
+    from embedding_model import EmbeddingModel
+    from main import GameLogic
+    embedding_model = EmbeddingModel()
+    def get_game(seed=0):
+        random.seed(seed)
+        return GameLogic(embedding_model)
+    return get_game
+
+@pytest.fixture
+def get_standalone_config(tmp_path, save_config):
+    """
+    Saves a config as config.yaml with its own word list and cache directory, so
+    nothing loaded or cached by earlier runs in the test is reused
+    """
+    def get_standalone_config(config, name):
+        dir_path = tmp_path / name
+        dir_path.mkdir()
+        wordlist_path = str(dir_path / 'wordlist.txt')
+        shutil.copy(config['model_paths']['codename_words']['file_path'], wordlist_path)
+        config['model_paths']['codename_words']['file_path'] = wordlist_path
+        if 'synthetic_model' in config['model_paths']:
+            config['model_paths']['synthetic_model']['file_path'] = wordlist_path
+        if 'cache_dir' in config['model_paths']:
+            config['model_paths']['cache_dir']['file_path'] = str(dir_path / 'cache')
+        return save_config(config)
+    return get_standalone_config
+
+@pytest.fixture
+def get_board(synthetic_config):
+    """
+    Deals seeded boards on the synthetic config, sharing one embedding model
+    """
+    from board import Board
+    from embedding_model import EmbeddingModel
+    embedding_model = EmbeddingModel()
+    def get_board(seed=0):
+        random.seed(seed)
+        return Board(embedding_model)
+    return get_board
@@ -0,0 +1,52 @@
+from ann_index import build_ann_index, get_index_path
+from embedding_model import EmbeddingModel
+from word_pack import load_word_pack
+import pytest
+
+def get_recall(embedding_model, index, words, topn, nprobe):
+    exact = [set(embedding_model._embedding_model.similar_keys(word, topn)) for word in words]
+    return sum(len(keys.intersection(index.search(embedding_model, word, topn, nprobe))) for keys, word in zip(exact, words)) / sum(map(len, exact))
+
+def test_ann_recall_at_a_fixed_nprobe(word2vec_config):
+    embedding_model = EmbeddingModel()
+    words = load_word_pack(embedding_model, word2vec_config['model_paths']['codename_words']['file_path']).get_keys()[:30]
+    index = build_ann_index(embedding_model, 50, nlist=16, query_words=words)
+    recall_curve = dict(index._recall_curve.tolist())
+    assert get_recall(embedding_model, index, words, 50, 4) == pytest.approx(recall_curve[4])
+    assert recall_curve[4] >= 0.9
+    assert list(recall_curve.values()) == sorted(recall_curve.values())
+    # Probing every list is the exact search
+    for word in words:
+        assert index.search(embedding_model, word, 50, 16) == embedding_model._embedding_model.similar_keys(word, 50)
+
+def test_most_similar_words_uses_the_index_when_asked(word2vec_config, save_config):
+    embedding_model = EmbeddingModel()
+    words = load_word_pack(embedding_model, word2vec_config['model_paths']['codename_words']['file_path']).get_keys()[:30]
+    build_ann_index(embedding_model, 50, nlist=16, query_words=words).save(get_index_path(embedding_model))
+    assert EmbeddingModel()._ann_index is None
+    word2vec_config['hyperparameters']['ann_recall'] = 0.9
+    save_config(word2vec_config)
+    ann_model = EmbeddingModel()
+    # The fewest lists which reached the recall when the index was built
+    index = ann_model._ann_index
+    nprobe = int(min(nprobe for nprobe, recall in index._recall_curve.tolist() if recall >= 0.9))
+    assert index.get_nprobe() == nprobe < 16
+    for word in words:
+        assert ann_model.most_similar_words(word, 50) == index.search(embedding_model, word, 50, nprobe)
+
+def test_ann_search_keeps_to_the_clue_senses(sense2vec_config, save_config):
+    sense2vec_config['hyperparameters'].update(topn=50, clue_senses=['NOUN'])
+    save_config(sense2vec_config)
+    embedding_model = EmbeddingModel()
+    words = load_word_pack(embedding_model, sense2vec_config['model_paths']['codename_words']['file_path']).get_keys()[:20]
+    build_ann_index(embedding_model, 50, nlist=8, query_words=words).save(get_index_path(embedding_model))
+
+    exact_model = EmbeddingModel()
+    sense2vec_config['hyperparameters']['ann_recall'] = 1.0
+    save_config(sense2vec_config)
+    ann_model = EmbeddingModel()
+    assert ann_model._ann_index is not None
+    for word in words:
+        _, keys = ann_model.most_similar_words(word, 50)
+        assert keys and all(key.endswith('|NOUN') for key in keys)
+        assert set(keys) == set(exact_model.most_similar_words(word, 50)[1])
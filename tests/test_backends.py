@@ -0,0 +1,55 @@
+from conftest import REPO
+from convert_model import convert_word2vec
+from embedding_model import EmbeddingModel, get_backend, load_backend_model, register_backend
+import gensim
+import json
+import pytest
+import subprocess
+import sys
+
+def test_synthetic_backend_imports_no_model_library(synthetic_config):
+    # In a fresh process, as other tests import them
+    code = ('import json, sys\n'
+            f'sys.path.insert(0, {REPO!r})\n'
+            'from embedding_model import EmbeddingModel\n'
+            f'embedding_model = EmbeddingModel(json.loads({json.dumps(synthetic_config)!r}))\n'
+            'embedding_model.most_similar_words(embedding_model.get_vocab()[1], 10)\n'
+            "print(json.dumps([name for name in ('gensim', 'sense2vec', 'spacy') if name in sys.modules]))\n")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert json.loads(output.splitlines()[-1]) == []
+
+def test_unknown_backend_is_an_error(synthetic_config):
+    synthetic_config['parameters']['embedding_model'] = 'glove'
+    with pytest.raises(ValueError, match='glove'):
+        EmbeddingModel(synthetic_config)
+    with pytest.raises(ValueError):
+        get_backend('glove')
+
+def test_registered_backend_gets_its_options_and_loads_once(synthetic_config):
+    calls = []
+    synthetic_loader = get_backend('synthetic').loader
+    def loader(file_path, vocab_size, **options):
+        calls.append(options)
+        return synthetic_loader(file_path, vocab_size, **options)
+    register_backend('test', loader)
+    synthetic_config['parameters']['embedding_model'] = 'test'
+    synthetic_config['model_paths']['test_model'] = synthetic_config['model_paths']['synthetic_model']
+    embedding_model = EmbeddingModel(synthetic_config)
+    assert EmbeddingModel(synthetic_config).get_model() is embedding_model.get_model()
+    assert calls == [{'dim': 32, 'seed': 0}]
+
+def test_memmap_backend_is_truncated_to_the_vocab_size(word2vec_config, tmp_path):
+    file_path = word2vec_config['model_paths']['word2vec_model']['file_path']
+    store_path = str(tmp_path / 'store')
+    convert_word2vec(file_path, store_path, 3000)
+    model = gensim.models.KeyedVectors.load_word2vec_format(file_path, binary=True, limit=1000)
+    word2vec_config['parameters']['embedding_model'] = 'memmap'
+    word2vec_config['hyperparameters']['vocab_size'] = 1000
+    word2vec_config['model_paths']['memmap_model'] = {'file_path': store_path}
+    embedding_model = EmbeddingModel(word2vec_config)
+    assert embedding_model.get_keys() == model.index_to_key
+    assert embedding_model.most_similar_words('apple', 10) == [key for key, _ in model.most_similar('apple', topn=10)]
+    # A memmap model needs the store
+    assert load_backend_model('memmap', store_path, 1000) is embedding_model._embedding_model
+    with pytest.raises(ValueError, match='convert_model'):
+        load_backend_model('memmap', file_path, 1000)
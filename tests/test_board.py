@@ -0,0 +1,52 @@
+from board import REVEALED, TAGS, Board
+import copy
+
+def get_state(board):
+    return (board.get_tag_words(), board.get_current_words(), board.get_revealed_mask(), board.red_blue_left())
+
+def test_snapshot_and_restore_round_trip(get_board):
+    board = get_board()
+    words = board.get_starting_words()
+    board.reveal(words[0])
+    snapshot = board.snapshot()
+    state = get_state(board)
+
+    for word in words[1:10]:
+        board.reveal(word)
+    assert get_state(board) != state
+    board.restore(snapshot)
+    assert get_state(board) == state
+    assert not any(board.is_revealed(word) for word in words[1:])
+    # A restored board can be played on as before
+    assert board.reveal(words[1]) == TAGS[0]
+
+def test_reveal_updates_the_views_and_counts(get_board):
+    board = get_board()
+    starting_tag_words = board.get_starting_tag_words()
+    red_word = starting_tag_words['red'][0]
+    assert board.reveal(red_word) == 'red'
+    assert board.reveal(red_word) is None
+    assert board.reveal('not on the board') is None
+    assert board.get_tag_words()['red'][0] == REVEALED
+    assert board.get_current_words().count(REVEALED) == 1
+    assert board.red_blue_left() == {'red': 7, 'blue': 9}
+    assert board.get_starting_tag_words() == starting_tag_words
+    assert board.get_revealed_mask() & board.get_tag_mask('red') == board.get_revealed_mask()
+
+def test_getters_hand_out_copies(get_board):
+    board = get_board()
+    board.reveal(board.get_starting_words()[0])
+    state = copy.deepcopy(get_state(board))
+    starting = (board.get_starting_tag_words(), board.get_starting_words(), board.get_board_words())
+    expected = copy.deepcopy(starting)
+    for words in (get_state(board)[0]['blue'], get_state(board)[1], starting[0]['red'], starting[1], starting[2]):
+        words.clear()
+    assert get_state(board) == state
+    assert (board.get_starting_tag_words(), board.get_starting_words(), board.get_board_words()) == expected
+
+def test_from_tag_words_rebuilds_a_board(get_board):
+    board = get_board()
+    for word in board.get_starting_tag_words()['blue'][:3]:
+        board.reveal(word)
+    rebuilt = Board.from_tag_words(board._embedding_model, board.get_tag_words(), board.get_starting_tag_words())
+    assert get_state(rebuilt) == get_state(board)
@@ -0,0 +1,41 @@
+from clue_index import build_clue_index, get_clue_index_path
+from embedding_model import EmbeddingModel
+from instrumentation import Stats, collect_stats
+from word_pack import load_word_pack
+import os
+import re
+
+def build_index(depth):
+    # Built and saved with one model, used by the next one loaded
+    embedding_model = EmbeddingModel()
+    file_path = get_clue_index_path(embedding_model)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    build_clue_index(embedding_model, depth).save(file_path)
+    embedding_model = EmbeddingModel()
+    wordlist_path = embedding_model._config['model_paths']['codename_words']['file_path']
+    return embedding_model, load_word_pack(embedding_model, wordlist_path).get_keys()
+
+def check_clue_candidates(embedding_model, words, get_candidates):
+    stats = Stats()
+    with collect_stats(stats):
+        for topn in (50, 200):
+            for word in words:
+                assert embedding_model.clue_candidates(word, topn) == get_candidates(word, topn), (word, topn)
+    assert stats.counters['clue_index.hits'] == 2 * len(words)
+    # Deeper than the index, so searched
+    with collect_stats(stats):
+        assert embedding_model.clue_candidates(words[0], 300) == get_candidates(words[0], 300)
+    assert stats.counters['clue_index.hits'] == 2 * len(words)
+
+def test_word2vec_clue_index_matches_the_neighbour_search(word2vec_config):
+    embedding_model, words = build_index(200)
+    in_model = set(embedding_model.get_keys())
+    def get_candidates(word, topn):
+        # The Spymaster's old per-candidate check of every neighbour
+        return [similar_word.lower() for similar_word in embedding_model.most_similar_words(word, topn)
+                if similar_word.lower() in in_model and re.match(r"^\w+$", similar_word.lower()) and "_" not in similar_word]
+    check_clue_candidates(embedding_model, words, get_candidates)
+
+def test_sense2vec_clue_index_matches_the_neighbour_search(sense2vec_config):
+    embedding_model, words = build_index(200)
+    check_clue_candidates(embedding_model, words, lambda word, topn: embedding_model.most_similar_words(word, topn)[1])
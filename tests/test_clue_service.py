@@ -0,0 +1,63 @@
+from batch_simulator import BatchSimulator
+from clue_service import ClueClient, ClueServer, ClueService
+from embedding_model import EmbeddingModel
+from main import GameLogic
+import asyncio
+import contextlib
+import random
+import threading
+import time
+import pytest
+
+@pytest.fixture
+def service_address(synthetic_config, tmp_path):
+    # A ClueServer on a Unix socket, run by its own event loop in a thread
+    unix_path = str(tmp_path / 'service.sock')
+    server = ClueServer(ClueService(EmbeddingModel(synthetic_config)))
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve(unix_path=unix_path))
+    def run():
+        with contextlib.suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if (tmp_path / 'service.sock').exists():
+            break
+        time.sleep(0.05)
+    yield f'unix:{unix_path}'
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+def test_concurrent_service_games_match_batched_games(synthetic_config, service_address, get_games):
+    seeds = range(6)
+    games = []
+    for seed in seeds:
+        random.seed(seed)
+        games.append(GameLogic(client=ClueClient(service_address)))
+    results = [None] * len(games)
+    def play(i):
+        results[i] = games[i].automate_game('blue')
+    threads = [threading.Thread(target=play, args=(i,)) for i in range(len(games))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert None not in results
+    embedding_model = EmbeddingModel(synthetic_config)
+    local_games = []
+    for seed in seeds:
+        random.seed(seed)
+        local_games.append(GameLogic(embedding_model))
+    assert get_games(results) == get_games(BatchSimulator(local_games).run('blue'))
+    metrics = ClueClient(service_address).get_metrics()
+    assert metrics['clue']['requests'] > 0 and metrics['clue']['errors'] == 0
+
+def test_bad_requests_are_rejected(service_address):
+    client = ClueClient(service_address)
+    with pytest.raises(RuntimeError, match='400'):
+        client._request('POST', '/clue', {'team': 'green'})
+    # The connection still serves good requests
+    keys, config = client.get_game()
+    assert keys and config['parameters']['embedding_model'] == 'synthetic'
@@ -0,0 +1,8 @@
+from embedding_model import EmbeddingModel
+from main import GameLogic
+
+def test_games_share_one_loaded_model(word2vec_config):
+    embedding_model = EmbeddingModel()
+    assert EmbeddingModel().get_model() is embedding_model.get_model()
+    game = GameLogic(embedding_model)
+    assert game._board._embedding_model is embedding_model
@@ -0,0 +1,35 @@
+from engine import EventLog, GameEngine
+
+def reveal_team(game, team):
+    for word in list(game._board.get_tag_words()[team]):
+        game._get_spymaster(team).reveal_word(word)
+
+def test_team_without_a_clue_passes(get_game):
+    game = get_game()
+    # The enemy revealed every blue word, so blue has nothing left to clue
+    reveal_team(game, 'blue')
+    events = EventLog()
+    engine = GameEngine(game, events)
+    engine.start('blue')
+    assert engine.give_clue() is None
+    assert [event.kind for event in events.get_events()] == ['start', 'turn', 'pass']
+    assert engine.get_team() == 'red' and engine.needs_clue()
+    assert None not in game._get_clue_history('blue').get_clue_intended_words()
+    clue, number = engine.give_clue()
+    assert clue is not None and number >= 1
+
+def test_game_is_drawn_when_both_teams_pass(get_game):
+    game = get_game()
+    reveal_team(game, 'blue')
+    reveal_team(game, 'red')
+    events = EventLog()
+    result = game.automate_game('blue', events)
+    assert result[1] is None
+    assert [event.kind for event in events.get_events()].count('pass') == 2
+
+def test_automated_games_never_give_an_empty_clue(get_game):
+    for seed in range(10):
+        game = get_game(seed)
+        game.automate_game('blue')
+        for team in ('red', 'blue'):
+            assert None not in game._get_clue_history(team).get_clue_intended_words()
@@ -0,0 +1,17 @@
+from embedding_model import EmbeddingModel
+from experiments import play_games
+from similarity_table import build_similarity_table, get_table_path
+
+def test_batched_and_parallel_games_match_sequential_games(word2vec_config, get_games):
+    sequential = play_games('test', 6)
+    assert None not in sequential
+    assert get_games(play_games('test', 6, batch_size=4)) == get_games(sequential)
+    assert get_games(play_games('test', 6, num_of_workers=2)) == get_games(sequential)
+
+def test_batched_games_match_sequential_games_with_the_similarity_table(word2vec_config, get_games):
+    # Clues are then scored from the float16 table in both
+    embedding_model = EmbeddingModel()
+    build_similarity_table(embedding_model, word2vec_config['hyperparameters']['topn'], get_table_path(embedding_model))
+    assert EmbeddingModel()._similarity_table is not None
+    sequential = play_games('test', 6)
+    assert get_games(play_games('test', 6, batch_size=4)) == get_games(sequential)
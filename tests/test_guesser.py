@@ -0,0 +1,26 @@
+import numpy as np
+
+def get_old_ranking(words, sim_scores, clue_number):
+    # The sort _rank_words replaced, stable so ties stay in board order
+    word_score = dict(zip(words, sim_scores))
+    sorted_word_score = dict(sorted(word_score.items(), key=lambda item: item[1], reverse=True))
+    return list(sorted_word_score.keys())[:clue_number]
+
+def test_rank_words_breaks_ties_like_the_old_sort(get_game):
+    guesser = get_game()._get_guesser('blue')
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        size = int(rng.integers(1, 26))
+        words = [f'word{i}' for i in range(size)]
+        # Few distinct scores, so most rankings have ties, some across the cut
+        sim_scores = rng.integers(0, 4, size).astype(np.float32) / 4
+        clue_number = int(rng.integers(0, size + 2))
+        assert guesser._rank_words(words, sim_scores, clue_number) == get_old_ranking(words, sim_scores, clue_number)
+
+def test_suggest_guesses_matches_one_clue_at_a_time(get_game):
+    game = get_game()
+    guesser = game._get_guesser('blue')
+    clues = [(clue, number) for clue, number in zip(game._board.get_board_words()[:5], [1, 2, 3, 4, 9])]
+    for (clue, number), suggested_words in zip(clues, guesser.suggest_guesses(clues)):
+        assert suggested_words == guesser.suggest_guesses([(clue, number)])[0]
+        assert len(suggested_words) == number and suggested_words[0] == clue
@@ -0,0 +1,62 @@
+from collections import Counter
+from engine import EventLog, GameEngine
+from instrumentation import Stats, aggregate_stats, collect_stats, count, summarise, timed, timer
+
+@timed('work')
+def work(amount):
+    count('items', amount)
+    return amount
+
+def test_timed_and_count_add_up():
+    stats = Stats()
+    with collect_stats(stats):
+        with timer('outer'):
+            total = sum(work(amount) for amount in range(1, 5))
+        count('items')
+    assert total == 10
+    assert stats.counters == {'items': 11}
+    assert stats.timers['work'][1] == 4 and stats.timers['outer'][1] == 1
+    # Timers are inclusive, the calls ran inside the outer timer
+    assert stats.timers['work'][0] <= stats.timers['outer'][0]
+
+def test_nothing_is_collected_outside_collect_stats():
+    stats = Stats()
+    work(3)
+    with collect_stats(stats):
+        inner = Stats()
+        with collect_stats(inner):
+            work(2)
+        work(1)
+    # Only the innermost stats collect
+    assert inner.counters == {'items': 2} and inner.timers['work'][1] == 1
+    assert stats.counters == {'items': 1} and stats.timers['work'][1] == 1
+
+def test_aggregate_stats_sums_the_games():
+    games = [Stats(), Stats(), None]
+    games[0].add_time('play', 1.5)
+    games[0].count('clues', 3)
+    games[1].add_time('play', 0.5, calls=2)
+    games[1].count('clues')
+    games[1].count('passes')
+    results = [type('Result', (), {'stats': stats})() for stats in games]
+    stats = aggregate_stats(results + [None])
+    assert stats.timers == {'play': [2.0, 3]}
+    assert stats.counters == {'clues': 4, 'passes': 1}
+    assert stats.as_dict()['timers']['play'] == {'seconds': 2.0, 'calls': 3}
+
+def test_summarise():
+    summary = summarise([0.001, 0.002, 0.003, 0.004])
+    assert summary['count'] == 4
+    assert abs(summary['mean_ms'] - 2.5) < 1e-9
+    assert summary['min_ms'] == 1.0 and summary['max_ms'] == 4.0
+
+def test_game_counters_match_its_events(get_game):
+    game = get_game()
+    event_log = EventLog()
+    GameEngine(game, event_log).run('blue')
+    events = Counter(event.kind for event in event_log.get_events())
+    counters = game._stats.counters
+    assert counters['game.clues'] == events['clue']
+    assert counters['game.guesses'] == events['guess']
+    assert counters.get('game.passes', 0) == events['pass']
+    assert game._stats.timers['game.play'][1] == 1
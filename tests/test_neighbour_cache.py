@@ -0,0 +1,50 @@
+from embedding_model import EmbeddingModel
+from neighbour_cache import NeighbourCache
+
+def get_search(calls):
+    def search(word, topn):
+        calls.append((word, topn))
+        return [f'{word}{i}' for i in range(topn)]
+    return search
+
+def test_hits_match_misses_and_smaller_topn_is_sliced():
+    calls = []
+    search = get_search(calls)
+    cache = NeighbourCache('test', max_size=2)
+    miss = cache.get('a', 10, search)
+    assert cache.get('a', 10, search) == miss
+    assert cache.get('a', 4, search) == miss[:4] == search('a', 4)
+    assert calls == [('a', 10), ('a', 4)]
+    # A larger topn than the cached one searches again
+    assert cache.get('a', 20, search) == search('a', 20)
+    assert cache.get_stats() == {'hits': 2, 'disk_hits': 0, 'misses': 2, 'evictions': 0, 'size': 1}
+
+def test_least_recently_used_word_is_evicted():
+    calls = []
+    cache = NeighbourCache('test', max_size=2)
+    for word in ('a', 'b', 'a', 'c', 'a', 'b'):
+        cache.get(word, 5, get_search(calls))
+    # b was the least recently used when c came in
+    assert [word for word, _ in calls] == ['a', 'b', 'c', 'b']
+    assert cache.get_stats()['evictions'] == 2
+
+def test_sqlite_file_is_shared_between_caches(tmp_path):
+    file_path = str(tmp_path / 'neighbours.sqlite')
+    calls = []
+    miss = NeighbourCache('test', file_path=file_path).get('a', 10, get_search(calls))
+    cache = NeighbourCache('test', file_path=file_path)
+    assert cache.get('a', 5, get_search(calls)) == miss[:5]
+    assert cache.get_stats()['disk_hits'] == 1
+    # Answers of another search are not shared
+    NeighbourCache('other', file_path=file_path).get('a', 10, get_search(calls))
+    assert calls == [('a', 10), ('a', 10)]
+
+def test_cached_neighbours_match_the_search(word2vec_config):
+    embedding_model = EmbeddingModel()
+    backend = embedding_model._embedding_model
+    words = embedding_model.get_vocab()[:20]
+    for word in words:
+        assert embedding_model.most_similar_words(word, 50) == backend.similar_keys(word, 50)
+    for word in words:
+        assert embedding_model.most_similar_words(word, 20) == backend.similar_keys(word, 20)
+    assert embedding_model.get_neighbour_cache_stats()['hits'] >= len(words)
@@ -0,0 +1,12 @@
+from embedding_model import EmbeddingModel
+from experiments import derive_seed
+from prune_model import export_pruned_model, get_pruned_config, verify_pruned_model
+
+def test_pruned_model_plays_the_same_games(synthetic_config, tmp_path):
+    embedding_model = EmbeddingModel(synthetic_config)
+    dir_path = str(tmp_path / 'pruned')
+    pruned_keys = export_pruned_model(embedding_model, dir_path, synthetic_config['hyperparameters']['topn'])
+    assert len(pruned_keys) < len(embedding_model.get_keys())
+    pruned_model = EmbeddingModel(get_pruned_config(synthetic_config, embedding_model, dir_path))
+    verification = verify_pruned_model(embedding_model, pruned_model, [derive_seed(50, 'prune', i) for i in range(6)])
+    assert verification == {'boards': 6, 'same_clues': 1.0, 'same_games': 1.0}
@@ -0,0 +1,24 @@
+from embedding_model import EmbeddingModel
+from similarity_table import build_similarity_table, get_table_path
+from word_pack import load_word_pack
+import numpy as np
+
+def test_table_similarities_are_close_to_float32(word2vec_config):
+    embedding_model = EmbeddingModel()
+    build_similarity_table(embedding_model, 50, get_table_path(embedding_model))
+    table_model = EmbeddingModel()
+    assert table_model._similarity_table is not None
+
+    words = load_word_pack(embedding_model, word2vec_config['model_paths']['codename_words']['file_path']).get_keys()
+    candidates = list(dict.fromkeys(key for word in words[:20] for key in embedding_model.clue_candidates(word, 50)))
+    # A key outside the table and the revealed marker are computed from the vectors
+    outside = next(key for key in embedding_model.get_model().index_to_key[::-1] if table_model._similarity_table.get_rows([key])[0] < 0)
+    rows = candidates + [outside]
+    columns = words[:25] + ["------"]
+    expected = embedding_model.get_vectors(rows) @ embedding_model.get_vectors(columns).T
+    similarities = table_model.similarity_matrix(rows, columns)
+    assert table_model._similarity_table.get_rows(candidates).min() >= 0
+    # float16 keeps 11 significant bits
+    assert np.abs(similarities - expected).max() < 1e-3
+    assert np.allclose(similarities[-1], expected[-1], atol=1e-6)
+    assert np.allclose(similarities[:, -1], expected[:, -1], atol=1e-6)
@@ -0,0 +1,136 @@
+from board import Board
+from clue_history import ClueHistory
+from embedding_model import EmbeddingModel
+from instrumentation import Stats, collect_stats
+from main import GameLogic
+from spymaster import DEADLINE_CHUNK, Spymaster
+import copy
+import time
+import numpy as np
+import random
+
+def get_spymaster(seed=0, team='blue'):
+    random.seed(seed)
+    return Spymaster(team, Board(), ClueHistory(team))
+
+def get_team_and_bad_words(spymaster):
+    tag_words = spymaster._board.get_tag_words()
+    return tag_words[spymaster._team], tag_words[spymaster._enemy] + tag_words['neutral'] + tag_words['assassin']
+
+def get_candidates(spymaster, topn=50):
+    # The neighbours of every team word, a key found from several team words repeated
+    embedding_model = spymaster._board._embedding_model
+    candidates = []
+    for team_word in get_team_and_bad_words(spymaster)[0]:
+        neighbours = embedding_model.most_similar_words(team_word, topn)
+        candidates += neighbours[1] if spymaster._board._embedding == 'sense2vec' else neighbours
+    return candidates
+
+def get_reference_scores(spymaster, candidates):
+    # The loop the matrix product replaced, one similarity per candidate and board word
+    embedding_model = spymaster._board._embedding_model
+    team_words, bad_words = get_team_and_bad_words(spymaster)
+    return [sum(embedding_model.similarity(candidate, word) for word in team_words)
+            - sum(embedding_model.similarity(candidate, word) for word in bad_words) for candidate in candidates]
+
+def check_best_scoring_clue(spymaster):
+    candidates = get_candidates(spymaster)
+    team_words, bad_words = get_team_and_bad_words(spymaster)
+    spymaster._update_state(team_words + bad_words, spymaster._board._embedding_model)
+    clue = spymaster._best_scoring_clue(candidates, spymaster._board._embedding_model)
+    scores = get_reference_scores(spymaster, candidates)
+    # Summed in float32 in another order, so only near ties may be broken differently
+    assert max(scores) - scores[candidates.index(clue)] < 1e-5
+    return candidates
+
+def test_best_scoring_clue_matches_the_scalar_loop(word2vec_config):
+    for seed in range(3):
+        check_best_scoring_clue(get_spymaster(seed))
+
+def test_best_scoring_clue_with_repeated_sense2vec_candidates(sense2vec_config):
+    repeated = False
+    for seed in range(3):
+        candidates = check_best_scoring_clue(get_spymaster(seed))
+        repeated |= len(set(candidates)) < len(candidates)
+    assert repeated
+
+def test_scores_kept_across_turns_match_a_recompute(get_game):
+    game = get_game()
+    embedding_model = game._board._embedding_model
+    rng = random.Random(0)
+    for _ in range(6):
+        for team in ('blue', 'red'):
+            spymaster = game._get_spymaster(team)
+            if spymaster.show_clue_and_number() is None:
+                continue
+            # The scores of every candidate so far, against the board as it is now
+            team_words, bad_words = get_team_and_bad_words(spymaster)
+            candidates = list(spymaster._candidate_rows)
+            rows = [spymaster._candidate_rows[candidate] for candidate in candidates]
+            similarities = embedding_model.similarity_matrix(candidates, team_words + bad_words)
+            scores = similarities[:, :len(team_words)].sum(axis=1) - similarities[:, len(team_words):].sum(axis=1)
+            assert np.allclose(spymaster._scores[rows], scores, atol=1e-4)
+        # Reveal a few words of any tag, the marker takes their place
+        unrevealed = [word for word in game._board.get_current_words() if word != "------"]
+        for word in rng.sample(unrevealed, min(3, len(unrevealed))):
+            game._get_spymaster('blue').reveal_word(word)
+
+def test_fixed_rollout_seed_gives_the_same_reranked_clue(word2vec_config, save_config):
+    word2vec_config['hyperparameters'].update(clue_rollouts=50, rollout_candidates=10, rollout_seed=7)
+    save_config(word2vec_config)
+    stats = Stats()
+    clues = []
+    with collect_stats(stats):
+        for _ in range(2):
+            clues.append([get_spymaster(seed).show_clue_and_number() for seed in range(3)])
+    assert clues[0] == clues[1]
+    assert stats.counters['spymaster.rollouts'] == 50 * stats.counters['spymaster.rollout_candidates'] > 0
+
+    # Every candidate is simulated with the same noise for the same seed
+    spymaster = get_spymaster()
+    candidates = spymaster._get_clue_candidates(get_team_and_bad_words(spymaster)[0], spymaster._board._embedding_model)
+    scores = np.array(get_reference_scores(spymaster, candidates), dtype=np.float32)
+    clue = spymaster._rerank_by_rollouts(candidates, scores)
+    assert clue == get_spymaster()._rerank_by_rollouts(candidates, scores)
+    assert clue in [candidates[i] for i in np.argsort(-scores, kind='stable')[:10]]
+
+def play(config, seeds):
+    embedding_model = EmbeddingModel(config)
+    games = []
+    for seed in seeds:
+        random.seed(seed)
+        game = GameLogic(embedding_model)
+        games.append((game, game.automate_game('blue')))
+    return games
+
+def get_clues(game):
+    return [game._get_clue_history(team).get_clue_intended_words() for team in ('red', 'blue')]
+
+def test_deadline_which_never_passes_gives_the_same_games(synthetic_config):
+    # Deep enough for more new candidates than one deadline chunk
+    synthetic_config['hyperparameters']['topn'] = 400
+    deadline_config = copy.deepcopy(synthetic_config)
+    deadline_config['hyperparameters']['clue_deadline_ms'] = 10 ** 9
+    seeds = range(6)
+    unset = play(synthetic_config, seeds)
+    deadline = play(deadline_config, seeds)
+    assert max(result.stats.counters['spymaster.candidates'] for _, result in deadline) > DEADLINE_CHUNK
+    for (unset_game, unset_result), (game, result) in zip(unset, deadline):
+        assert tuple(result) == tuple(unset_result)
+        assert get_clues(game) == get_clues(unset_game)
+        for team in ('red', 'blue'):
+            assert all(coverage == 1.0 for coverage in game._get_spymaster(team).get_coverage())
+
+def test_deadline_keeps_the_candidate_order_for_ties(word2vec_config):
+    spymaster = get_spymaster()
+    embedding_model = spymaster._board._embedding_model
+    team_words, bad_words = get_team_and_bad_words(spymaster)
+    spymaster._update_state(team_words + bad_words, embedding_model)
+    # Backwards, so the most promising candidate is scored first but listed last
+    candidates = spymaster._get_clue_candidates(team_words, embedding_model)[::-1]
+    assert spymaster._order_by_promise(candidates, team_words)[0] != candidates[0]
+    # Every candidate scores zero, so the first one is given
+    spymaster._weights[:] = 0
+    deadline = time.perf_counter() + 60
+    assert spymaster._best_scoring_clue(candidates, embedding_model, deadline, team_words) == candidates[0]
+    assert spymaster.get_coverage() == [1.0]
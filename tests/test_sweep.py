@@ -0,0 +1,12 @@
+from experiments import get_intended_word_metrics, get_turn_metrics, play_games
+from sweep import get_grid, get_point_config, run_sweep
+
+def test_sweep_points_match_standalone_runs(synthetic_config, get_standalone_config):
+    # The smaller vocabulary is cut from the model loaded for the larger one
+    grid = get_grid([3000, 1500], [200], [0.35])
+    rows = run_sweep(synthetic_config, grid, 6, seed=50)
+    for i, ((vector_dtype, vocab_size, topn, cosine_sim_difference), row) in enumerate(zip(grid, rows)):
+        get_standalone_config(get_point_config(synthetic_config, vector_dtype, vocab_size, topn, cosine_sim_difference), f'standalone_{i}')
+        results = play_games('sweep', 6, seed=50)
+        assert (row['average_turns'], row['min_turns'], row['assassin_games']) == get_turn_metrics(results)
+        assert (row['total_clues'], row['correct_guessed_words']) == get_intended_word_metrics(results)[:2]
@@ -0,0 +1,79 @@
+from convert_model import convert_sense2vec, convert_word2vec
+from embedding_model import EmbeddingModel, get_cache_path
+from vector_store import MemmapVectors, dequantize, dot, quantize, write_vector_store
+import gensim
+import numpy as np
+
+def test_word2vec_store_round_trip(word2vec_config, tmp_path):
+    file_path = word2vec_config['model_paths']['word2vec_model']['file_path']
+    model = gensim.models.KeyedVectors.load_word2vec_format(file_path, binary=True)
+    convert_word2vec(file_path, str(tmp_path / 'store'), 3000)
+    store = MemmapVectors(str(tmp_path / 'store'))
+    assert store.index_to_key == model.index_to_key
+    assert np.allclose(store.vectors, model.get_normed_vectors(), atol=1e-6)
+    for key in model.index_to_key[1:20]:
+        expected = model.most_similar(key, topn=10)
+        result = store.most_similar(key, n=10)
+        assert [key for key, _ in result] == [key for key, _ in expected]
+        assert np.allclose([score for _, score in result], [score for _, score in expected], atol=1e-5)
+        assert abs(store.similarity(key, expected[0][0]) - model.similarity(key, expected[0][0])) < 1e-5
+
+def test_sense2vec_store_round_trip(sense2vec_config):
+    from sense2vec import Sense2Vec
+    model_paths = sense2vec_config['model_paths']['sense2vec_model']
+    model = Sense2Vec().from_disk(model_paths['file_path'])
+    convert_sense2vec(model_paths['file_path'], get_cache_path(model_paths))
+    store = MemmapVectors(get_cache_path(model_paths))
+    assert store.index_to_key == list(model.keys())
+    for word in ['apple', 'Apple', 'bank', 'not a word']:
+        assert store.get_best_sense(word) == model.get_best_sense(word)
+    for key in ['apple|NOUN', 'apple|VERB', 'bank|NOUN']:
+        assert store.get_freq(key) == model.get_freq(key)
+        assert store.similarity(key, 'bank|NOUN') - model.similarity(key, 'bank|NOUN') < 1e-5
+    # EmbeddingModel opens the store once it exists
+    assert isinstance(EmbeddingModel().get_model(), MemmapVectors)
+
+def test_embedding_model_opens_the_store(word2vec_config):
+    model_paths = word2vec_config['model_paths']['word2vec_model']
+    expected = EmbeddingModel().most_similar_words('apple', 20)
+    convert_word2vec(model_paths['file_path'], get_cache_path(model_paths), 3000)
+    embedding_model = EmbeddingModel()
+    assert isinstance(embedding_model.get_model(), MemmapVectors)
+    assert embedding_model.most_similar_words('apple', 20) == expected
+
+def get_unit_vectors(count, dim, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_int8_error_is_bounded():
+    vectors = get_unit_vectors(1000, 64)
+    vectors[0] = 0
+    stored, scales = quantize(vectors, 'int8')
+    assert stored.dtype == np.int8 and np.abs(stored).max() == 127
+    # Rounding moves every component by at most half a step of its row
+    restored = dequantize(stored, scales)
+    assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-7)
+    assert not restored[0].any()
+    query = get_unit_vectors(1, 64, seed=1)[0]
+    # Chunked products on the compact rows equal the product of the dequantized rows
+    scores = dot(stored, query, scales, chunk_size=64)
+    assert np.allclose(scores, restored @ query, atol=1e-5)
+    # The error of a row's dot product with a unit query is at most the norm of its rounding error
+    assert np.all(np.abs(scores - vectors @ query) <= np.sqrt(64) * scales / 2 + 1e-6)
+
+def test_quantized_stores_match_the_float32_store(tmp_path):
+    keys = [f'word{i}' for i in range(500)]
+    vectors = get_unit_vectors(len(keys), 64)
+    stores = {}
+    for dtype in ('float32', 'float16', 'int8'):
+        write_vector_store(str(tmp_path / dtype), keys, vectors, chunk_size=128, dtype=dtype)
+        stores[dtype] = MemmapVectors(str(tmp_path / dtype))
+    expected = stores['float32']
+    for dtype, atol in (('float16', 1e-3), ('int8', 0.03)):
+        store = stores[dtype]
+        assert store.vectors.dtype == dtype
+        assert np.allclose(store.get_rows(np.arange(len(keys))), expected.get_rows(np.arange(len(keys))), atol=atol)
+        for key in keys[:20]:
+            assert abs(store.similarity(key, 'word100') - expected.similarity(key, 'word100')) < atol
+            for similar_key, score in store.most_similar(key, n=5):
+                assert abs(score - expected.similarity(key, similar_key)) < atol
@@ -0,0 +1,45 @@
+from embedding_model import EmbeddingModel
+from vocab import SINGLE_WORD
+import re
+
+def is_single_word(word):
+    # The filter SINGLE_WORD replaced
+    return re.match(r"^\w+$", word) is not None and "_" not in word
+
+def get_old_vocab(keys, vocab_size):
+    # The quadratic get_vocab the vocabulary replaced, returning the words and word|SENSE keys
+    vocab = []
+    word_and_senses = []
+    for term in keys[:vocab_size]:
+        parts = term.split('|')
+        curr_word = parts[0].lower()
+        if is_single_word(curr_word) and curr_word not in vocab:
+            vocab.append(curr_word)
+            if len(parts) > 1:
+                word_and_senses.append(curr_word + '|' + parts[1])
+    return vocab, word_and_senses
+
+def test_single_word_matches_the_old_filter():
+    words = ['apple', 'Apple', 'x1', '42', 'über', 'naïve', '東京', '٣', 'ice_cream', '_', '__init__',
+             'ice-cream', 'new york', "o'clock", '', 'apple\n', 'apple|NOUN']
+    for word in words:
+        assert (SINGLE_WORD.match(word) is not None) == is_single_word(word), word
+
+def test_word2vec_vocabulary_and_clues_match_the_old_filter(word2vec_config):
+    embedding_model = EmbeddingModel()
+    keys = embedding_model.get_keys()
+    vocab_size = word2vec_config['hyperparameters']['vocab_size']
+    assert embedding_model.get_vocab() == get_old_vocab(keys, vocab_size)[0]
+
+    in_model = set(keys)
+    for word in embedding_model.get_vocab()[:50]:
+        # The Spymaster's old per-candidate check of every neighbour
+        clues = [similar_word.lower() for similar_word in embedding_model.most_similar_words(word, 200)
+                 if similar_word.lower() in in_model and is_single_word(similar_word.lower())]
+        assert embedding_model.clue_candidates(word, 200) == clues
+
+def test_sense2vec_vocabulary_matches_the_old_filter(sense2vec_config):
+    from sense2vec import Sense2Vec
+    keys = list(Sense2Vec().from_disk(sense2vec_config['model_paths']['sense2vec_model']['file_path']).keys())
+    vocab_size = sense2vec_config['hyperparameters']['vocab_size']
+    assert EmbeddingModel().get_vocab() == get_old_vocab(keys, vocab_size)
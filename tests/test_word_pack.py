@@ -0,0 +1,45 @@
+from embedding_model import EmbeddingModel
+from word_pack import get_cache_dir, get_pack_id, load_word_pack
+import glob
+import os
+import word_pack
+
+def test_word_pack_keeps_the_playable_words_in_order(sense2vec_config, codename_words):
+    wordlist_path = sense2vec_config['model_paths']['codename_words']['file_path']
+    pack = load_word_pack(EmbeddingModel(), wordlist_path)
+    assert pack.get_words() == list(dict.fromkeys(codename_words))
+    assert pack.get_keys() == [f'{word}|NOUN' for word in pack.get_words()]
+    # Loaded again from the cache directory by a new process
+    word_pack._word_packs.clear()
+    cached = load_word_pack(EmbeddingModel(), wordlist_path)
+    assert cached.get_keys() == pack.get_keys()
+    assert cached.get_rows(cached.get_keys()).tolist() == pack.get_rows(pack.get_keys()).tolist()
+
+def test_fingerprint_is_reused_until_the_model_files_change(word2vec_config):
+    wordlist_path = word2vec_config['model_paths']['codename_words']['file_path']
+    embedding_model = EmbeddingModel()
+    fingerprint = embedding_model.fingerprint()
+    pack_id = get_pack_id(embedding_model, wordlist_path)
+    assert pack_id[0] == fingerprint
+    assert EmbeddingModel().fingerprint() == fingerprint
+
+    file_path = word2vec_config['model_paths']['word2vec_model']['file_path']
+    stat = os.stat(file_path)
+    os.utime(file_path, (stat.st_atime, stat.st_mtime + 10))
+    # A model keeps the fingerprint it was built with
+    assert embedding_model.fingerprint() == fingerprint
+    assert get_pack_id(embedding_model, wordlist_path) == pack_id
+
+    changed_model = EmbeddingModel()
+    assert changed_model.fingerprint() != fingerprint
+    assert get_pack_id(changed_model, wordlist_path)[0] == changed_model.fingerprint()
+    load_word_pack(embedding_model, wordlist_path)
+    load_word_pack(changed_model, wordlist_path)
+    assert len(glob.glob(os.path.join(get_cache_dir(word2vec_config), 'word_pack_*.npz'))) == 2
+
+def test_word_list_changes_give_a_new_pack_id(word2vec_config):
+    wordlist_path = word2vec_config['model_paths']['codename_words']['file_path']
+    pack_id = get_pack_id(EmbeddingModel(), wordlist_path)
+    with open(wordlist_path, 'a') as file:
+        file.write('zebra\n')
+    assert get_pack_id(EmbeddingModel(), wordlist_path)[1] != pack_id[1]
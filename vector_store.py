@@ -0,0 +1,299 @@
+import json
+import os
+import re
+import numpy as np
+
+VECTORS_FILE = 'vectors.npy'
+VOCAB_FILE = 'vocab.txt'
+FREQS_FILE = 'freqs.npy'
+META_FILE = 'meta.json'
+SCALES_FILE = 'scales.npy'
+
+# Storage types of the vectors, int8 rows are scaled back by a float32 per row
+DTYPES = ('float32', 'float16', 'int8')
+
+def is_vector_store(dir_path):
+    """
+    Check whether a path holds a vector store written by write_vector_store
+
+    dir_path(str): The path to check
+    RETURNS(bool): True if the path is a vector store directory
+    """
+    return os.path.isfile(os.path.join(dir_path, VECTORS_FILE)) and os.path.isfile(os.path.join(dir_path, VOCAB_FILE))
+
+def quantize(vectors, dtype):
+    """
+    Converts unit-normalised float32 rows to a storage type
+
+    vectors(np.ndarray): The float32 rows
+    dtype(str): One of DTYPES
+
+    RETURNS(Tuple): The stored rows, and the float32 scale of each row for int8, None otherwise
+    """
+    if dtype == 'int8':
+        # Each row is scaled so its largest component maps to 127
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return vectors.astype(dtype), None
+
+def dequantize(vectors, scales=None):
+    """
+    Converts stored rows back to float32
+
+    vectors(np.ndarray): The stored rows
+    scales(np.ndarray|None): The scale of each row, for int8 storage
+
+    RETURNS(np.ndarray): The float32 rows
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors if scales is None else vectors * np.asarray(scales)[:, None]
+
+def dot(vectors, query, scales=None, chunk_size=100000):
+    """
+    Computes the dot product of every stored row with a query. float32 rows are
+    multiplied as they are, compact rows a chunk at a time, so at most chunk_size
+    rows are ever held as float32.
+
+    vectors(np.ndarray): The stored rows
+    query(np.ndarray): The float32 query vector
+    scales(np.ndarray|None): The scale of each row, for int8 storage
+    chunk_size(int): The number of compact rows converted at a time
+
+    RETURNS(np.ndarray): The float32 score of every row
+    """
+    if vectors.dtype == np.float32:
+        return vectors @ query
+    scores = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        scores[start:start + chunk_size] = np.asarray(vectors[start:start + chunk_size], dtype=np.float32) @ query
+    return scores if scales is None else scores * scales
+
+def write_vector_store(dir_path, keys, vectors, freqs=None, senses=(), chunk_size=100000, dtype='float32', normalize=True):
+    """
+    Writes an embedding to the compact on-disk format: a unit-normalised matrix as
+    a .npy file, the keys in row order as a text file and, for sense2vec, the key
+    frequencies and available senses. Rows are normalised in chunks so the whole
+    matrix is never copied in memory. float16 halves the matrix and int8 quarters
+    it, with a scale per row kept next to it.
+
+    dir_path(str): The directory to write the store to
+    keys(list): The keys in row order
+    vectors(np.ndarray): The (len(keys), dim) vectors, normalised on write
+    freqs(list|None): The frequency of each key, used by get_best_sense
+    senses(list): The senses available in a sense2vec model
+    chunk_size(int): The number of rows normalised at a time
+    dtype(str): How the vectors are stored, one of DTYPES
+    normalize(bool): False for vectors already unit-normalised, which are then copied bit for bit
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown vector dtype: {dtype}, choose from {', '.join(DTYPES)}")
+    os.makedirs(dir_path, exist_ok=True)
+    out = np.lib.format.open_memmap(os.path.join(dir_path, VECTORS_FILE), mode='w+',
+                                    dtype=dtype, shape=(len(keys), vectors.shape[1]))
+    scales = np.ones(len(keys), dtype=np.float32) if dtype == 'int8' else None
+    for start in range(0, len(keys), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        if normalize:
+            norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+            chunk = chunk / np.where(norms == 0, 1, norms)
+        out[start:start + chunk_size], chunk_scales = quantize(chunk, dtype)
+        if scales is not None:
+            scales[start:start + chunk_size] = chunk_scales
+    out.flush()
+    del out
+    if scales is not None:
+        np.save(os.path.join(dir_path, SCALES_FILE), scales)
+    with open(os.path.join(dir_path, VOCAB_FILE), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(keys))
+    if freqs is not None:
+        np.save(os.path.join(dir_path, FREQS_FILE), np.asarray(freqs, dtype=np.int64))
+    with open(os.path.join(dir_path, META_FILE), 'w') as file:
+        json.dump({'count': len(keys), 'dim': int(vectors.shape[1]), 'senses': list(senses), 'dtype': dtype}, file)
+
+def quantize_vector_store(dir_path, out_path, dtype, chunk_size=100000):
+    """
+    Writes a copy of a vector store with its vectors in another storage type,
+    without loading the original model again
+
+    dir_path(str): The float32 vector store
+    out_path(str): The directory to write the new store to
+    dtype(str): How the vectors are stored, one of DTYPES
+    chunk_size(int): The number of rows converted at a time
+    """
+    store = MemmapVectors(dir_path)
+    write_vector_store(out_path, store.index_to_key, store.vectors, freqs=store._freqs,
+                       senses=store.senses, chunk_size=chunk_size, dtype=dtype)
+
+class MemmapVectors():
+    def __init__(self, dir_path, limit=None):
+        """
+        Opens a vector store through np.memmap. Only the vocabulary is read into
+        memory, the vectors stay in the page cache shared by every process using
+        the same store. Mirrors the parts of gensim's KeyedVectors and Sense2Vec
+        that the game uses so either backend can run on top of it. Compact float16
+        and int8 stores are converted to float32 only for the rows being read.
+
+        dir_path(str): The directory written by write_vector_store
+        limit(int|None): Only use the first limit vectors, like load_word2vec_format
+
+        RETURNS(MemmapVectors): The newly constructed object
+        """
+        with open(os.path.join(dir_path, META_FILE), 'r') as file:
+            meta = json.load(file)
+        self.senses = meta['senses']
+        self.vectors = np.load(os.path.join(dir_path, VECTORS_FILE), mmap_mode='r')[:limit]
+        with open(os.path.join(dir_path, VOCAB_FILE), 'r', encoding='utf-8') as file:
+            self.index_to_key = file.read().split('\n')[:len(self.vectors)]
+        self.key_to_index = {key: index for index, key in enumerate(self.index_to_key)}
+        freqs_path = os.path.join(dir_path, FREQS_FILE)
+        self._freqs = np.load(freqs_path, mmap_mode='r')[:limit] if os.path.isfile(freqs_path) else None
+        scales_path = os.path.join(dir_path, SCALES_FILE)
+        self.scales = np.load(scales_path, mmap_mode='r')[:limit] if os.path.isfile(scales_path) else None
+        self.dtype = meta.get('dtype', 'float32')
+        self.vector_size = self.vectors.shape[1]
+        self.norms = None
+
+    @classmethod
+    def from_arrays(cls, keys, vectors, freqs=None, senses=()):
+        """
+        Builds the same store in memory, for embeddings which are never written to disk
+
+        keys(list): The keys in row order
+        vectors(np.ndarray): The (len(keys), dim) vectors, normalised here
+        freqs(list|None): The frequency of each key, used by get_best_sense
+        senses(list): The senses available in a sense2vec model
+
+        RETURNS(MemmapVectors): The in-memory store
+        """
+        store = cls.__new__(cls)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        store.senses = list(senses)
+        store.vectors = vectors / np.where(norms == 0, 1, norms)
+        store.index_to_key = list(keys)
+        store.key_to_index = {key: index for index, key in enumerate(store.index_to_key)}
+        store._freqs = None if freqs is None else np.asarray(freqs)
+        store.scales = None
+        store.dtype = 'float32'
+        store.vector_size = store.vectors.shape[1]
+        store.norms = None
+        return store
+
+    def truncate(self, limit):
+        """
+        Get the store limited to its first limit vectors, sharing its arrays
+
+        limit(int): The number of vectors to keep
+        RETURNS(MemmapVectors): The smaller store
+        """
+        store = MemmapVectors.__new__(MemmapVectors)
+        store.senses = self.senses
+        store.vectors = self.vectors[:limit]
+        store.index_to_key = self.index_to_key[:len(store.vectors)]
+        store.key_to_index = {key: index for index, key in enumerate(store.index_to_key)}
+        store._freqs = None if self._freqs is None else self._freqs[:limit]
+        store.scales = None if self.scales is None else self.scales[:limit]
+        store.dtype = self.dtype
+        store.vector_size = self.vector_size
+        store.norms = None
+        return store
+
+    def __len__(self):
+        return len(self.index_to_key)
+
+    def get_rows(self, rows):
+        """
+        Get rows of the store as float32
+
+        rows(np.ndarray): The rows to read
+        RETURNS(np.ndarray): The (len(rows), dim) unit-normalised float32 vectors
+        """
+        return dequantize(self.vectors[rows], None if self.scales is None else self.scales[rows])
+
+    def get_nbytes(self):
+        """
+        Get the size of the stored vectors
+
+        RETURNS(int): The bytes taken by the vectors and their scales
+        """
+        return self.vectors.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def __contains__(self, key):
+        return key in self.key_to_index
+
+    def __getitem__(self, key):
+        """
+        Retrieve the vector for a key, None if the key is not in the store
+
+        key(str): The key to look up
+        RETURNS(np.ndarray|None): The unit-normalised vector
+        """
+        index = self.key_to_index.get(key)
+        return None if index is None else self.get_rows([index])[0]
+
+    def keys(self):
+        return self.index_to_key
+
+    def fill_norms(self):
+        # Vectors are normalised on write
+        if self.norms is None:
+            self.norms = np.ones(len(self.vectors), dtype=np.float32)
+
+    def get_vector(self, key, norm=True):
+        if key not in self.key_to_index:
+            raise KeyError(f"Key '{key}' not present")
+        return self.get_rows([self.key_to_index[key]])[0]
+
+    def similarity(self, key1, key2):
+        return float(np.dot(self.get_vector(key1), self.get_vector(key2)))
+
+    def most_similar(self, keys, n=10):
+        """
+        Get the most similar keys by brute force cosine similarity. If more than one
+        key is provided the average of their vectors is used.
+
+        keys(str|list): The key or keys to compare to
+        n(int): The number of similar keys to return
+
+        RETURNS(list): The (key, score) tuples of the most similar vectors, excluding keys
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        rows = [self.key_to_index[key] for key in keys if key in self.key_to_index]
+        if len(rows) != len(keys):
+            raise KeyError(f"Key '{keys}' not present")
+        query = self.get_rows(rows).mean(axis=0)
+        query /= np.linalg.norm(query) or 1
+        scores = dot(self.vectors, query, self.scales)
+        # Always ask for more because the keys themselves are always the best match
+        count = min(len(scores), n + len(rows))
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(self.index_to_key[index], float(scores[index])) for index in best if index not in rows][:n]
+
+    def similar_by_word(self, word, topn=10):
+        return self.most_similar(word, n=topn)
+
+    def get_freq(self, key, default=None):
+        index = self.key_to_index.get(key)
+        if index is None or self._freqs is None:
+            return default
+        return int(self._freqs[index])
+
+    def get_best_sense(self, word, ignore_case=True):
+        """
+        Find the most frequent sense of a word, as Sense2Vec.get_best_sense does
+
+        word(str): The word to check
+        ignore_case(bool): Check for uppercase, lowercase and titlecase
+        RETURNS(str|None): The best matching key or None if no match is found
+        """
+        versions = set([word, word.lower(), word.upper(), word.title()]) if ignore_case else [word]
+        freqs = []
+        for text in versions:
+            for sense in self.senses:
+                key = re.sub(r"\s", "_", text) + '|' + sense
+                if key in self.key_to_index:
+                    freqs.append((self.get_freq(key, -1), key))
+        return max(freqs)[1] if freqs else None
@@ -0,0 +1,123 @@
+import os
+import re
+import numpy as np
+
+# A single word, letters and digits only, which \w alone would let underscores into
+SINGLE_WORD = re.compile(r"^[^\W_]+$")
+
+# Vocabularies already opened by this process, keyed by path
+_vocabularies = {}
+
+def get_vocabulary_path(embedding_model):
+    """
+    Get where the vocabulary of a model is kept, next to the model
+
+    embedding_model(EmbeddingModel): The model the vocabulary is built from
+    RETURNS(str): The path to the .npz vocabulary file
+    """
+    base = os.path.splitext(embedding_model._file_path.rstrip('/\\'))[0]
+    return f'{base}_vocab_{embedding_model.fingerprint()}.npz'
+
+def split_key(key):
+    """
+    Split a model key into its word and sense
+
+    key(str): A word2vec word or a sense2vec word|SENSE key
+    RETURNS(Tuple): The word and the sense, None for word2vec keys
+    """
+    parts = key.split('|')
+    return parts[0], parts[1] if len(parts) > 1 else None
+
+class Vocabulary():
+    def __init__(self, vocab_rows, clue_rows):
+        """
+        Initialize the Vocabulary, the single words of a model worked out once
+        for every row of the model
+
+        vocab_rows(np.ndarray): The first row of every distinct lower case single word, in row order
+        clue_rows(np.ndarray): For every row, the row of the clue it is given as, or -1
+        if its key is not an admissible clue
+
+        RETURNS(Vocabulary): The newly constructed object
+        """
+        self._vocab_rows = np.asarray(vocab_rows, dtype=np.int64)
+        self._clue_rows = np.asarray(clue_rows, dtype=np.int64)
+
+    def get_vocab_rows(self, vocab_size):
+        """
+        Get the rows of the distinct single words among the first vocab_size keys
+
+        vocab_size(int): The number of keys the vocabulary is taken from
+        RETURNS(np.ndarray): The int64 rows in row order
+        """
+        return self._vocab_rows[:np.searchsorted(self._vocab_rows, vocab_size)]
+
+    def get_clue_rows(self, rows):
+        """
+        Get the clue row of each model row, replacing a per word check of the key
+
+        rows(np.ndarray): Model rows, -1 for keys not in the model
+        RETURNS(np.ndarray): The int64 clue rows, -1 where the row is not an admissible clue
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return np.where(rows >= 0, self._clue_rows[rows], -1)
+
+    def save(self, file_path):
+        np.savez(file_path, vocab_rows=self._vocab_rows, clue_rows=self._clue_rows)
+
+    @classmethod
+    def load(cls, file_path):
+        data = np.load(file_path)
+        return cls(data['vocab_rows'], data['clue_rows'])
+
+def build_vocabulary(keys, get_indices, embedding):
+    """
+    Builds the vocabulary in a single pass over the keys, with a set for the
+    duplicate check, so the work is linear in the number of keys
+
+    keys(list): Every key of the model in row order
+    get_indices(callable): Looks up the model rows of a list of keys
+    embedding(str): The embedding model in use, either word2vec or sense2vec
+
+    RETURNS(Vocabulary): The built vocabulary
+    """
+    vocab_rows = []
+    single_words = np.zeros(len(keys), dtype=bool)
+    lower_words = []
+    seen = set()
+    for row, key in enumerate(keys):
+        word, _ = split_key(key)
+        curr_word = word.lower()
+        lower_words.append(curr_word)
+        single_word = SINGLE_WORD.match(curr_word) is not None
+        # Check if word is a singular word and not already in vocab
+        if single_word and curr_word not in seen:
+            seen.add(curr_word)
+            vocab_rows.append(row)
+        # Sense2vec clues keep the case of the key
+        single_words[row] = SINGLE_WORD.match(word) is not None if embedding == 'sense2vec' else single_word
+    if embedding == 'sense2vec':
+        # Sense2vec clues are the key itself, sense included
+        clue_rows = np.arange(len(keys), dtype=np.int64)
+    else:
+        # Word2vec clues are the lower case word, if it is in the model too
+        clue_rows = get_indices(lower_words)
+    return Vocabulary(vocab_rows, np.where(single_words, clue_rows, -1))
+
+def load_vocabulary(embedding_model):
+    """
+    Loads the vocabulary of a model. It is built once, then reused from memory
+    within a process and from a file next to the model across runs.
+
+    embedding_model(EmbeddingModel): The model the vocabulary is built from
+    RETURNS(Vocabulary): The vocabulary
+    """
+    file_path = get_vocabulary_path(embedding_model)
+    if file_path not in _vocabularies:
+        if os.path.isfile(file_path):
+            _vocabularies[file_path] = Vocabulary.load(file_path)
+        else:
+            vocabulary = build_vocabulary(embedding_model.get_keys(), embedding_model.get_indices, embedding_model._embedding)
+            vocabulary.save(file_path)
+            _vocabularies[file_path] = vocabulary
+    return _vocabularies[file_path]
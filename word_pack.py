@@ -0,0 +1,140 @@
+import hashlib
+import os
+import numpy as np
+
+# Word packs already built by this process, keyed by (model fingerprint, wordlist hash)
+_word_packs = {}
+
+def get_cache_dir(config):
+    """
+    Get the directory where precomputed game data is cached
+
+    config(dict): The parsed config.yaml
+    RETURNS(str): The configured cache_dir path, model_paths/cache by default
+    """
+    return config['model_paths'].get('cache_dir', {}).get('file_path', os.path.join('model_paths', 'cache'))
+
+def hash_file(file_path):
+    """
+    Hash the contents of a file
+
+    file_path(str): The file to hash
+    RETURNS(str): A short hash of the file contents
+    """
+    with open(file_path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()[:16]
+
+class WordPack():
+    def __init__(self, words, keys, rows):
+        """
+        Initialize the WordPack, the codename words which are playable with a model
+
+        words(list): The codename words found in the model
+        keys(list): The model key of each word, its best sense for sense2vec
+        rows(np.ndarray): The row of each key in the model's vocabulary
+
+        RETURNS(WordPack): The newly constructed object
+        """
+        self._words = list(words)
+        self._keys = list(keys)
+        self._rows = np.asarray(rows, dtype=np.int64)
+        self._key_to_row = dict(zip(self._keys, self._rows.tolist()))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get_words(self):
+        return self._words
+
+    def get_keys(self):
+        """
+        Get the keys which are placed on boards
+
+        RETURNS(list): The word for word2vec and the word|SENSE key for sense2vec
+        """
+        return self._keys
+
+    def get_rows(self, keys):
+        """
+        Get the model rows of board keys without touching the model
+
+        keys(list): Keys from this pack
+        RETURNS(np.ndarray): The int64 row of each key
+        """
+        return np.array([self._key_to_row[key] for key in keys], dtype=np.int64)
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        np.savez(file_path, words=np.array(self._words), keys=np.array(self._keys), rows=self._rows)
+
+    @classmethod
+    def load(cls, file_path):
+        data = np.load(file_path)
+        return cls(data['words'].tolist(), data['keys'].tolist(), data['rows'])
+
+def build_word_pack(embedding_model, file_words, embedding):
+    """
+    Checks which codename words exist in the model and resolves each to its key
+
+    embedding_model(EmbeddingModel): The model to validate the words against
+    file_words(list): All codename words from the word list
+    embedding(str): The embedding model in use, either word2vec or sense2vec
+
+    RETURNS(WordPack): The playable words, their keys and rows
+    """
+    words = []
+    keys = []
+    seen = set()
+    # Keep the word list order so boards only depend on the random seed
+    for word in dict.fromkeys(file_words):
+        if embedding == 'word2vec':
+            key = word if word in embedding_model.get_model() else None
+        elif embedding == 'sense2vec':
+            # Get best sense for file words, handling keys that are not present in model
+            try:
+                key = embedding_model.get_best_sense(word)
+            except KeyError:
+                key = None
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        words.append(word)
+        keys.append(key)
+    return WordPack(words, keys, embedding_model.get_indices(keys))
+
+def get_pack_id(embedding_model, wordlist_path):
+    """
+    Identifies the word pack, and everything precomputed from it, for a model and word list.
+    The word list is hashed once per model, so dealing boards does not read it again.
+
+    embedding_model(EmbeddingModel): The model the words are played with
+    wordlist_path(str): The path to the codename word list
+    RETURNS(Tuple): The model fingerprint and the word list hash
+    """
+    pack_ids = embedding_model._pack_ids
+    if wordlist_path not in pack_ids:
+        pack_ids[wordlist_path] = (embedding_model.fingerprint(), hash_file(wordlist_path))
+    return pack_ids[wordlist_path]
+
+def load_word_pack(embedding_model, wordlist_path):
+    """
+    Loads the playable word pack for a model and word list. Packs are built once,
+    then reused from memory within a process and from the cache directory across runs.
+
+    embedding_model(EmbeddingModel): The model the words are played with
+    wordlist_path(str): The path to the codename word list
+
+    RETURNS(WordPack): The playable words, their keys and rows
+    """
+    pack_id = get_pack_id(embedding_model, wordlist_path)
+    if pack_id not in _word_packs:
+        cache_path = os.path.join(get_cache_dir(embedding_model._config), f'word_pack_{pack_id[0]}_{pack_id[1]}.npz')
+        if os.path.isfile(cache_path):
+            _word_packs[pack_id] = WordPack.load(cache_path)
+        else:
+            with open(wordlist_path, 'r') as file:
+                file_words = file.read().split()
+            word_pack = build_word_pack(embedding_model, file_words, embedding_model._embedding)
+            word_pack.save(cache_path)
+            _word_packs[pack_id] = word_pack
+    return _word_packs[pack_id]